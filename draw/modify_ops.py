@@ -1,70 +1,92 @@
 # Fusion/draw/modify_ops.py
 # -*- coding: utf-8 -*-
-import math
-import vtk
+from contextlib import nullcontext
+
+from draw.sketch_fillet import fillet_entities, fillet_loop
+from draw.sketch_offset import offset_entities
+from draw.sketch_trim import extend_entity, trim_entity
+from tools.offset_engine import JOIN_ROUND
 
 class ModifyOps:
-    """أدوات التعديل: Trim / Offset / Mirror / Fillet"""
+    """أدوات التعديل: Trim / Extend / Offset / Mirror / Fillet (على IDs عناصر sketch_doc)"""
     def __init__(self, viewer):
         self.viewer = viewer
         self.renderer = viewer.renderer
 
-    # ✂️ Trim: يحذف أقرب عنصر للنقرة (نسخة أولية — نطوّرها لاحقًا)
-    def trim(self, click_world):
-        actors = self.renderer.GetActors()
-        actors.InitTraversal()
-        closest, best = None, float("inf")
-        a = actors.GetNextActor()
-        while a:
-            try:
-                b = a.GetBounds()
-                cx, cy = (b[0]+b[1])/2.0, (b[2]+b[3])/2.0
-                d = math.hypot(click_world[0]-cx, click_world[1]-cy)
-                if d < best:
-                    best, closest = d, a
-            except:
-                pass
-            a = actors.GetNextActor()
-        if closest and best < 20:
-            self.renderer.RemoveActor(closest)
-            self.renderer.GetRenderWindow().Render()
+    @property
+    def index(self):
+        return getattr(self.viewer, "sketch_index", None)
+
+    @property
+    def doc(self):
+        return getattr(self.viewer, "sketch_doc", None)
+
+    @property
+    def constraints(self):
+        return getattr(self.viewer, "sketch_constraints", None)
 
-    # ↔ Offset: ينسخ العنصر بإزاحة بسيطة (مبدئيًا ترجمة)
-    def offset(self, base_actor, distance=10.0):
-        if not base_actor: return
-        tf = vtk.vtkTransform(); tf.Translate(distance, distance, 0)
-        filt = vtk.vtkTransformPolyDataFilter()
-        filt.SetInputData(base_actor.GetMapper().GetInput())
-        filt.SetTransform(tf); filt.Update()
-        m = vtk.vtkPolyDataMapper(); m.SetInputData(filt.GetOutput())
-        n = vtk.vtkActor(); n.SetMapper(m)
-        n.GetProperty().SetColor(0.45, 0.55, 0.8)
-        self.renderer.AddActor(n)
+    def _history(self, label):
+        history = getattr(self.viewer, "history", None)
+        return history.transaction(label) if history is not None else nullcontext()
+
+    def _editing(self):
+        # القيود على الأطراف التي تحركها الأداة تُنقل أو تُحذف داخل نفس المعاملة
+        return self.constraints.editing() if self.constraints is not None else nullcontext()
+
+    # ✂️ Trim: قص أقرب عنصر عند تقاطعاته (استعلام على الفهرس المكاني)
+    def trim(self, click_world, pick_radius=20.0):
+        if self.doc is None or self.index is None: return None
+        closest, _ = self.index.nearest(click_world[0], click_world[1], pick_radius)
+        if closest is None: return None
+        with self._history("Trim"), self._editing():
+            kept = trim_entity(self.doc, closest, click_world, self.index)
         self.renderer.GetRenderWindow().Render()
+        return kept
+
+    # ↦ Extend: مد الطرف الأقرب حتى أول عنصر يقطعه
+    def extend(self, click_world, pick_radius=20.0):
+        if self.doc is None or self.index is None: return False
+        closest, _ = self.index.nearest(click_world[0], click_world[1], pick_radius)
+        if closest is None: return False
+        with self._history("Extend"), self._editing():
+            done = extend_entity(self.doc, closest, click_world, self.index)
+        self.renderer.GetRenderWindow().Render()
+        return done
+
+    # ↔ Offset: إزاحة هندسية حقيقية (draw/sketch_offset + tools/offset_engine)
+    def offset(self, ids, distance=10.0, join=JOIN_ROUND):
+        if self.doc is None or ids is None or not len(ids): return None
+        with self._history("Offset"):
+            new_ids = offset_entities(self.doc, ids, distance, join)
+        self.renderer.GetRenderWindow().Render()
+        return new_ids
 
     # 🔁 Mirror: مرآة حول محور X أو Y (مبدئيًا)
-    def mirror(self, base_actor, axis="Y"):
-        if not base_actor: return
-        s = (1, -1, 1) if axis.upper()=="X" else (-1, 1, 1)
-        tf = vtk.vtkTransform(); tf.Scale(*s)
-        filt = vtk.vtkTransformPolyDataFilter()
-        filt.SetInputData(base_actor.GetMapper().GetInput())
-        filt.SetTransform(tf); filt.Update()
-        m = vtk.vtkPolyDataMapper(); m.SetInputData(filt.GetOutput())
-        n = vtk.vtkActor(); n.SetMapper(m)
-        n.GetProperty().SetColor(0.5, 0.5, 0.7)
-        self.renderer.AddActor(n)
+    def mirror(self, ids, axis="Y"):
+        if self.doc is None or ids is None or not len(ids): return None
+        sx, sy = (1.0, -1.0) if axis.upper()=="X" else (-1.0, 1.0)
+        with self._history("Mirror"), self.doc.batch():
+            rec = self.doc.records(ids); rec.style = ["mirror"] * len(rec)
+            new_ids = self.doc.add_records(rec)
+            self.doc.transform(new_ids, [[sx, 0.0, 0.0], [0.0, sy, 0.0]])
+        self.renderer.GetRenderWindow().Render()
+        return new_ids
+
+    # ◔ Fillet: قوس مماسي بين العنصرين الأقرب للنقرتين (مع قصهما)
+    def fillet(self, p1, p2, radius=5.0, pick_radius=20.0):
+        if self.doc is None or self.index is None: return None
+        e1, _ = self.index.nearest(p1[0], p1[1], pick_radius)
+        e2, _ = self.index.nearest(p2[0], p2[1], pick_radius)
+        if e1 is None or e2 is None or e1 == e2: return None
+        with self._history("Fillet"), self._editing():
+            eid = fillet_entities(self.doc, e1, p1, e2, p2, radius)
         self.renderer.GetRenderWindow().Render()
+        return eid
 
-    # ◔ Fillet: قوس بسيط بين نقطتين (نسخة أولية — نطورها لاحقًا)
-    def fillet(self, p1, p2, radius=5.0):
-        arc = vtk.vtkArcSource()
-        arc.SetPoint1(*p1); arc.SetPoint2(*p2)
-        arc.SetCenter((p1[0]+p2[0])/2.0, (p1[1]+p2[1])/2.0, 0.0)
-        arc.SetResolution(64); arc.Update()
-        m = vtk.vtkPolyDataMapper(); m.SetInputConnection(arc.GetOutputPort())
-        a = vtk.vtkActor(); a.SetMapper(m)
-        a.GetProperty().SetColor(0.6, 0.5, 0.8)
-        a.GetProperty().SetLineWidth(2)
-        self.renderer.AddActor(a)
+    # ◔ Fillet لكل زوايا حلقة مغلقة
+    def fillet_loop(self, ids, radius=5.0):
+        if self.doc is None or ids is None or not len(ids): return None
+        with self._history("Fillet Loop"), self._editing():
+            arcs = fillet_loop(self.doc, ids, radius)
         self.renderer.GetRenderWindow().Render()
+        return arcs
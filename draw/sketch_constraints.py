@@ -0,0 +1,567 @@
+# -*- coding: utf-8 -*-
+"""
+sketch_constraints.py — قيود وأبعاد بارامترية لعناصر SketchDocument
+- القيود: coincident / horizontal / vertical / equal / tangent / distance / radius
+- المتغيرات = أعمدة هندسة العناصر المقيدة فقط (خط 4، دائرة 3، قوس 5)
+- الحل: Newton متفرق (Gauss–Newton بأصغر تغيير: dx = -Jᵀ (J Jᵀ + λI)⁻¹ F)
+  فيبقى الرسم أقرب ما يمكن لوضعه الحالي، والقيود الزائدة لا تكسر الحل
+- تزايدي: القيود تُجمَّع في عناقيد (عناصر مترابطة بقيود)، وأي تعديل يعيد حل عنقوده فقط
+- القيود التي يُحذف أحد عناصرها تُتجاهل (وتعود فعّالة إن أعاد التراجع العنصر)
+- أدوات Modify (Trim / Extend / Fillet) تنقل الأطراف مباشرة داخل editing():
+  القيد على طرف تحرك يُنقل للجزء الجديد الذي يملك الموضع القديم، وإلا يُحذف
+- Jacobian بفروق محدودة محلية: كل قيد يُشتق فقط على أعمدة العناصر التي يعتمد عليها
+"""
+
+from __future__ import annotations
+import math
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from draw.sketch_document import ARC, CIRCLE, LINE, SketchDocument
+
+_HAS_SCIPY = True
+try:
+    from scipy.sparse import coo_matrix, identity
+    from scipy.sparse.linalg import spsolve
+except Exception:
+    _HAS_SCIPY = False
+
+COINCIDENT = "coincident"
+HORIZONTAL = "horizontal"
+VERTICAL = "vertical"
+EQUAL = "equal"
+TANGENT = "tangent"
+DISTANCE = "distance"
+RADIUS = "radius"
+# القيود التي تحمل قيمة (أبعاد)
+DIMENSIONS = (DISTANCE, RADIUS)
+
+START = "start"
+END = "end"
+CENTER = "center"
+
+# عدد أعمدة الهندسة التي تُعامل كمتغيرات لكل نوع
+_COLS = {LINE: 4, CIRCLE: 3, ARC: 5}
+# طرف تحرك أكثر من هذا بعد أداة Modify = قيوده لم تعد تصفه
+MOVE_TOL = 1e-6
+
+PointRef = Tuple[int, str]
+
+
+class Constraint:
+    """قيد واحد: refs إما نقاط (eid, start|end|center) أو IDs عناصر."""
+
+    __slots__ = ("cid", "kind", "refs", "value", "sign")
+
+    def __init__(self, cid: int, kind: str, refs: tuple, value: Optional[float] = None, sign: float = 1.0):
+        self.cid = cid
+        self.kind = kind
+        self.refs = refs
+        self.value = value
+        self.sign = sign
+
+    def entities(self) -> Tuple[int, ...]:
+        return tuple(dict.fromkeys(r[0] if isinstance(r, tuple) else r for r in self.refs))
+
+    def __repr__(self) -> str:
+        val = "" if self.value is None else f" = {self.value:g}"
+        return f"<Constraint {self.cid} {self.kind} {self.refs}{val}>"
+
+
+# ------------------------------------------------------------
+# 📐 دوال البواقي (residuals) — geo: eid -> (kind, geom)
+# ------------------------------------------------------------
+def _point(geo, ref: PointRef) -> np.ndarray:
+    eid, which = ref
+    kind, g = geo[eid]
+    if which == CENTER or kind == CIRCLE:
+        return g[0:2]
+    if kind == LINE:
+        return g[0:2] if which == START else g[2:4]
+    ang = g[3] if which == START else g[4]
+    return g[0:2] + g[2] * np.array([math.cos(ang), math.sin(ang)])
+
+
+def _size(geo, eid: int) -> float:
+    kind, g = geo[eid]
+    return float(np.hypot(*(g[2:4] - g[0:2]))) if kind == LINE else float(g[2])
+
+
+def _signed_distance(geo, line: int, pt: np.ndarray) -> float:
+    _, g = geo[line]
+    d = g[2:4] - g[0:2]
+    w = pt - g[0:2]
+    return float(d[0] * w[1] - d[1] * w[0]) / max(float(np.hypot(*d)), 1e-12)
+
+
+def _tangent(geo, c: Constraint) -> np.ndarray:
+    a, b = c.refs
+    if geo[a][0] != LINE and geo[b][0] == LINE:
+        a, b = b, a
+    if geo[a][0] == LINE:
+        return np.array([_signed_distance(geo, a, geo[b][1][0:2]) - c.sign * geo[b][1][2]])
+    (_, ga), (_, gb) = geo[a], geo[b]
+    dist = float(np.hypot(*(ga[0:2] - gb[0:2])))
+    # sign: +1 تماس خارجي، -1 داخلي
+    target = ga[2] + gb[2] if c.sign > 0 else abs(ga[2] - gb[2])
+    return np.array([dist - target])
+
+
+def _point_cols(kind: int, which: str) -> Tuple[int, ...]:
+    if which == CENTER or kind == CIRCLE:
+        return (0, 1)
+    if kind == LINE:
+        return (0, 1) if which == START else (2, 3)
+    return (0, 1, 2, 3) if which == START else (0, 1, 2, 4)
+
+
+def _local_cols(geo, c: Constraint) -> List[Tuple[int, Tuple[int, ...]]]:
+    """(eid, أعمدة الهندسة التي يعتمد عليها القيد) — تقلل عدد الفروق المحدودة."""
+    if c.kind in (COINCIDENT, DISTANCE):
+        out: Dict[int, set] = defaultdict(set)
+        for eid, which in c.refs:
+            out[eid].update(_point_cols(geo[eid][0], which))
+        return [(eid, tuple(sorted(cols))) for eid, cols in out.items()]
+    if c.kind == HORIZONTAL:
+        return [(c.refs[0], (1, 3))]
+    if c.kind == VERTICAL:
+        return [(c.refs[0], (0, 2))]
+    if c.kind == RADIUS:
+        return [(c.refs[0], (2,))]
+    if c.kind == EQUAL:
+        return [(eid, (0, 1, 2, 3) if geo[eid][0] == LINE else (2,)) for eid in c.entities()]
+    return [(eid, (0, 1, 2, 3) if geo[eid][0] == LINE else (0, 1, 2)) for eid in c.entities()]
+
+
+def _collinear(g1: np.ndarray, g2: np.ndarray) -> bool:
+    """خطان على نفس الحامل (جزءان من خط واحد بعد Trim)."""
+    d = g1[2:4] - g1[0:2]
+    n = max(float(np.hypot(*d)), 1e-12)
+    cross = lambda w: abs(float(d[0] * w[1] - d[1] * w[0])) / n
+    return cross(g2[0:2] - g1[0:2]) <= MOVE_TOL and cross(g2[2:4] - g1[0:2]) <= MOVE_TOL
+
+
+_RESIDUALS = {
+    COINCIDENT: lambda geo, c: _point(geo, c.refs[0]) - _point(geo, c.refs[1]),
+    HORIZONTAL: lambda geo, c: np.array([geo[c.refs[0]][1][3] - geo[c.refs[0]][1][1]]),
+    VERTICAL: lambda geo, c: np.array([geo[c.refs[0]][1][2] - geo[c.refs[0]][1][0]]),
+    EQUAL: lambda geo, c: np.array([_size(geo, c.refs[0]) - _size(geo, c.refs[1])]),
+    TANGENT: _tangent,
+    DISTANCE: lambda geo, c: np.array([float(np.hypot(*(_point(geo, c.refs[0]) - _point(geo, c.refs[1]))))
+                                       - c.value]),
+    RADIUS: lambda geo, c: np.array([geo[c.refs[0]][1][2] - c.value]),
+}
+
+
+class SketchConstraints:
+    """مخزن القيود + الحل التزايدي فوق SketchDocument."""
+
+    def __init__(self, document: SketchDocument, tol: float = 1e-9, max_iter: int = 30):
+        self.doc = document
+        self.tol = tol
+        self.max_iter = max_iter
+        # سجل التراجع (CommandStack) إن وُجد: إضافة/حذف القيود وتغيير قيمها تُسجَّل معه
+        self.history = None
+
+        self._items: Dict[int, Constraint] = {}
+        self._by_entity: Dict[int, Set[int]] = defaultdict(set)
+        self._next_id = 1
+        self.last_residual = 0.0
+        self.last_iterations = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __getitem__(self, cid: int) -> Constraint:
+        return self._items[cid]
+
+    # ------------------------------------------------------------
+    # 📝 إضافة / حذف
+    # ------------------------------------------------------------
+    def _record(self, undo, redo):
+        if self.history is not None:
+            self.history.record_action(undo, redo)
+
+    def _insert(self, c: Constraint):
+        self._items[c.cid] = c
+        for eid in c.entities():
+            self._by_entity[eid].add(c.cid)
+
+    def _drop(self, c: Constraint):
+        self._items.pop(c.cid, None)
+        for eid in c.entities():
+            owners = self._by_entity.get(eid)
+            if owners is not None:
+                owners.discard(c.cid)
+                if not owners:
+                    del self._by_entity[eid]
+
+    def add(self, kind: str, refs, value: Optional[float] = None, solve: bool = True) -> Optional[int]:
+        """
+        إضافة قيد؛ solve=True يحل عنقوده فوراً. يُعيد رقم القيد،
+        أو None إن تعذر الحل معه (تعارض) — عندها لا يُضاف ولا يتغير الرسم.
+        """
+        if kind not in _RESIDUALS:
+            raise ValueError(f"نوع قيد غير معروف: {kind!r}")
+        if kind in DIMENSIONS and value is None:
+            raise ValueError(f"القيد {kind} يحتاج قيمة.")
+        refs = tuple((int(r[0]), r[1]) if isinstance(r, tuple) else int(r) for r in refs)
+        c = Constraint(self._next_id, kind, refs, None if value is None else float(value))
+        for eid in c.entities():
+            if eid not in self.doc:
+                raise KeyError(f"العنصر {eid} غير موجود في الرسم.")
+        if kind in (HORIZONTAL, VERTICAL) and self.doc.kind_of(refs[0]) != LINE:
+            raise ValueError(f"القيد {kind} للخطوط فقط.")
+        if kind == TANGENT:
+            c.sign = self._tangent_sign(*refs)
+        self._next_id += 1
+        self._insert(c)
+        if solve and not self.solve_around(c.entities()):
+            self._drop(c)
+            return None
+        self._record(lambda: self._drop(c), lambda: self._insert(c))
+        return c.cid
+
+    def _tangent_sign(self, a: int, b: int) -> float:
+        """جهة التماس تُحدَّد من الوضع الحالي (يمين/يسار الخط، خارجي/داخلي للدوائر)."""
+        ka, kb = self.doc.kind_of(a), self.doc.kind_of(b)
+        if ka == LINE and kb == LINE:
+            raise ValueError("التماس يحتاج قوساً أو دائرة.")
+        geo = {a: (ka, self.doc.geom_of(a)), b: (kb, self.doc.geom_of(b))}
+        if ka != LINE and kb == LINE:
+            a, b = b, a
+        if geo[a][0] == LINE:
+            return 1.0 if _signed_distance(geo, a, geo[b][1][0:2]) >= 0 else -1.0
+        ga, gb = geo[a][1], geo[b][1]
+        return 1.0 if np.hypot(*(ga[0:2] - gb[0:2])) >= max(ga[2], gb[2]) else -1.0
+
+    def remove(self, cid: int):
+        c = self._items.get(cid)
+        if c is None:
+            return
+        self._drop(c)
+        self._record(lambda: self._insert(c), lambda: self._drop(c))
+
+    def _swap(self, old: Constraint, new: Constraint):
+        self._drop(old)
+        self._insert(new)
+
+    def _retarget(self, c: Constraint, refs: tuple):
+        """نفس القيد (نفس الرقم والقيمة) على نقاط أخرى."""
+        new = Constraint(c.cid, c.kind, refs, c.value, c.sign)
+        self._swap(c, new)
+        self._record(lambda: self._swap(new, c), lambda: self._swap(c, new))
+
+    # اختصارات
+    def coincident(self, p: PointRef, q: PointRef, solve: bool = True) -> Optional[int]:
+        return self.add(COINCIDENT, (p, q), solve=solve)
+
+    def horizontal(self, eid: int, solve: bool = True) -> Optional[int]:
+        return self.add(HORIZONTAL, (eid,), solve=solve)
+
+    def vertical(self, eid: int, solve: bool = True) -> Optional[int]:
+        return self.add(VERTICAL, (eid,), solve=solve)
+
+    def equal(self, a: int, b: int, solve: bool = True) -> Optional[int]:
+        return self.add(EQUAL, (a, b), solve=solve)
+
+    def tangent(self, a: int, b: int, solve: bool = True) -> Optional[int]:
+        return self.add(TANGENT, (a, b), solve=solve)
+
+    def distance(self, p: PointRef, q: PointRef, value: float, solve: bool = True) -> Optional[int]:
+        return self.add(DISTANCE, (p, q), value, solve=solve)
+
+    def length(self, eid: int, value: float, solve: bool = True) -> Optional[int]:
+        return self.add(DISTANCE, ((eid, START), (eid, END)), value, solve=solve)
+
+    def radius(self, eid: int, value: float, solve: bool = True) -> Optional[int]:
+        return self.add(RADIUS, (eid,), value, solve=solve)
+
+    # ------------------------------------------------------------
+    # 📋 استعلام
+    # ------------------------------------------------------------
+    def _active(self, c: Constraint) -> bool:
+        return all(eid in self.doc for eid in c.entities())
+
+    def constraints_of(self, eid: int) -> List[Constraint]:
+        return [self._items[cid] for cid in sorted(self._by_entity.get(int(eid), ()))]
+
+    def dimension_of(self, eid: int) -> Optional[int]:
+        """رقم بُعد العنصر نفسه (طول الخط أو نصف القطر) إن وُجد."""
+        eid = int(eid)
+        for c in self.constraints_of(eid):
+            if c.kind == RADIUS or (c.kind == DISTANCE and c.refs == ((eid, START), (eid, END))):
+                return c.cid
+        return None
+
+    def cluster(self, eids: Iterable[int]) -> Tuple[Set[int], List[int]]:
+        """العناصر والقيود الفعّالة المترابطة مع eids (المكوّن المتصل في رسم القيود)."""
+        seen: Set[int] = set()
+        cids: Set[int] = set()
+        stack = [int(e) for e in eids if int(e) in self.doc]
+        seen.update(stack)
+        while stack:
+            eid = stack.pop()
+            for cid in self._by_entity.get(eid, ()):
+                c = self._items[cid]
+                if cid in cids or not self._active(c):
+                    continue
+                cids.add(cid)
+                for other in c.entities():
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+        return seen, sorted(cids)
+
+    # ------------------------------------------------------------
+    # ✂️ أدوات Modify: أطراف تتحرك خارج الحل
+    # ------------------------------------------------------------
+    @contextmanager
+    def editing(self):
+        """
+        كتلة أداة تنقل أطراف العناصر مباشرة (Trim / Extend / Fillet).
+        عند الخروج تُطبَّق release_moved على ما تغيّر، داخل نفس المعاملة.
+        """
+        before = {eid: (self.doc.kind_of(eid), self.doc.geom_of(eid).copy())
+                  for eid in self._by_entity if eid in self.doc}
+        if not before:
+            yield self
+            return
+        ids = self.doc.ids()
+        last_id = int(ids.max()) if len(ids) else 0
+        changed: Set[int] = set()
+
+        def listener(ch, _removed):
+            changed.update(int(i) for i in ch)
+
+        self.doc.add_listener(listener)
+        try:
+            yield self
+        finally:
+            self.doc.remove_listener(listener)
+        self.release_moved(before, [e for e in changed if e > last_id])
+
+    def release_moved(self, before: Dict[int, Tuple[int, np.ndarray]], added: Iterable[int] = ()) -> Tuple[int, int]:
+        """
+        before: هندسة العناصر المقيدة قبل الأداة؛ added: العناصر التي أنشأتها (أجزاء Trim / أقواس Fillet).
+        - coincident / distance على طرف تحرك: يُنقل لطرف عنصر جديد في الموضع القديم، وإلا يُحذف
+        - بُعد طول العنصر نفسه، وequal لخط تغيّر طوله: يُحذف
+        - horizontal / vertical / tangent / radius تبقى (الأداة لا تغيّر الحامل)،
+          والجزء الجديد على نفس الخط (Trim في المنتصف) يرث horizontal / vertical
+        يُعيد (عدد المنقول، عدد المحذوف).
+        """
+        doc = self.doc
+        edited = {eid for eid, (kind, g) in before.items()
+                  if eid in doc and doc.kind_of(eid) == kind
+                  and not np.allclose(doc.geom_of(eid), g, rtol=0.0, atol=1e-12)}
+        if not edited:
+            return 0, 0
+        added = [int(e) for e in added if int(e) in doc and doc.kind_of(e) != CIRCLE]
+        now = {eid: (doc.kind_of(eid), doc.geom_of(eid)) for eid in edited | set(added)}
+        targets = [((eid, which), _point(now, (eid, which))) for eid in added for which in (START, END)]
+
+        def moved(ref) -> bool:
+            return (isinstance(ref, tuple) and ref[0] in edited and ref[1] != CENTER
+                    and float(np.hypot(*(_point(before, ref) - _point(now, ref)))) > MOVE_TOL)
+
+        def new_owner(ref, skip) -> Optional[PointRef]:
+            old = _point(before, ref)
+            for t, pt in targets:
+                if t[0] not in skip and float(np.hypot(*(pt - old))) <= MOVE_TOL:
+                    return t
+            return None
+
+        for a in added:
+            if now[a][0] != LINE:
+                continue
+            for e in edited:
+                if now[e][0] != LINE or not _collinear(now[e][1], now[a][1]):
+                    continue
+                for c in self.constraints_of(e):
+                    if c.kind in (HORIZONTAL, VERTICAL):
+                        self.add(c.kind, (a,), solve=False)
+                break
+
+        retargeted = dropped = 0
+        cids = sorted({cid for eid in edited for cid in self._by_entity.get(eid, ())})
+        for cid in cids:
+            c = self._items[cid]
+            if not self._active(c):
+                continue
+            ents = c.entities()
+            if c.kind in (COINCIDENT, DISTANCE):
+                if not any(moved(r) for r in c.refs):
+                    continue
+                refs = None if len(ents) == 1 else tuple(new_owner(r, ents) if moved(r) else r for r in c.refs)
+                if refs is not None and all(r is not None for r in refs):
+                    self._retarget(c, refs)
+                    retargeted += 1
+                    continue
+            elif not (c.kind == EQUAL and any(
+                    e in edited and now[e][0] == LINE and abs(_size(before, e) - _size(now, e)) > MOVE_TOL
+                    for e in ents)):
+                continue
+            self.remove(cid)
+            dropped += 1
+        return retargeted, dropped
+
+    # ------------------------------------------------------------
+    # 🧮 الحل
+    # ------------------------------------------------------------
+    def set_value(self, cid: int, value: float, solve: bool = True) -> bool:
+        """
+        تعديل قيمة بُعد وإعادة حل عنقوده فقط.
+        False إن تعذر الحل (تعارض مع القيود الأخرى): تعود القيمة السابقة ولا يتغير الرسم.
+        """
+        c = self._items[cid]
+        old, new = c.value, float(value)
+
+        def apply(v):
+            c.value = v
+
+        apply(new)
+        if solve and not self.solve_around(c.entities()):
+            apply(old)
+            return False
+        self._record(lambda: apply(old), lambda: apply(new))
+        return True
+
+    def solve_around(self, eids: Iterable[int], locked: Iterable[int] = ()) -> bool:
+        """
+        حل العناقيد التي تحوي eids فقط. locked: عناصر ثابتة (مثلاً العنصر الذي سحبه المستخدم)؛
+        إن تعذر الحل مع تثبيتها يُعاد الحل بدون تثبيت.
+        """
+        ents, cids = self.cluster(eids)
+        if not cids:
+            return True
+        locked = {int(e) for e in locked} & ents
+        if locked and self._solve(ents, cids, locked):
+            return True
+        return self._solve(ents, cids, set())
+
+    def solve_all(self) -> bool:
+        ok = True
+        done: Set[int] = set()
+        for eid in list(self._by_entity):
+            if eid in done or eid not in self.doc:
+                continue
+            ents, cids = self.cluster([eid])
+            done |= ents
+            if cids:
+                ok = self._solve(ents, cids, set()) and ok
+        return ok
+
+    def _solve(self, ents: Set[int], cids: List[int], locked: Set[int]) -> bool:
+        doc = self.doc
+        cons = [self._items[c] for c in cids]
+        geo = {eid: (doc.kind_of(eid), doc.geom_of(eid)) for eid in ents}
+        free = sorted(ents - locked)
+        offset: Dict[int, int] = {}
+        n = 0
+        for eid in free:
+            offset[eid] = n
+            n += _COLS[geo[eid][0]]
+        if n == 0:
+            return False
+
+        def pack() -> np.ndarray:
+            return np.concatenate([geo[e][1][:_COLS[geo[e][0]]] for e in free])
+
+        def unpack(x: np.ndarray):
+            for e in free:
+                k = offset[e]
+                geo[e][1][:_COLS[geo[e][0]]] = x[k:k + _COLS[geo[e][0]]]
+
+        def residual() -> np.ndarray:
+            return np.concatenate([_RESIDUALS[c.kind](geo, c) for c in cons])
+
+        def jacobian(f0: np.ndarray):
+            rows, cols, vals = [], [], []
+            r0 = 0
+            for c in cons:
+                base = _RESIDUALS[c.kind](geo, c)
+                m = len(base)
+                for eid, local in _local_cols(geo, c):
+                    if eid not in offset:
+                        continue
+                    g = geo[eid][1]
+                    for j in local:
+                        h = 1e-7 * max(1.0, abs(g[j]))
+                        keep = g[j]
+                        g[j] = keep + h
+                        d = (_RESIDUALS[c.kind](geo, c) - base) / h
+                        g[j] = keep
+                        nz = np.flatnonzero(d)
+                        rows.extend((r0 + nz).tolist())
+                        cols.extend([offset[eid] + j] * len(nz))
+                        vals.extend(d[nz].tolist())
+                r0 += m
+            return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64), np.asarray(vals)
+
+        x = pack()
+        x_start = x.copy()
+        f = residual()
+        err = float(np.abs(f).max()) if len(f) else 0.0
+        it = 0
+        while err > self.tol and it < self.max_iter:
+            it += 1
+            step = _min_norm_step(jacobian(f), len(f), n, f)
+            if step is None:
+                break
+            # بحث خطي بسيط: نصف الخطوة حتى يقل الباقي
+            t = 1.0
+            for _ in range(8):
+                unpack(x + t * step)
+                f_new = residual()
+                err_new = float(np.abs(f_new).max())
+                if err_new < err:
+                    break
+                t *= 0.5
+            else:
+                unpack(x)
+                break
+            x, f, err = x + t * step, f_new, err_new
+
+        self.last_residual = err
+        self.last_iterations = it
+        if err > max(self.tol * 1e3, 1e-6):
+            return False
+        if it == 0 or np.allclose(x, x_start, rtol=0.0, atol=1e-12):
+            return True
+
+        changed = [e for e in free if not np.allclose(geo[e][1], doc.geom_of(e), rtol=0.0, atol=1e-12)]
+        rows = []
+        for e in changed:
+            g = geo[e][1]
+            if geo[e][0] == ARC:
+                # اتجاه القوس عكس عقارب الساعة دائماً: a0 < a1 <= a0 + 2π
+                sweep = math.fmod(g[4] - g[3] + 4 * math.pi, 2 * math.pi)
+                g[4] = g[3] + (sweep if sweep > 1e-12 else 2 * math.pi)
+            if geo[e][0] != LINE:
+                g[2] = abs(g[2])
+            rows.append(g)
+        if changed:
+            doc.set_geom(changed, np.asarray(rows))
+        return True
+
+
+def _min_norm_step(jac, m: int, n: int, f: np.ndarray) -> Optional[np.ndarray]:
+    """dx = -Jᵀ (J Jᵀ + λI)⁻¹ F — أصغر تغيير يحقق الخطية (مع تنظيم خفيف للقيود الزائدة)."""
+    rows, cols, vals = jac
+    if _HAS_SCIPY:
+        J = coo_matrix((vals, (rows, cols)), shape=(m, n)).tocsr()
+        A = (J @ J.T).tocsc()
+        lam = 1e-10 * max(float(abs(A).max()) if A.nnz else 1.0, 1.0)
+        y = spsolve(A + lam * identity(m, format="csc"), -f)
+        step = J.T @ y
+    else:
+        J = np.zeros((m, n))
+        np.add.at(J, (rows, cols), vals)
+        step = np.linalg.lstsq(J, -f, rcond=None)[0]
+    return step if np.all(np.isfinite(step)) else None
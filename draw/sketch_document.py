@@ -0,0 +1,646 @@
+# -*- coding: utf-8 -*-
+"""
+sketch_document.py — نموذج الرسم (مستقل عن VTK)
+- كل العناصر (خط / قوس / دائرة) في مصفوفات NumPy متجاورة: نوع + هندسة (6 أعمدة) + نمط + مجموعة
+- لكل عنصر ID ثابت لا يتغير (حتى بعد الحذف وإعادة الضغط)
+- العرض (SketchView) والفهرس المكاني والإكسترود/CAM يقرؤون من هنا مباشرة
+- المستمعون (listeners) يُبلَّغون بالـ IDs المتغيرة/المحذوفة فقط
+
+تخطيط عمود الهندسة geom لكل نوع:
+    LINE   : x1, y1, x2, y2, 0, 0
+    CIRCLE : cx, cy, r, 0, 0, 0
+    ARC    : cx, cy, r, a0, a1, 0     (عكس عقارب الساعة من a0 إلى a1، a0 < a1 <= a0 + 2π)
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import math
+import numpy as np
+
+LINE, ARC, CIRCLE = 0, 1, 2
+KIND_NAMES = {LINE: "line", ARC: "arc", CIRCLE: "circle"}
+
+GEOM_COLS = 6
+# عدد أضلاع الدائرة الكاملة عند التقسيم للعرض (مثل vtkRegularPolygonSource السابق)
+CIRCLE_SIDES = 64
+
+_INITIAL_CAPACITY = 64
+NO_GROUP = -1
+
+Listener = Callable[[np.ndarray, np.ndarray], None]
+
+
+class SketchRecords:
+    """نسخة مضغوطة من مجموعة عناصر (للنسخ / اللصق / التراجع)."""
+
+    __slots__ = ("ids", "kind", "geom", "style", "group")
+
+    def __init__(self, ids, kind, geom, style, group):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.kind = np.asarray(kind, dtype=np.int8)
+        self.geom = np.asarray(geom, dtype=np.float64).reshape(-1, GEOM_COLS)
+        self.style: List[str] = list(style)
+        self.group = np.asarray(group, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.ids.nbytes + self.kind.nbytes + self.geom.nbytes + self.group.nbytes
+                + sum(len(s) for s in self.style))
+
+
+class SketchDocument:
+    """مخزن العناصر: مصفوفات قابلة للنمو + خريطة ID -> صف."""
+
+    def __init__(self):
+        self._kind = np.zeros(_INITIAL_CAPACITY, dtype=np.int8)
+        self._geom = np.zeros((_INITIAL_CAPACITY, GEOM_COLS), dtype=np.float64)
+        self._style = np.zeros(_INITIAL_CAPACITY, dtype=np.int16)
+        self._group = np.full(_INITIAL_CAPACITY, NO_GROUP, dtype=np.int64)
+        self._ids = np.full(_INITIAL_CAPACITY, -1, dtype=np.int64)
+        self._alive = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+        self._rows = 0
+        self._row_of: Dict[int, int] = {}
+        self._next_id = 1
+
+        self._styles: List[str] = []
+        self._style_code: Dict[str, int] = {}
+
+        self._listeners: List[Listener] = []
+        self._batch_depth = 0
+        self._pending_changed: set = set()
+        self._pending_removed: set = set()
+        self.version = 0
+
+        # التقاط الحالة السابقة للعناصر المتأثرة (للتراجع): id -> صف سابق أو None (لم يكن موجوداً)
+        self._capture: Optional[Dict[int, Optional[tuple]]] = None
+        self._capture_depth = 0
+
+    # ------------------------------------------------------------
+    # 📋 معلومات
+    # ------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, eid) -> bool:
+        return int(eid) in self._row_of
+
+    def ids(self) -> np.ndarray:
+        """IDs العناصر الحية بترتيب الإضافة."""
+        rows = np.flatnonzero(self._alive[:self._rows])
+        return self._ids[rows].copy()
+
+    def _rows_for(self, ids) -> np.ndarray:
+        return np.fromiter((self._row_of[int(i)] for i in ids), dtype=np.int64)
+
+    def kind_of(self, eid) -> int:
+        return int(self._kind[self._row_of[int(eid)]])
+
+    def geom_of(self, eid) -> np.ndarray:
+        return self._geom[self._row_of[int(eid)]].copy()
+
+    def style_of(self, eid) -> str:
+        return self._styles[self._style[self._row_of[int(eid)]]]
+
+    def group_of(self, eid) -> int:
+        return int(self._group[self._row_of[int(eid)]])
+
+    def group_members(self, eid) -> np.ndarray:
+        """كل عناصر مجموعة العنصر (مثلاً أضلاع المستطيل الأربعة)، أو العنصر وحده."""
+        g = self.group_of(eid)
+        if g == NO_GROUP:
+            return np.array([int(eid)], dtype=np.int64)
+        rows = np.flatnonzero(self._alive[:self._rows] & (self._group[:self._rows] == g))
+        return self._ids[rows].copy()
+
+    def styles(self) -> List[str]:
+        return list(self._styles)
+
+    def ids_with_style(self, style: str) -> np.ndarray:
+        code = self._style_code.get(style)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        n = self._rows
+        rows = np.flatnonzero(self._alive[:n] & (self._style[:n] == code))
+        return self._ids[rows].copy()
+
+    # ------------------------------------------------------------
+    # 🔔 المستمعون
+    # ------------------------------------------------------------
+    def add_listener(self, fn: Listener):
+        """fn(changed_ids, removed_ids) بعد كل تعديل (أو مرة واحدة في نهاية batch)."""
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn: Listener):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    @contextmanager
+    def batch(self):
+        """دمج عدة تعديلات في إشعار واحد."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush()
+
+    def _notify(self, changed=(), removed=()):
+        self.version += 1
+        for i in changed:
+            self._pending_changed.add(int(i))
+            self._pending_removed.discard(int(i))
+        for i in removed:
+            self._pending_removed.add(int(i))
+            self._pending_changed.discard(int(i))
+        if self._batch_depth == 0:
+            self._flush()
+
+    def _flush(self):
+        if not (self._pending_changed or self._pending_removed):
+            return
+        changed = np.fromiter(self._pending_changed, dtype=np.int64)
+        removed = np.fromiter(self._pending_removed, dtype=np.int64)
+        self._pending_changed.clear()
+        self._pending_removed.clear()
+        for fn in list(self._listeners):
+            fn(changed, removed)
+
+    # ------------------------------------------------------------
+    # ↩️ التقاط الفروقات (deltas)
+    # ------------------------------------------------------------
+    def begin_capture(self):
+        """بدء تسجيل الحالة السابقة لكل عنصر يُعدَّل (يدعم التداخل)."""
+        if self._capture_depth == 0:
+            self._capture = {}
+        self._capture_depth += 1
+
+    def end_capture(self) -> Optional["SketchDelta"]:
+        """إنهاء التسجيل: فرق مضغوط (قبل/بعد للعناصر المتأثرة فقط) أو None إن لم يتغير شيء."""
+        self._capture_depth -= 1
+        if self._capture_depth > 0:
+            return None
+        captured, self._capture = self._capture, None
+        if not captured:
+            return None
+        before = [(eid, row) for eid, row in captured.items() if row is not None]
+        after_ids = [eid for eid in captured if eid in self._row_of]
+        return SketchDelta(
+            _records_from_rows(before),
+            np.array([eid for eid, row in captured.items() if row is None], dtype=np.int64),
+            self.records(after_ids) if after_ids else _empty_records(),
+            np.array([eid for eid in captured if eid not in self._row_of], dtype=np.int64),
+        )
+
+    def _remember(self, ids):
+        cap = self._capture
+        if cap is None:
+            return
+        for eid in np.atleast_1d(ids).tolist():
+            if eid in cap:
+                continue
+            r = self._row_of.get(eid)
+            cap[eid] = None if r is None else (
+                int(self._kind[r]), self._geom[r].copy(), self._styles[self._style[r]], int(self._group[r]))
+
+    def restore(self, rec: "SketchRecords", remove_ids=()):
+        """تطبيق حالة: حذف remove_ids ثم كتابة rec (تحديث الموجود وإضافة المفقود بنفس IDs)."""
+        with self.batch():
+            if len(remove_ids):
+                self.remove(remove_ids)
+            if not len(rec):
+                return
+            exists = np.array([int(i) in self._row_of for i in rec.ids.tolist()], dtype=bool)
+            if exists.any():
+                ids = rec.ids[exists]
+                self._remember(ids)
+                rows = self._rows_for(ids)
+                self._kind[rows] = rec.kind[exists]
+                self._geom[rows] = rec.geom[exists]
+                self._style[rows] = [self._code(st) for st, e in zip(rec.style, exists) if e]
+                self._group[rows] = rec.group[exists]
+                self._notify(changed=ids)
+            if (~exists).any():
+                missing = ~exists
+                self.add_many(rec.kind[missing], rec.geom[missing],
+                              [st for st, m in zip(rec.style, missing) if m], rec.group[missing],
+                              ids=rec.ids[missing])
+
+    # ------------------------------------------------------------
+    # ✏️ الإضافة
+    # ------------------------------------------------------------
+    def _code(self, style: str) -> int:
+        code = self._style_code.get(style)
+        if code is None:
+            code = len(self._styles)
+            self._styles.append(style)
+            self._style_code[style] = code
+        return code
+
+    def _reserve(self, extra: int):
+        need = self._rows + extra
+        cap = len(self._kind)
+        if need <= cap:
+            return
+        # إعادة ضغط أولاً إن كان نصف الصفوف محذوفاً
+        if len(self._row_of) * 2 < self._rows:
+            self._compact()
+            if self._rows + extra <= cap:
+                return
+        new_cap = max(cap * 2, self._rows + extra)
+        pad = new_cap - cap
+        self._kind = np.concatenate([self._kind, np.zeros(pad, dtype=np.int8)])
+        self._geom = np.concatenate([self._geom, np.zeros((pad, GEOM_COLS))])
+        self._style = np.concatenate([self._style, np.zeros(pad, dtype=np.int16)])
+        self._group = np.concatenate([self._group, np.full(pad, NO_GROUP, dtype=np.int64)])
+        self._ids = np.concatenate([self._ids, np.full(pad, -1, dtype=np.int64)])
+        self._alive = np.concatenate([self._alive, np.zeros(pad, dtype=bool)])
+
+    def _compact(self):
+        rows = np.flatnonzero(self._alive[:self._rows])
+        n = len(rows)
+        for arr in (self._kind, self._geom, self._style, self._group, self._ids):
+            arr[:n] = arr[rows]
+        self._alive[:n] = True
+        self._alive[n:] = False
+        self._rows = n
+        self._row_of = {int(eid): r for r, eid in enumerate(self._ids[:n].tolist())}
+
+    def add_many(self, kind, geom, style="line", group=None, ids=None) -> np.ndarray:
+        """
+        إضافة عدة عناصر دفعة واحدة. style نص واحد أو قائمة بنفس الطول.
+        ids: لإعادة عناصر محذوفة بنفس IDs (التراجع)؛ وإلا تُولَّد IDs جديدة.
+        """
+        kind = np.atleast_1d(np.asarray(kind, dtype=np.int8))
+        n = len(kind)
+        geom = np.asarray(geom, dtype=np.float64).reshape(n, -1)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        else:
+            ids = np.asarray(ids, dtype=np.int64)
+            clash = [int(i) for i in ids if int(i) in self._row_of]
+            if clash:
+                raise ValueError(f"IDs already exist in the sketch: {clash[:5]}")
+        self._next_id = max(self._next_id, int(ids.max()) + 1)
+        self._remember(ids)
+
+        self._reserve(n)
+        r0, r1 = self._rows, self._rows + n
+        self._kind[r0:r1] = kind
+        self._geom[r0:r1] = 0.0
+        self._geom[r0:r1, :geom.shape[1]] = geom
+        if isinstance(style, str):
+            self._style[r0:r1] = self._code(style)
+        else:
+            self._style[r0:r1] = [self._code(s) for s in style]
+        self._group[r0:r1] = NO_GROUP if group is None else np.broadcast_to(group, (n,))
+        self._ids[r0:r1] = ids
+        self._alive[r0:r1] = True
+        for k, eid in enumerate(ids.tolist()):
+            self._row_of[eid] = r0 + k
+        self._rows = r1
+        self._notify(changed=ids)
+        return ids
+
+    def add_line(self, p1, p2, style: str = "line", group=None) -> int:
+        return int(self.add_many(LINE, [[p1[0], p1[1], p2[0], p2[1]]], style, group)[0])
+
+    def add_circle(self, center, radius: float, style: str = "circle") -> int:
+        return int(self.add_many(CIRCLE, [[center[0], center[1], float(radius)]], style)[0])
+
+    def add_arc(self, center, radius: float, a0: float, a1: float, style: str = "arc") -> int:
+        """قوس عكس عقارب الساعة من a0 إلى a1 (راديان)."""
+        a0, a1 = _normalize_sweep(a0, a1)
+        return int(self.add_many(ARC, [[center[0], center[1], float(radius), a0, a1]], style)[0])
+
+    def add_polyline(self, points, closed: bool = False, style: str = "line") -> np.ndarray:
+        """خطوط متصلة كمجموعة واحدة (المستطيل = 4 خطوط مجمّعة)."""
+        pts = np.asarray(points, dtype=np.float64)[:, :2]
+        if closed:
+            pts = np.vstack([pts, pts[:1]])
+        geom = np.hstack([pts[:-1], pts[1:]])
+        group = self._next_id
+        return self.add_many(np.full(len(geom), LINE), geom, style, group=group)
+
+    def add_records(self, rec: SketchRecords, keep_ids: bool = False) -> np.ndarray:
+        """إعادة إدراج نسخة (لصق بـ IDs جديدة، أو تراجع بنفس IDs)."""
+        if not len(rec):
+            return np.empty(0, dtype=np.int64)
+        group = rec.group
+        if not keep_ids:
+            # المجموعات المنسوخة تحصل على أرقام مجموعات جديدة
+            group = group.copy()
+            base = self._next_id
+            for k, g in enumerate(np.unique(group[group != NO_GROUP])):
+                group[rec.group == g] = base + k
+            self._next_id = base + len(np.unique(rec.group[rec.group != NO_GROUP]))
+        return self.add_many(rec.kind, rec.geom, rec.style, group, rec.ids if keep_ids else None)
+
+    # ------------------------------------------------------------
+    # 🧰 التعديل
+    # ------------------------------------------------------------
+    def records(self, ids) -> SketchRecords:
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        rows = self._rows_for(ids)
+        return SketchRecords(ids, self._kind[rows], self._geom[rows],
+                             [self._styles[c] for c in self._style[rows]], self._group[rows])
+
+    def remove(self, ids) -> SketchRecords:
+        """حذف عناصر؛ يُعيد نسختها (للتراجع)."""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        ids = np.array([i for i in ids.tolist() if i in self._row_of], dtype=np.int64)
+        rec = self.records(ids) if len(ids) else _empty_records()
+        self._remember(ids)
+        for eid in ids.tolist():
+            self._alive[self._row_of.pop(eid)] = False
+        if len(ids):
+            self._notify(removed=ids)
+        return rec
+
+    def clear(self):
+        removed = self.ids()
+        self._remember(removed)
+        self._alive[:] = False
+        self._rows = 0
+        self._row_of.clear()
+        if len(removed):
+            self._notify(removed=removed)
+
+    def set_geom(self, ids, geom):
+        """استبدال هندسة عناصر موجودة (نفس النوع)."""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        self._remember(ids)
+        rows = self._rows_for(ids)
+        geom = np.asarray(geom, dtype=np.float64).reshape(len(ids), -1)
+        self._geom[rows] = 0.0
+        self._geom[rows, :geom.shape[1]] = geom
+        self._notify(changed=ids)
+
+    def set_style(self, ids, style: str):
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        self._remember(ids)
+        self._style[self._rows_for(ids)] = self._code(style)
+        self._notify(changed=ids)
+
+    def translate(self, ids, dx: float, dy: float):
+        self.transform(ids, np.array([[1.0, 0.0, dx], [0.0, 1.0, dy]]))
+
+    def transform(self, ids, matrix):
+        """
+        تحويل تشابهي (دوران / انعكاس / إزاحة / تكبير منتظم) بمصفوفة 2x3.
+        الأقواس: المركز يُحوَّل، نصف القطر يُضرب بمعامل التكبير،
+        ونهايتا القوس تُحوَّلان (وتُبدَّلان عند الانعكاس للحفاظ على اتجاه عكس عقارب الساعة).
+        """
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        if not len(ids):
+            return
+        self._remember(ids)
+        rows = self._rows_for(ids)
+        m = np.asarray(matrix, dtype=np.float64)
+        lin, t = m[:, :2], m[:, 2]
+        det = float(np.linalg.det(lin))
+        scale = math.sqrt(abs(det))
+
+        kind = self._kind[rows]
+        g = self._geom[rows].copy()
+
+        is_line = kind == LINE
+        g[is_line, 0:2] = g[is_line, 0:2] @ lin.T + t
+        g[is_line, 2:4] = g[is_line, 2:4] @ lin.T + t
+
+        curved = ~is_line
+        g[curved, 0:2] = g[curved, 0:2] @ lin.T + t
+        g[curved, 2] *= scale
+
+        is_arc = kind == ARC
+        if is_arc.any():
+            # الزوايا: اتجاه نقطتي البداية والنهاية بعد التحويل الخطي
+            a0, a1 = g[is_arc, 3], g[is_arc, 4]
+            d0 = np.stack([np.cos(a0), np.sin(a0)], axis=1) @ lin.T
+            d1 = np.stack([np.cos(a1), np.sin(a1)], axis=1) @ lin.T
+            n0 = np.arctan2(d0[:, 1], d0[:, 0])
+            n1 = np.arctan2(d1[:, 1], d1[:, 0])
+            sweep = a1 - a0
+            if det < 0:
+                n0, n1 = n1, n0
+            g[is_arc, 3] = n0
+            g[is_arc, 4] = n0 + sweep
+
+        self._geom[rows] = g
+        self._notify(changed=ids)
+
+    # ------------------------------------------------------------
+    # 📐 قراءة الهندسة
+    # ------------------------------------------------------------
+    def endpoints(self, eid) -> Optional[Tuple[Tuple[float, float], Tuple[float, float]]]:
+        """نهايتا الخط أو القوس (None للدائرة)."""
+        k, g = self.kind_of(eid), self.geom_of(eid)
+        if k == LINE:
+            return (g[0], g[1]), (g[2], g[3])
+        if k == ARC:
+            cx, cy, r, a0, a1 = g[:5]
+            return ((cx + r * math.cos(a0), cy + r * math.sin(a0)),
+                    (cx + r * math.cos(a1), cy + r * math.sin(a1)))
+        return None
+
+    def bounds(self, ids=None) -> Optional[Tuple[float, float, float, float]]:
+        """(xmin, ymin, xmax, ymax) للعناصر (الأقواس بصندوق دائرتها الكاملة)، أو None إن لم توجد."""
+        if ids is None:
+            rows = np.flatnonzero(self._alive[:self._rows])
+        else:
+            rows = self._rows_for(np.atleast_1d(ids))
+        if not len(rows):
+            return None
+        kind, g = self._kind[rows], self._geom[rows]
+        lines = kind == LINE
+        lo = np.where(lines[:, None], np.minimum(g[:, 0:2], g[:, 2:4]), g[:, 0:2] - g[:, 2:3])
+        hi = np.where(lines[:, None], np.maximum(g[:, 0:2], g[:, 2:4]), g[:, 0:2] + g[:, 2:3])
+        (x0, y0), (x1, y1) = lo.min(axis=0), hi.max(axis=0)
+        return float(x0), float(y0), float(x1), float(y1)
+
+    def tessellate(self, ids=None, sides: int = CIRCLE_SIDES) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        مقاطع مستقيمة (K, 2, 2) لكل العناصر (أو ids المحددة) + owner (K,) = ID العنصر لكل مقطع.
+        الأقواس والدوائر تُقسَّم بعدد أضلاع متناسب مع زاوية المسح.
+        """
+        if ids is None:
+            rows = np.flatnonzero(self._alive[:self._rows])
+        else:
+            rows = self._rows_for(np.atleast_1d(ids))
+        kind = self._kind[rows]
+        geom = self._geom[rows]
+        eids = self._ids[rows]
+
+        lines = kind == LINE
+        seg_l = geom[lines, :4].reshape(-1, 2, 2)
+        own_l = eids[lines]
+
+        curved = ~lines
+        if not curved.any():
+            return seg_l, own_l
+        g = geom[curved]
+        start = np.where(kind[curved] == ARC, g[:, 3], 0.0)
+        sweep = np.where(kind[curved] == ARC, g[:, 4] - g[:, 3], 2 * np.pi)
+        n = np.maximum(np.ceil(sides * sweep / (2 * np.pi)).astype(np.int64), 2)
+        owner = np.repeat(np.arange(len(g)), n)
+        first = np.cumsum(n) - n
+        k = np.arange(int(n.sum())) - first[owner]
+        t0 = start[owner] + sweep[owner] * (k / n[owner])
+        t1 = start[owner] + sweep[owner] * ((k + 1) / n[owner])
+        cx, cy, r = g[owner, 0], g[owner, 1], g[owner, 2]
+        seg_c = np.empty((len(owner), 2, 2))
+        seg_c[:, 0, 0] = cx + r * np.cos(t0)
+        seg_c[:, 0, 1] = cy + r * np.sin(t0)
+        seg_c[:, 1, 0] = cx + r * np.cos(t1)
+        seg_c[:, 1, 1] = cy + r * np.sin(t1)
+
+        return np.concatenate([seg_l, seg_c]), np.concatenate([own_l, eids[curved][owner]])
+
+    def to_segment_array(self, ids=None, chord_tol: float = 0.01):
+        """
+        المخطط كـ SegmentArray (مع circles لكل مقطع من قوس/دائرة) جاهز لـ extrude / CAM.
+        دقة التقسيم من chord_tol (نفس منطق ArcBatch).
+        """
+        from profile.segment_array import SegmentArray
+
+        if ids is None:
+            rows = np.flatnonzero(self._alive[:self._rows])
+        else:
+            rows = self._rows_for(np.atleast_1d(ids))
+        kind, geom = self._kind[rows], self._geom[rows]
+
+        lines = kind == LINE
+        seg = [geom[lines, :4].reshape(-1, 2, 2)]
+        circ = [np.full((int(lines.sum()), 3), np.nan)]
+        for g, k in zip(geom[~lines], kind[~lines]):
+            r = g[2]
+            a0, sweep = (g[3], g[4] - g[3]) if k == ARC else (0.0, 2 * np.pi)
+            step = 2 * math.acos(max(-1.0, 1 - chord_tol / r)) if r > chord_tol else np.pi / 4
+            n = max(int(math.ceil(sweep / max(step, 1e-6))), 4 if k == CIRCLE else 2)
+            t = a0 + sweep * np.linspace(0.0, 1.0, n + 1)
+            pts = np.stack([g[0] + r * np.cos(t), g[1] + r * np.sin(t)], axis=1)
+            seg.append(np.stack([pts[:-1], pts[1:]], axis=1))
+            circ.append(np.tile(g[:3], (n, 1)))
+        return SegmentArray(np.concatenate(seg), circles=np.concatenate(circ))
+
+    def snaps(self, eid) -> Tuple[np.ndarray, List[str]]:
+        """نقاط الالتقاط لعنصر واحد."""
+        pts, _, kinds = self.snaps_many([eid])
+        return pts, kinds
+
+    def snaps_many(self, ids) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        نقاط الالتقاط (m, 2) + owner (m,) فهرس في ids + الأنواع:
+        نهايات/منتصف للخط والقوس (+ المركز للقوس)، مركز + أرباع للدائرة.
+        """
+        from draw.sketch_index import SNAP_END, SNAP_MID, SNAP_CENTER, SNAP_QUADRANT
+
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        rows = self._rows_for(ids)
+        kind, g = self._kind[rows], self._geom[rows]
+        pos = np.arange(len(ids))
+        pts, own, kinds = [], [], []
+
+        m = kind == LINE
+        if m.any():
+            gl = g[m]
+            pts += [gl[:, 0:2], gl[:, 2:4], 0.5 * (gl[:, 0:2] + gl[:, 2:4])]
+            own += [pos[m]] * 3
+            kinds += [SNAP_END] * (2 * len(gl)) + [SNAP_MID] * len(gl)
+
+        m = kind == CIRCLE
+        if m.any():
+            gc = g[m]
+            c, r = gc[:, 0:2], gc[:, 2:3]
+            pts += [c, c + r * [1, 0], c + r * [0, 1], c - r * [1, 0], c - r * [0, 1]]
+            own += [pos[m]] * 5
+            kinds += [SNAP_CENTER] * len(gc) + [SNAP_QUADRANT] * (4 * len(gc))
+
+        m = kind == ARC
+        if m.any():
+            ga = g[m]
+            c, r = ga[:, 0:2], ga[:, 2:3]
+            for ang in (ga[:, 3], ga[:, 4], 0.5 * (ga[:, 3] + ga[:, 4])):
+                pts.append(c + r * np.stack([np.cos(ang), np.sin(ang)], axis=1))
+            pts.append(c)
+            own += [pos[m]] * 4
+            kinds += [SNAP_END] * (2 * len(ga)) + [SNAP_MID] * len(ga) + [SNAP_CENTER] * len(ga)
+
+        if not pts:
+            return np.empty((0, 2)), np.empty(0, dtype=np.int64), []
+        return np.concatenate(pts), np.concatenate(own), kinds
+
+
+class SketchDelta:
+    """فرق مضغوط بين حالتين: العناصر المتأثرة فقط (قبل / بعد)."""
+
+    __slots__ = ("before", "added", "after", "removed")
+
+    def __init__(self, before: SketchRecords, added: np.ndarray, after: SketchRecords, removed: np.ndarray):
+        self.before = before      # الحالة السابقة للعناصر التي كانت موجودة
+        self.added = added        # IDs لم تكن موجودة قبل (أُضيفت)
+        self.after = after        # الحالة الجديدة للعناصر الموجودة بعد
+        self.removed = removed    # IDs لم تعد موجودة (حُذفت)
+
+    @property
+    def nbytes(self) -> int:
+        return self.before.nbytes + self.after.nbytes + self.added.nbytes + self.removed.nbytes
+
+    def ids(self) -> np.ndarray:
+        """كل IDs التي قد يعيدها هذا الفرق أو يحذفها."""
+        return np.concatenate([self.before.ids, self.added, self.after.ids, self.removed])
+
+    def undo(self, doc: SketchDocument):
+        doc.restore(self.before, self.added)
+
+    def redo(self, doc: SketchDocument):
+        doc.restore(self.after, self.removed)
+
+
+def _empty_records() -> SketchRecords:
+    return SketchRecords([], [], np.empty((0, GEOM_COLS)), [], [])
+
+
+def _records_from_rows(items) -> SketchRecords:
+    if not items:
+        return _empty_records()
+    ids, rows = zip(*items)
+    kind, geom, style, group = zip(*rows)
+    return SketchRecords(ids, kind, np.stack(geom), style, group)
+
+
+def _normalize_sweep(a0: float, a1: float) -> Tuple[float, float]:
+    """a0 في [0, 2π) و a0 < a1 <= a0 + 2π."""
+    two_pi = 2 * math.pi
+    a0 = a0 % two_pi
+    sweep = (a1 - a0) % two_pi
+    if sweep < 1e-12:
+        sweep = two_pi
+    return a0, a0 + sweep
+
+
+def arc_from_3pts(p1, p2, p3) -> Optional[Tuple[Tuple[float, float], float, float, float]]:
+    """(center, r, a0, a1) لقوس يمر بالنقاط الثلاث بالترتيب، أو None إن كانت على استقامة."""
+    (x1, y1), (x2, y2), (x3, y3) = p1[:2], p2[:2], p3[:2]
+    d = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if abs(d) < 1e-9:
+        return None
+    s1, s2, s3 = x1 * x1 + y1 * y1, x2 * x2 + y2 * y2, x3 * x3 + y3 * y3
+    cx = (s1 * (y2 - y3) + s2 * (y3 - y1) + s3 * (y1 - y2)) / d
+    cy = (s1 * (x3 - x2) + s2 * (x1 - x3) + s3 * (x2 - x1)) / d
+    r = math.hypot(x1 - cx, y1 - cy)
+    a1 = math.atan2(y1 - cy, x1 - cx)
+    a3 = math.atan2(y3 - cy, x3 - cx)
+    # d > 0: النقاط عكس عقارب الساعة؛ وإلا نعكس البداية والنهاية
+    if d > 0:
+        a0, a1 = _normalize_sweep(a1, a3)
+    else:
+        a0, a1 = _normalize_sweep(a3, a1)
+    return (cx, cy), r, a0, a1
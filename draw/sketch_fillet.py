@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+sketch_fillet.py — Fillet مماسي بين عناصر SketchDocument
+- مركز القوس = تقاطع حاملي العنصرين بعد إزاحتهما بنصف القطر (خط موازٍ / دائرة R ± r)
+- من بين الحلول الممكنة يُختار الأقرب لنقاط النقر (الجزء الذي يريد المستخدم إبقاءه)
+- العنصران يُقصّان (أو يُمدّان) حتى نقطتي التماس، والدوائر تبقى كما هي
+- fillet_loop: تدوير كل زوايا حلقة مغلقة دفعة واحدة (الزوايا الداخلية قبل CAM)
+
+فحص انحدار (نصف قطر ≥ نصف الضلع):  python -m draw.sketch_fillet
+"""
+
+from __future__ import annotations
+import math
+import sys
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from draw.sketch_document import ARC, CIRCLE, LINE, SketchDocument
+from draw.sketch_offset import chain_entities
+
+TWO_PI = 2.0 * math.pi
+# زاوية أصغر منها بين اتجاهي العنصرين = اتصال مماسي (لا تحتاج fillet)
+TANGENT_ANGLE = 1e-6
+# ضلع أقصر من هذا بعد القص (استهلكته زاويتاه بالكامل) يُحذف
+MIN_LENGTH = 1e-9
+
+
+def _carrier(kind: int, g: np.ndarray):
+    """("L", نقطة, اتجاه وحدة) للخط، ("C", مركز, نصف قطر) للقوس/الدائرة."""
+    if kind == LINE:
+        d = g[2:4] - g[0:2]
+        return "L", g[0:2].copy(), d / np.hypot(*d)
+    return "C", g[0:2].copy(), float(g[2])
+
+
+def _offsets(carrier, r: float):
+    kind, p, v = carrier
+    if kind == "L":
+        n = np.array([-v[1], v[0]])
+        return [("L", p + r * n, v), ("L", p - r * n, v)]
+    return [("C", p, v + r)] + ([("C", p, v - r)] if v - r > 1e-9 else [])
+
+
+def _intersect(c1, c2) -> List[np.ndarray]:
+    """تقاطع حاملين غير محدودين (خط/دائرة)."""
+    if c1[0] == "C" and c2[0] == "L":
+        c1, c2 = c2, c1
+    k1, p1, v1 = c1
+    k2, p2, v2 = c2
+    if k1 == "L" and k2 == "L":
+        denom = v1[0] * v2[1] - v1[1] * v2[0]
+        if abs(denom) < 1e-12:
+            return []
+        w = p2 - p1
+        t = (w[0] * v2[1] - w[1] * v2[0]) / denom
+        return [p1 + t * v1]
+    if k1 == "L":
+        f = p1 - p2
+        b = float(f @ v1)
+        disc = b * b - (float(f @ f) - v2 * v2)
+        if disc < 0:
+            return []
+        root = math.sqrt(disc)
+        return [p1 + (-b - root) * v1, p1 + (-b + root) * v1]
+    dv = p2 - p1
+    dist = float(np.hypot(*dv))
+    if dist < 1e-12 or dist > v1 + v2 + 1e-9 or dist < abs(v1 - v2) - 1e-9:
+        return []
+    along = (v1 * v1 - v2 * v2 + dist * dist) / (2 * dist)
+    h = math.sqrt(max(v1 * v1 - along * along, 0.0))
+    u = dv / dist
+    base = p1 + along * u
+    perp = np.array([-u[1], u[0]])
+    return [base + h * perp, base - h * perp]
+
+
+def _touch(carrier, center: np.ndarray) -> Optional[np.ndarray]:
+    """نقطة التماس على الحامل لقوس مركزه center."""
+    kind, p, v = carrier
+    if kind == "L":
+        return p + float((center - p) @ v) * v
+    d = center - p
+    n = float(np.hypot(*d))
+    return p + v * d / n if n > 1e-12 else None
+
+
+def _param(kind: int, g: np.ndarray, pt) -> float:
+    """معامل النقطة على العنصر: t للخط (0..1)، والزاوية النسبية من a0 للقوس."""
+    if kind == LINE:
+        d = g[2:4] - g[0:2]
+        return float((np.asarray(pt) - g[0:2]) @ d / (d @ d))
+    return math.fmod(math.atan2(pt[1] - g[1], pt[0] - g[0]) - g[3] + 2 * TWO_PI, TWO_PI)
+
+
+def _within(kind: int, g: np.ndarray, pt, tol: float = 1e-9) -> bool:
+    """هل تقع النقطة داخل حدود العنصر الحالية (بدون مد)؟"""
+    if kind == CIRCLE:
+        return True
+    t = _param(kind, g, pt)
+    span = 1.0 if kind == LINE else g[4] - g[3]
+    return -tol <= t <= span + tol or (kind == ARC and t >= TWO_PI - tol)
+
+
+def _trimmed(kind: int, g: np.ndarray, touch, pick) -> np.ndarray:
+    """هندسة العنصر بعد القص/المد حتى نقطة التماس مع إبقاء جهة نقطة النقر."""
+    g = g.copy()
+    if kind == LINE:
+        t, tp = _param(kind, g, touch), _param(kind, g, pick)
+        if tp < t:
+            g[2:4] = touch
+        else:
+            g[0:2] = touch
+        return g
+    span = g[4] - g[3]
+    rel = _param(kind, g, touch)
+    pick_rel = min(_param(kind, g, pick), span)
+    if rel > span:
+        # التماس خارج القوس: مد من الطرف الأقرب
+        if rel - span < TWO_PI - rel:
+            g[4] = g[3] + rel
+        else:
+            g[3] -= TWO_PI - rel
+    elif pick_rel < rel:
+        g[4] = g[3] + rel
+    else:
+        g[3] += rel
+    return g
+
+
+def _solve(k1: int, g1: np.ndarray, pick1, k2: int, g2: np.ndarray, pick2, radius: float,
+           allow_extend: bool) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(المركز، التماس على العنصر 1، التماس على العنصر 2) الأقرب لنقاط النقر، أو None."""
+    c1, c2 = _carrier(k1, g1), _carrier(k2, g2)
+    best: Optional[Tuple[float, np.ndarray, np.ndarray, np.ndarray]] = None
+    for o1 in _offsets(c1, radius):
+        for o2 in _offsets(c2, radius):
+            for center in _intersect(o1, o2):
+                t1, t2 = _touch(c1, center), _touch(c2, center)
+                if t1 is None or t2 is None:
+                    continue
+                if not allow_extend and not (_within(k1, g1, t1) and _within(k2, g2, t2)):
+                    continue
+                # الخط: المركز في جهة نقرة العنصر الآخر
+                if c1[0] == "L" and _side(c1, center) * _side(c1, pick2) < 0:
+                    continue
+                if c2[0] == "L" and _side(c2, center) * _side(c2, pick1) < 0:
+                    continue
+                score = float(np.hypot(*(t1 - pick1)) + np.hypot(*(t2 - pick2)))
+                if best is None or score < best[0]:
+                    best = (score, center, t1, t2)
+    return None if best is None else best[1:]
+
+
+def _arc_angles(center: np.ndarray, t1: np.ndarray, t2: np.ndarray) -> Tuple[float, float]:
+    """زاويتا قوس الـ fillet عكس عقارب الساعة؛ القوس هو الأقصر دائماً بين نقطتي التماس."""
+    a = math.atan2(t1[1] - center[1], t1[0] - center[0])
+    b = math.atan2(t2[1] - center[1], t2[0] - center[0])
+    if math.fmod(b - a + 2 * TWO_PI, TWO_PI) > math.pi:
+        a, b = b, a
+    return a, b
+
+
+def fillet_entities(doc: SketchDocument, e1: int, pick1, e2: int, pick2, radius: float,
+                    allow_extend: bool = True, style: str = "fillet") -> Optional[int]:
+    """
+    قوس مماسي بنصف قطر radius بين e1 و e2 (خط أو قوس أو دائرة).
+    pick1/pick2: نقطتان على الجزء المراد إبقاؤه من كل عنصر.
+    يُعيد ID القوس الجديد، أو None إن لم يوجد حل (نصف قطر كبير / عناصر متوازية).
+    """
+    if radius <= 0 or e1 == e2 or e1 not in doc or e2 not in doc:
+        return None
+    k1, g1 = doc.kind_of(e1), doc.geom_of(e1)
+    k2, g2 = doc.kind_of(e2), doc.geom_of(e2)
+    pick1 = np.asarray(pick1[:2], dtype=np.float64)
+    pick2 = np.asarray(pick2[:2], dtype=np.float64)
+    sol = _solve(k1, g1, pick1, k2, g2, pick2, radius, allow_extend)
+    if sol is None:
+        return None
+
+    center, t1, t2 = sol
+    a, b = _arc_angles(center, t1, t2)
+    with doc.batch():
+        if k1 != CIRCLE:
+            doc.set_geom([e1], [_trimmed(k1, g1, t1, pick1)])
+        if k2 != CIRCLE:
+            doc.set_geom([e2], [_trimmed(k2, g2, t2, pick2)])
+        return doc.add_arc(center, radius, a, b, style=style)
+
+
+def _side(carrier, pt) -> float:
+    _, p, v = carrier
+    s = v[0] * (pt[1] - p[1]) - v[1] * (pt[0] - p[0])
+    return 0.0 if abs(s) < 1e-12 else s
+
+
+def _end_point(kind: int, g: np.ndarray, at_end: bool) -> np.ndarray:
+    if kind == LINE:
+        return (g[2:4] if at_end else g[0:2]).copy()
+    ang = g[4] if at_end else g[3]
+    return g[0:2] + g[2] * np.array([math.cos(ang), math.sin(ang)])
+
+
+def _cut_end(kind: int, g: np.ndarray, touch, at_end: bool) -> np.ndarray:
+    """نقل طرف واحد (النهاية أو البداية) إلى نقطة التماس؛ التماس داخل العنصر مسبقاً."""
+    g = g.copy()
+    if kind == LINE:
+        if at_end:
+            g[2:4] = touch
+        else:
+            g[0:2] = touch
+        return g
+    span = g[4] - g[3]
+    rel = _param(kind, g, touch)
+    if rel > span:
+        # داخل السماحية عند a0 (الزاوية التفت إلى ~2π)
+        rel = 0.0 if TWO_PI - rel < rel - span else span
+    if at_end:
+        g[4] = g[3] + rel
+    else:
+        g[3] += rel
+    return g
+
+
+def _length(kind: int, g: np.ndarray) -> float:
+    if kind == LINE:
+        return float(np.hypot(*(g[2:4] - g[0:2])))
+    return float(g[2] * (g[4] - g[3]))
+
+
+def _direction_at(kind: int, g: np.ndarray, at_end: bool) -> np.ndarray:
+    """اتجاه المماس عند طرف العنصر (باتجاه الرسم)."""
+    if kind == LINE:
+        d = g[2:4] - g[0:2]
+        return d / np.hypot(*d)
+    ang = g[4] if at_end else g[3]
+    return np.array([-math.sin(ang), math.cos(ang)])
+
+
+def fillet_loop(doc: SketchDocument, ids, radius: float, style: str = "fillet") -> np.ndarray:
+    """
+    تدوير كل زوايا الحلقات المغلقة في ids بنصف القطر نفسه (بدون مد للعناصر).
+    الوصلات المماسية تُتجاوز، وكذلك الزوايا التي لا يتسع لها ما بقي من الضلعين
+    بعد الزاوية السابقة. الضلع الذي تستهلكه زاويتاه بالكامل (R = نصف طوله) يُحذف.
+    يُعيد IDs الأقواس الجديدة.
+    """
+    ids = [int(i) for i in np.unique(np.asarray(ids, dtype=np.int64)) if int(i) in doc]
+    chains, _ = chain_entities(doc, ids)
+    arcs: List[int] = []
+    with doc.batch():
+        for chain, closed in chains:
+            if not closed or len(chain) < 2:
+                continue
+            for (ea, ra), (eb, rb) in zip(chain, chain[1:] + chain[:1]):
+                if ea not in doc or eb not in doc:
+                    continue
+                ka, ga = doc.kind_of(ea), doc.geom_of(ea)
+                kb, gb = doc.kind_of(eb), doc.geom_of(eb)
+                # طرف ea عند الرأس المشترك = نهايته باتجاه السلسلة، وطرف eb = بدايته
+                a_end, b_end = not ra, rb
+                # الاتجاه الخارج من ea والداخل إلى eb عند الرأس المشترك
+                da = _direction_at(ka, ga, a_end) * (-1.0 if ra else 1.0)
+                db = _direction_at(kb, gb, b_end) * (-1.0 if rb else 1.0)
+                if abs(da[0] * db[1] - da[1] * db[0]) < TANGENT_ANGLE and float(da @ db) > 0:
+                    continue
+                # النقر على الطرف البعيد عن الزاوية (ما بقي بعد الزاوية السابقة)،
+                # والتماس يجب أن يقع ضمن هذا الباقي (allow_extend=False)
+                sol = _solve(ka, ga, _end_point(ka, ga, not a_end),
+                             kb, gb, _end_point(kb, gb, not b_end), radius, False)
+                if sol is None:
+                    continue
+                center, ta, tb = sol
+                a, b = _arc_angles(center, ta, tb)
+                for eid, kind, g, touch, at_end in ((ea, ka, ga, ta, a_end), (eb, kb, gb, tb, b_end)):
+                    g = _cut_end(kind, g, touch, at_end)
+                    if _length(kind, g) < MIN_LENGTH:
+                        doc.remove([eid])
+                    else:
+                        doc.set_geom([eid], [g])
+                arcs.append(doc.add_arc(center, radius, a, b, style=style))
+    return np.asarray(arcs, dtype=np.int64)
+
+
+# -----------------------------------------------------------
+# 🧪 فحص انحدار: نصف قطر ≥ نصف الضلع
+# -----------------------------------------------------------
+def _loop_is_clean(doc: SketchDocument, tol: float = 1e-6) -> bool:
+    """كل العناصر بطول موجب، وكل طرف يلتقي بطرف عنصر واحد آخر بالضبط (حلقة بلا تداخل)."""
+    ends = []
+    for eid in doc.ids():
+        if _length(doc.kind_of(eid), doc.geom_of(eid)) < MIN_LENGTH:
+            return False
+        ends.extend(doc.endpoints(eid))
+    pts = np.asarray(ends)
+    dist = np.hypot(*(pts[:, None, :] - pts[None, :, :]).transpose(2, 0, 1))
+    return bool(((dist < tol).sum(axis=1) == 2).all())
+
+
+def _self_check() -> int:
+    cases = [
+        # (العرض، الارتفاع، R، عدد الأقواس المتوقع، عدد العناصر المتوقع)
+        (20.0, 10.0, 4.0, 4, 8),
+        (20.0, 10.0, 5.0, 4, 6),    # R = نصف الضلع القصير: الضلعان القصيران يُحذفان
+        (10.0, 10.0, 5.0, 4, 4),    # دائرة كاملة من 4 أقواس
+        (10.0, 10.0, 6.0, 2, 6),    # R > نصف الضلع: زاويتان متقابلتان فقط
+    ]
+    failed = 0
+    for w, h, r, n_arcs, n_entities in cases:
+        doc = SketchDocument()
+        ids = doc.add_polyline(np.array([[0, 0], [w, 0], [w, h], [0, h]]), closed=True)
+        arcs = fillet_loop(doc, ids, r)
+        ok = len(arcs) == n_arcs and len(doc) == n_entities and _loop_is_clean(doc)
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} [Fillet] {w:g}x{h:g} R={r:g}: "
+              f"{len(arcs)} arcs, {len(doc)} entities")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_self_check())
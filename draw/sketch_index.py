@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+sketch_index.py — فهرس مكاني لعناصر الرسم (grid hash)
+- كل عنصر (خط / قوس / دائرة / مستطيل) يُخزَّن كمقاطع (k, 2, 2) + نقاط التقاط (snap)
+- المقاطع تُسجَّل في خلايا شبكة منتظمة بعينات كل نصف خلية (بدون تعبئة bbox كاملة)
+- الاستعلامات تفحص الخلايا القريبة فقط: أقرب عنصر، التقاط نهاية/منتصف/مركز، تحديد بصندوق
+- التحديث تدريجي: insert / remove / translate لعنصر واحد فقط
+"""
+
+from __future__ import annotations
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+DEFAULT_CELL_SIZE = 10.0
+
+SNAP_END = "end"
+SNAP_MID = "mid"
+SNAP_CENTER = "center"
+SNAP_QUADRANT = "quadrant"
+
+
+class _Entry:
+    __slots__ = ("segments", "snaps", "snap_kinds", "bbox", "cells", "snap_cells")
+
+    def __init__(self, segments, snaps, snap_kinds):
+        self.segments = segments          # (k, 2, 2)
+        self.snaps = snaps                # (m, 2)
+        self.snap_kinds = snap_kinds      # [kind] * m
+        pts = segments.reshape(-1, 2)
+        self.bbox = (*pts.min(axis=0), *pts.max(axis=0)) if len(pts) else (0.0, 0.0, 0.0, 0.0)
+        self.cells: Set[Tuple[int, int]] = set()
+        self.snap_cells: Set[Tuple[int, int]] = set()
+
+
+def default_snaps(segments: np.ndarray):
+    """نقاط التقاط افتراضية: نهايات ومنتصفات كل المقاطع."""
+    seg = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+    ends = seg.reshape(-1, 2)
+    mids = seg.mean(axis=1)
+    return (np.concatenate([ends, mids]),
+            [SNAP_END] * len(ends) + [SNAP_MID] * len(mids))
+
+
+def point_segment_distance(px: float, py: float, segments: np.ndarray) -> np.ndarray:
+    """بعد النقطة عن كل مقطع (vectorized)."""
+    a = segments[:, 0, :]
+    d = segments[:, 1, :] - a
+    len2 = (d * d).sum(axis=1)
+    t = np.where(len2 > 0, ((px - a[:, 0]) * d[:, 0] + (py - a[:, 1]) * d[:, 1]) / np.maximum(len2, 1e-300), 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    cx = a[:, 0] + t * d[:, 0] - px
+    cy = a[:, 1] + t * d[:, 1] - py
+    return np.hypot(cx, cy)
+
+
+class SketchIndex:
+    """فهرس شبكي للعناصر: المفتاح أي قيمة hashable (رقم عنصر أو actor)."""
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = float(cell_size)
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._grid: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._snap_grid: Dict[Tuple[int, int], Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def keys(self):
+        return self._entries.keys()
+
+    # ------------------------------------------------------------
+    # 🧮 خلايا
+    # ------------------------------------------------------------
+    def _segment_samples(self, seg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """خلايا (i, j) لعينات على كل مقطع بخطوة <= نصف خلية + رقم المقطع لكل عينة."""
+        c = self.cell_size
+        a = seg[:, 0, :]
+        d = seg[:, 1, :] - a
+        n = np.maximum(np.ceil(np.hypot(d[:, 0], d[:, 1]) / (0.5 * c)).astype(np.int64), 1)
+        owner = np.repeat(np.arange(len(seg)), n + 1)
+        first = np.cumsum(n + 1) - (n + 1)
+        t = (np.arange(int((n + 1).sum())) - first[owner]) / n[owner]
+        pts = a[owner] + d[owner] * t[:, None]
+        return np.floor(pts / c).astype(np.int64), owner
+
+    def _cells_of_segments(self, seg: np.ndarray) -> Set[Tuple[int, int]]:
+        """خلايا عينات على كل مقطع (تغطي كل الخلايا التي يمر بها تقريباً)."""
+        if not len(seg):
+            return set()
+        ij = np.unique(self._segment_samples(seg)[0], axis=0)
+        return set(map(tuple, ij.tolist()))
+
+    def _cells_of_points(self, pts: np.ndarray) -> Set[Tuple[int, int]]:
+        if not len(pts):
+            return set()
+        ij = np.unique(np.floor(pts / self.cell_size).astype(np.int64), axis=0)
+        return set(map(tuple, ij.tolist()))
+
+    def _cells_in_box(self, xmin, ymin, xmax, ymax):
+        c = self.cell_size
+        i0, i1 = int(np.floor(xmin / c)), int(np.floor(xmax / c))
+        j0, j1 = int(np.floor(ymin / c)), int(np.floor(ymax / c))
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield (i, j)
+
+    def _candidates(self, grid, xmin, ymin, xmax, ymax) -> Set[Hashable]:
+        c = self.cell_size
+        n_cells = (int(np.floor(xmax / c)) - int(np.floor(xmin / c)) + 1) * \
+                  (int(np.floor(ymax / c)) - int(np.floor(ymin / c)) + 1)
+        out: Set[Hashable] = set()
+        if n_cells > len(grid):
+            # صندوق ضخم: المرور على الخلايا المشغولة فقط
+            i0, i1 = np.floor(xmin / c), np.floor(xmax / c)
+            j0, j1 = np.floor(ymin / c), np.floor(ymax / c)
+            for (i, j), keys in grid.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    out |= keys
+            return out
+        for cell in self._cells_in_box(xmin, ymin, xmax, ymax):
+            keys = grid.get(cell)
+            if keys:
+                out |= keys
+        return out
+
+    # ------------------------------------------------------------
+    # ✏️ تحديث تدريجي
+    # ------------------------------------------------------------
+    def insert(self, key, segments, snaps=None, snap_kinds: Optional[List[str]] = None):
+        """إضافة/استبدال عنصر. snaps (m, 2) مع أنواعها، أو نهايات+منتصفات افتراضياً."""
+        if key in self._entries:
+            self.remove(key)
+        seg = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        if snaps is None:
+            snaps, snap_kinds = default_snaps(seg)
+        snaps = np.asarray(snaps, dtype=np.float64).reshape(-1, 2)
+        snap_kinds = list(snap_kinds or [SNAP_END] * len(snaps))
+
+        entry = _Entry(seg, snaps, snap_kinds)
+        entry.cells = self._cells_of_segments(seg)
+        entry.snap_cells = self._cells_of_points(snaps)
+        for cell in entry.cells:
+            self._grid.setdefault(cell, set()).add(key)
+        for cell in entry.snap_cells:
+            self._snap_grid.setdefault(cell, set()).add(key)
+        self._entries[key] = entry
+
+    def insert_many(self, keys, segments, owner, snaps=None, snap_owner=None,
+                    snap_kinds: Optional[List[str]] = None):
+        """
+        إضافة عدة عناصر دفعة واحدة (تحميل ملف / لصق كبير).
+        owner (K,) و snap_owner (m,) فهارس في keys لكل مقطع / نقطة التقاط.
+        """
+        keys = list(keys)
+        for key in keys:
+            if key in self._entries:
+                self.remove(key)
+        seg = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        owner = np.asarray(owner, dtype=np.int64)
+        if snaps is None:
+            snaps, snap_kinds = default_snaps(seg)
+            snap_owner = np.concatenate([np.repeat(owner, 2), owner])
+        snaps = np.asarray(snaps, dtype=np.float64).reshape(-1, 2)
+        snap_owner = np.asarray(snap_owner, dtype=np.int64)
+        snap_kinds = list(snap_kinds or [SNAP_END] * len(snaps))
+
+        def split(own):
+            order = np.argsort(own, kind="stable")
+            bounds = np.searchsorted(own[order], np.arange(len(keys) + 1))
+            return order, bounds
+
+        seg_order, seg_bounds = split(owner)
+        snap_order, snap_bounds = split(snap_owner)
+
+        # خلايا كل العينات مرة واحدة ثم تجميعها حسب العنصر
+        if len(seg):
+            ij, seg_idx = self._segment_samples(seg)
+            cells = _unique_owner_cells(owner[seg_idx], ij)
+        else:
+            cells = np.empty((0, 3), dtype=np.int64)
+        if len(snaps):
+            snap_cells = _unique_owner_cells(snap_owner, np.floor(snaps / self.cell_size).astype(np.int64))
+        else:
+            snap_cells = np.empty((0, 3), dtype=np.int64)
+        cell_bounds = np.searchsorted(cells[:, 0], np.arange(len(keys) + 1))
+        snap_cell_bounds = np.searchsorted(snap_cells[:, 0], np.arange(len(keys) + 1))
+        cell_list = cells[:, 1:].tolist()
+        snap_cell_list = snap_cells[:, 1:].tolist()
+
+        for k, key in enumerate(keys):
+            rows = seg_order[seg_bounds[k]:seg_bounds[k + 1]]
+            srows = snap_order[snap_bounds[k]:snap_bounds[k + 1]]
+            entry = _Entry(seg[rows], snaps[srows], [snap_kinds[i] for i in srows.tolist()])
+            entry.cells = set(map(tuple, cell_list[cell_bounds[k]:cell_bounds[k + 1]]))
+            entry.snap_cells = set(map(tuple, snap_cell_list[snap_cell_bounds[k]:snap_cell_bounds[k + 1]]))
+            for cell in entry.cells:
+                self._grid.setdefault(cell, set()).add(key)
+            for cell in entry.snap_cells:
+                self._snap_grid.setdefault(cell, set()).add(key)
+            self._entries[key] = entry
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for grid, cells in ((self._grid, entry.cells), (self._snap_grid, entry.snap_cells)):
+            for cell in cells:
+                keys = grid.get(cell)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del grid[cell]
+
+    def translate(self, key, dx: float, dy: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        offset = np.array([dx, dy])
+        self.insert(key, entry.segments + offset, entry.snaps + offset, entry.snap_kinds)
+
+    def clear(self):
+        self._entries.clear()
+        self._grid.clear()
+        self._snap_grid.clear()
+
+    def segments_of(self, key) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        return None if entry is None else entry.segments
+
+    # ------------------------------------------------------------
+    # 🔍 استعلامات
+    # ------------------------------------------------------------
+    def nearest(self, x: float, y: float, radius: float) -> Tuple[Optional[Hashable], float]:
+        """أقرب عنصر ضمن radius: (key, distance) أو (None, inf)."""
+        pad = radius + 0.5 * self.cell_size
+        best_key, best = None, float("inf")
+        for key in self._candidates(self._grid, x - pad, y - pad, x + pad, y + pad):
+            d = float(point_segment_distance(x, y, self._entries[key].segments).min())
+            if d < best:
+                best_key, best = key, d
+        if best > radius:
+            return None, float("inf")
+        return best_key, best
+
+    def snap(self, x: float, y: float, radius: float,
+             kinds: Optional[Iterable[str]] = None) -> Optional[Tuple[Tuple[float, float], str, Hashable]]:
+        """أقرب نقطة التقاط ضمن radius: ((px, py), kind, key) أو None."""
+        allowed = set(kinds) if kinds else None
+        best, best_d = None, radius
+        for key in self._candidates(self._snap_grid, x - radius, y - radius, x + radius, y + radius):
+            e = self._entries[key]
+            if not len(e.snaps):
+                continue
+            d = np.hypot(e.snaps[:, 0] - x, e.snaps[:, 1] - y)
+            for i in np.argsort(d).tolist():
+                if d[i] > best_d:
+                    break
+                if allowed is None or e.snap_kinds[i] in allowed:
+                    best_d = float(d[i])
+                    best = ((float(e.snaps[i, 0]), float(e.snaps[i, 1])), e.snap_kinds[i], key)
+                    break
+        return best
+
+    def box_query(self, xmin: float, ymin: float, xmax: float, ymax: float,
+                  crossing: bool = False) -> List[Hashable]:
+        """
+        تحديد بصندوق:
+        - crossing=False (window): العناصر الواقعة بالكامل داخل الصندوق
+        - crossing=True: أي عنصر يلمس الصندوق أو يقطعه
+        """
+        if xmin > xmax:
+            xmin, xmax = xmax, xmin
+        if ymin > ymax:
+            ymin, ymax = ymax, ymin
+        out = []
+        for key in self._candidates(self._grid, xmin, ymin, xmax, ymax):
+            e = self._entries[key]
+            bx0, by0, bx1, by1 = e.bbox
+            if bx0 >= xmin and by0 >= ymin and bx1 <= xmax and by1 <= ymax:
+                out.append(key)
+            elif crossing and bx1 >= xmin and by1 >= ymin and bx0 <= xmax and by0 <= ymax:
+                if _segments_touch_box(e.segments, xmin, ymin, xmax, ymax):
+                    out.append(key)
+        return out
+
+
+def _unique_owner_cells(owner: np.ndarray, ij: np.ndarray) -> np.ndarray:
+    """صفوف (owner, i, j) فريدة مرتبة حسب owner — بترميز خطي 1D (أسرع بكثير من unique(axis=0))."""
+    lo = ij.min(axis=0)
+    span = ij.max(axis=0) - lo + 1
+    code = (owner * span[0] + (ij[:, 0] - lo[0])) * span[1] + (ij[:, 1] - lo[1])
+    code = np.unique(code)
+    j = code % span[1]
+    rest = code // span[1]
+    return np.column_stack([rest // span[0], rest % span[0] + lo[0], j + lo[1]])
+
+
+def _segments_touch_box(seg: np.ndarray, xmin, ymin, xmax, ymax) -> bool:
+    """هل يلمس أي مقطع الصندوق؟ (قص Liang–Barsky vectorized)"""
+    a = seg[:, 0, :]
+    d = seg[:, 1, :] - a
+    t0 = np.zeros(len(seg))
+    t1 = np.ones(len(seg))
+    ok = np.ones(len(seg), dtype=bool)
+    for p, q in ((-d[:, 0], a[:, 0] - xmin), (d[:, 0], xmax - a[:, 0]),
+                 (-d[:, 1], a[:, 1] - ymin), (d[:, 1], ymax - a[:, 1])):
+        parallel = p == 0
+        ok &= ~(parallel & (q < 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(parallel, 0.0, q / np.where(parallel, 1.0, p))
+        t0 = np.where(~parallel & (p < 0), np.maximum(t0, r), t0)
+        t1 = np.where(~parallel & (p > 0), np.minimum(t1, r), t1)
+    return bool((ok & (t0 <= t1)).any())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+sketch_offset.py — إزاحة عناصر SketchDocument (يستخدمها ModifyOps.offset)
+- العناصر المحددة تُسلسَل بنقاط نهاياتها إلى حلقات مغلقة وسلاسل مفتوحة
+- الحلقات: tools.offset_engine.offset_loops (مع الثقوب والتداخل)
+- السلاسل المفتوحة: offset_polyline باتجاه رسم عناصرها
+- عنصر منفرد: إزاحة دقيقة (خط موازٍ / قوس ودائرة بنصف قطر r + distance)
+
+اصطلاح الإشارة واحد لكل الأنواع: distance موجبة = يمين اتجاه الرسم.
+الأقواس والدوائر عكس عقارب الساعة دائماً، فيمينها = للخارج (r + distance)،
+والحلقات المغلقة تُعامل كأنها عكس عقارب الساعة: موجب = للخارج أياً كان اتجاه رسمها.
+- التفرعات (نقطة يلتقي فيها أكثر من عنصرين): كل عنصر يُزاح منفرداً
+"""
+
+from __future__ import annotations
+import math
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from draw.sketch_document import CIRCLE, LINE, SketchDocument
+from tools import offset_engine
+from tools.offset_engine import JOIN_ROUND
+
+# سماحية ربط نهايات العناصر ببعضها
+JOIN_TOL = 1e-6
+
+
+def _arc_points(g: np.ndarray, chord_tol: float) -> np.ndarray:
+    cx, cy, r, a0, a1 = g[:5]
+    step = 2 * math.acos(max(-1.0, 1 - chord_tol / r)) if r > chord_tol else math.pi / 4
+    n = max(int(math.ceil((a1 - a0) / max(step, 1e-6))), 2)
+    t = np.linspace(a0, a1, n + 1)
+    return np.stack([cx + r * np.cos(t), cy + r * np.sin(t)], axis=1)
+
+
+def _entity_points(doc: SketchDocument, eid: int, chord_tol: float) -> np.ndarray:
+    g = doc.geom_of(eid)
+    if doc.kind_of(eid) == LINE:
+        return g[:4].reshape(2, 2)
+    return _arc_points(g, chord_tol)
+
+
+def chain_entities(doc: SketchDocument, ids) -> Tuple[List[Tuple[List[Tuple[int, bool]], bool]], List[int]]:
+    """
+    تقسيم الخطوط والأقواس إلى سلاسل: [([(eid, reversed), ...], closed), ...]
+    + قائمة العناصر التي تُعالج منفردة (الدوائر وعناصر التفرعات).
+    """
+    key = lambda p: (round(p[0] / JOIN_TOL), round(p[1] / JOIN_TOL))
+    ends: Dict[int, Tuple[tuple, tuple]] = {}
+    at = defaultdict(list)
+    singles: List[int] = []
+    for eid in ids:
+        if doc.kind_of(eid) == CIRCLE:
+            singles.append(eid)
+            continue
+        a, b = doc.endpoints(eid)
+        ends[eid] = (key(a), key(b))
+        at[ends[eid][0]].append(eid)
+        at[ends[eid][1]].append(eid)
+
+    chains = []
+    seen = set()
+    for first in ends:
+        if first in seen:
+            continue
+        # المكوّن المتصل كاملاً
+        comp, stack = [], [first]
+        seen.add(first)
+        while stack:
+            eid = stack.pop()
+            comp.append(eid)
+            for k in ends[eid]:
+                for other in at[k]:
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+        verts = {k for eid in comp for k in ends[eid]}
+        if any(len(at[k]) > 2 for k in verts):
+            singles.extend(comp)
+            continue
+
+        # البداية من طرف حر إن وُجد (سلسلة مفتوحة)، وإلا حلقة مغلقة
+        free = [k for k in verts if len(at[k]) == 1]
+        vertex = free[0] if free else ends[comp[0]][0]
+        chain, used = [], set()
+        while True:
+            nxt = [e for e in at[vertex] if e not in used]
+            if not nxt:
+                break
+            eid = nxt[0]
+            used.add(eid)
+            rev = ends[eid][0] != vertex
+            chain.append((eid, rev))
+            vertex = ends[eid][0] if rev else ends[eid][1]
+        # السلسلة المفتوحة تتبع اتجاه رسم أغلب عناصرها (لا الطرف الذي بدأ منه المسح)
+        if free and 2 * sum(rev for _, rev in chain) > len(chain):
+            chain = [(eid, not rev) for eid, rev in reversed(chain)]
+        chains.append((chain, not free))
+    return chains, singles
+
+
+def _chain_points(doc: SketchDocument, chain, closed: bool, chord_tol: float) -> np.ndarray:
+    parts = []
+    for k, (eid, rev) in enumerate(chain):
+        pts = _entity_points(doc, eid, chord_tol)
+        if rev:
+            pts = pts[::-1]
+        parts.append(pts if k == 0 else pts[1:])
+    pts = np.concatenate(parts)
+    return pts[:-1] if closed else pts
+
+
+def _offset_single(doc: SketchDocument, eid: int, distance: float, style: str) -> List[int]:
+    """عنصر واحد بدقة: موجب = يمين اتجاه الرسم (للقوس والدائرة = للخارج)."""
+    kind, g = doc.kind_of(eid), doc.geom_of(eid)
+    if kind == LINE:
+        d = g[2:4] - g[0:2]
+        length = float(np.hypot(*d))
+        if length < 1e-12:
+            return []
+        n = np.array([d[1], -d[0]]) / length * distance
+        return [doc.add_line(g[0:2] + n, g[2:4] + n, style=style)]
+    r = g[2] + distance
+    if r <= 1e-9:
+        return []
+    if kind == CIRCLE:
+        return [doc.add_circle(g[0:2], r, style=style)]
+    return [doc.add_arc(g[0:2], r, g[3], g[4], style=style)]
+
+
+def offset_entities(doc: SketchDocument, ids, distance: float, join: str = JOIN_ROUND,
+                    chord_tol: float = 0.01, style: str = "offset") -> np.ndarray:
+    """
+    إنشاء إزاحة العناصر المحددة في نفس المستند؛ يُعيد IDs العناصر الجديدة.
+    distance موجبة = يمين اتجاه الرسم = للخارج في الأقواس والدوائر والحلقات المغلقة.
+    الحلقات المغلقة المحددة معاً تُزاح كمنطقة واحدة (الحلقة الداخلية = ثقب يصغر).
+    """
+    ids = [int(i) for i in np.unique(np.asarray(ids, dtype=np.int64)) if int(i) in doc]
+    chains, singles = chain_entities(doc, ids)
+    if not offset_engine._HAS_SHAPELY:
+        singles += [eid for chain, _ in chains for eid, _ in chain]
+        chains = []
+
+    new_ids: List[np.ndarray] = []
+    with doc.batch():
+        loops = [_chain_points(doc, c, True, chord_tol) for c, closed in chains if closed]
+        for outer, holes in offset_engine.offset_loops(loops, distance, join,
+                                                       arc_tolerance=chord_tol) if loops else []:
+            for ring in [outer] + holes:
+                new_ids.append(doc.add_polyline(ring, closed=True, style=style))
+
+        for chain, closed in chains:
+            if closed:
+                continue
+            if len(chain) == 1:
+                singles.append(chain[0][0])
+                continue
+            pts = _chain_points(doc, chain, False, chord_tol)
+            # offset_polyline: موجب = يسار، فالإشارة تُعكس لاصطلاح اليمين
+            for part in offset_engine.offset_polyline(pts, -distance, join, arc_tolerance=chord_tol):
+                new_ids.append(doc.add_polyline(part, style=style))
+
+        for eid in singles:
+            new_ids.append(np.asarray(_offset_single(doc, eid, distance, style), dtype=np.int64))
+    return np.concatenate(new_ids) if new_ids else np.empty(0, dtype=np.int64)
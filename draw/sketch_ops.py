@@ -3,15 +3,25 @@
 AlumProCNC — Sketch & Modify (Fusion-style) — Single-file Edition
 يشمل:
 - SketchOps: line / circle / rect / arc(3pt) + نظام نقرات تفاعلي
-- ModifyOps (مضمن): trim / offset / mirror / fillet
+- ModifyOps (مضمن): trim / extend / offset / mirror / fillet
 - توافق تلقائي مع VTK أو pythonOCC
 - ألوان Fusion-like لكل أداة
 - ملصقات قياس ثلاثية الأبعاد (VTK) باستخدام vtkVectorText + vtkFollower (اختياري)
+- الهندسة تُخزَّن في SketchDocument (IDs ثابتة)، والعرض عبر SketchView (actor لكل نمط)
 """
 
+from contextlib import nullcontext
 from typing import List, Tuple, Optional
 import math
 
+from draw.sketch_index import SketchIndex
+from draw.sketch_constraints import END, START, SketchConstraints
+from draw.sketch_document import CIRCLE, LINE, SketchDocument, arc_from_3pts
+from draw.sketch_fillet import fillet_entities, fillet_loop
+from draw.sketch_offset import offset_entities
+from draw.sketch_trim import extend_entity, trim_entity
+from tools.offset_engine import JOIN_ROUND
+
 # نحاول استيراد OCC؛ إن لم يتوفر نعمل VTK فقط
 try:
     from OCC.Core.gp import gp_Pnt, gp_Dir, gp_Ax2
@@ -30,6 +40,12 @@ def _debug(msg: str):
     print(f"[SKETCH] {msg}")
 
 
+def _transaction(display, label: str):
+    """أمر تراجع واحد عبر سجل العارض (display.history) إن وُجد."""
+    history = getattr(display, "history", None)
+    return history.transaction(label) if history is not None else nullcontext()
+
+
 def _qcolor(rgb: ColorTuple):
     if not _HAS_OCC:
         return None
@@ -41,99 +57,112 @@ def _qcolor(rgb: ColorTuple):
 # ModifyOps — أدوات التعديل (مضمنة)
 # ------------------------------------------------------------
 class ModifyOps:
-    """أدوات تعديل مبدئية: Trim / Offset / Mirror / Fillet (متوافقة مع VTK)"""
+    """أدوات تعديل مبدئية: Trim / Extend / Offset / Mirror / Fillet (تعمل على IDs عناصر SketchDocument)"""
     def __init__(self, viewer):
         self.viewer = viewer
         # نتوقع أن يكون لدى viewer خاصية renderer في وضع VTK
         self.renderer = getattr(viewer, "renderer", None)
 
-    # ✂️ Trim: يحذف أقرب actor للنقطة (نسخة أولى — لاحقاً نستبدلها بقص هندسي)
-    def trim(self, click_world: Point3D, pick_radius: float = 20.0):
-        if not self.renderer:
-            _debug("Trim: renderer غير متوفر (OCC مدعوم لاحقًا).")
-            return
-        actors = self.renderer.GetActors()
-        actors.InitTraversal()
-        closest, best = None, float("inf")
-        a = actors.GetNextActor()
-        while a:
-            try:
-                b = a.GetBounds()
-                cx, cy = (b[0]+b[1])/2.0, (b[2]+b[3])/2.0
-                d = math.hypot(click_world[0]-cx, click_world[1]-cy)
-                if d < best:
-                    best, closest = d, a
-            except Exception:
-                pass
-            a = actors.GetNextActor()
-        if closest and best < pick_radius:
-            self.renderer.RemoveActor(closest)
+    @property
+    def index(self) -> Optional[SketchIndex]:
+        return getattr(self.viewer, "sketch_index", None)
+
+    @property
+    def doc(self) -> Optional[SketchDocument]:
+        return getattr(self.viewer, "sketch_doc", None)
+
+    @property
+    def constraints(self) -> Optional[SketchConstraints]:
+        return getattr(self.viewer, "sketch_constraints", None)
+
+    def _editing(self):
+        """القيود على الأطراف التي تحركها الأداة تُنقل أو تُحذف داخل نفس المعاملة."""
+        return self.constraints.editing() if self.constraints is not None else nullcontext()
+
+    def _render(self):
+        if self.renderer:
             self.renderer.GetRenderWindow().Render()
-            _debug("✂️ Trim: تم حذف الجزء الأقرب.")
-        else:
-            _debug("Trim: لا يوجد عنصر قريب.")
 
-    # ↔ Offset: إزاحة بسيطة (ترجمة — تحسين لاحقاً للإزاحة الهندسية)
-    def offset(self, base_actor, distance: float = 10.0):
-        if not self.renderer or not base_actor:
-            return
-        import vtk
-        tf = vtk.vtkTransform()
-        tf.Translate(distance, distance, 0)
-        filt = vtk.vtkTransformPolyDataFilter()
-        filt.SetInputData(base_actor.GetMapper().GetInput())
-        filt.SetTransform(tf)
-        filt.Update()
-        m = vtk.vtkPolyDataMapper()
-        m.SetInputData(filt.GetOutput())
-        n = vtk.vtkActor()
-        n.SetMapper(m)
-        n.GetProperty().SetColor(0.45, 0.55, 0.8)
-        self.renderer.AddActor(n)
-        self.renderer.GetRenderWindow().Render()
-        _debug(f"↔ Offset: تم إنشاء نسخة بإزاحة {distance}.")
+    # ✂️ Trim: قص العنصر الأقرب عند تقاطعاته (يُحذف الجزء المنقور فقط)
+    def trim(self, click_world: Point3D, pick_radius: float = 20.0):
+        if self.doc is None or self.index is None:
+            _debug("Trim: نموذج الرسم غير متوفر.")
+            return None
+        # استعلام مكاني على الخلايا القريبة فقط (بدل المرور على كل actors)
+        closest, _ = self.index.nearest(click_world[0], click_world[1], pick_radius)
+        if closest is None:
+            _debug("Trim: لا يوجد عنصر قريب.")
+            return None
+        with _transaction(self.viewer, "Trim"), self._editing():
+            kept = trim_entity(self.doc, closest, click_world, self.index)
+        self._render()
+        _debug(f"✂️ Trim: بقي {len(kept)} جزء من العنصر.")
+        return kept
+
+    # ↦ Extend: مد الطرف الأقرب حتى أول عنصر يقطعه
+    def extend(self, click_world: Point3D, pick_radius: float = 20.0):
+        if self.doc is None or self.index is None:
+            _debug("Extend: نموذج الرسم غير متوفر.")
+            return False
+        closest, _ = self.index.nearest(click_world[0], click_world[1], pick_radius)
+        if closest is None:
+            _debug("Extend: لا يوجد عنصر قريب.")
+            return False
+        with _transaction(self.viewer, "Extend"), self._editing():
+            done = extend_entity(self.doc, closest, click_world, self.index)
+        self._render()
+        _debug("↦ Extend: تم المد." if done else "Extend: لا يوجد عنصر على الامتداد.")
+        return done
+
+    # ↔ Offset: إزاحة هندسية (حلقات مغلقة / سلاسل مفتوحة / عناصر منفردة)
+    def offset(self, ids, distance: float = 10.0, join: str = JOIN_ROUND):
+        if self.doc is None or ids is None or not len(ids):
+            return None
+        with _transaction(self.viewer, "Offset"):
+            new_ids = offset_entities(self.doc, ids, distance, join)
+        self._render()
+        _debug(f"↔ Offset: {len(new_ids)} عنصر بإزاحة {distance} ({join}).")
+        return new_ids
 
     # 🔁 Mirror: انعكاس حول محور X أو Y (بسيط — تحسين لاحقاً)
-    def mirror(self, base_actor, axis: str = "Y"):
-        if not self.renderer or not base_actor:
-            return
-        import vtk
-        s = (1, -1, 1) if axis.upper() == "X" else (-1, 1, 1)
-        tf = vtk.vtkTransform()
-        tf.Scale(*s)
-        filt = vtk.vtkTransformPolyDataFilter()
-        filt.SetInputData(base_actor.GetMapper().GetInput())
-        filt.SetTransform(tf)
-        filt.Update()
-        m = vtk.vtkPolyDataMapper()
-        m.SetInputData(filt.GetOutput())
-        n = vtk.vtkActor()
-        n.SetMapper(m)
-        n.GetProperty().SetColor(0.5, 0.5, 0.7)
-        self.renderer.AddActor(n)
-        self.renderer.GetRenderWindow().Render()
+    def mirror(self, ids, axis: str = "Y"):
+        if self.doc is None or ids is None or not len(ids):
+            return None
+        sx, sy = (1.0, -1.0) if axis.upper() == "X" else (-1.0, 1.0)
+        with _transaction(self.viewer, "Mirror"), self.doc.batch():
+            rec = self.doc.records(ids)
+            rec.style = ["mirror"] * len(rec)
+            new_ids = self.doc.add_records(rec)
+            self.doc.transform(new_ids, [[sx, 0.0, 0.0], [0.0, sy, 0.0]])
+        self._render()
         _debug(f"🔁 Mirror: تم الانعكاس حول محور {axis}.")
-
-    # ◔ Fillet: قوس بسيط بين نقطتين (نسخة أولى)
-    def fillet(self, p1: Point3D, p2: Point3D, radius: float = 5.0):
-        if not self.renderer:
-            return
-        import vtk
-        arc = vtk.vtkArcSource()
-        arc.SetPoint1(*p1)
-        arc.SetPoint2(*p2)
-        arc.SetCenter((p1[0]+p2[0]) / 2.0, (p1[1]+p2[1]) / 2.0, 0.0)
-        arc.SetResolution(64)
-        arc.Update()
-        m = vtk.vtkPolyDataMapper()
-        m.SetInputConnection(arc.GetOutputPort())
-        a = vtk.vtkActor()
-        a.SetMapper(m)
-        a.GetProperty().SetColor(0.6, 0.5, 0.8)
-        a.GetProperty().SetLineWidth(2)
-        self.renderer.AddActor(a)
-        self.renderer.GetRenderWindow().Render()
-        _debug("◔ Fillet: تم إنشاء قوس بين نقطتين.")
+        return new_ids
+
+    # ◔ Fillet: قوس مماسي بنصف القطر بين العنصرين الأقرب لنقطتي النقر + قصهما
+    def fillet(self, p1: Point3D, p2: Point3D, radius: float = 5.0, pick_radius: float = 20.0):
+        if self.doc is None or self.index is None:
+            _debug("Fillet: نموذج الرسم غير متوفر.")
+            return None
+        e1, _ = self.index.nearest(p1[0], p1[1], pick_radius)
+        e2, _ = self.index.nearest(p2[0], p2[1], pick_radius)
+        if e1 is None or e2 is None or e1 == e2:
+            _debug("Fillet: يجب اختيار عنصرين مختلفين.")
+            return None
+        with _transaction(self.viewer, "Fillet"), self._editing():
+            eid = fillet_entities(self.doc, e1, p1, e2, p2, radius)
+        self._render()
+        _debug(f"◔ Fillet: قوس مماسي R={radius}." if eid is not None else "Fillet: لا يوجد حل بنصف القطر هذا.")
+        return eid
+
+    # ◔ Fillet لكل زوايا حلقة مغلقة (مثلاً الزوايا الداخلية قبل CAM)
+    def fillet_loop(self, ids, radius: float = 5.0):
+        if self.doc is None or ids is None or not len(ids):
+            return None
+        with _transaction(self.viewer, "Fillet Loop"), self._editing():
+            arcs = fillet_loop(self.doc, ids, radius)
+        self._render()
+        _debug(f"◔ Fillet: {len(arcs)} زاوية مدوّرة R={radius}.")
+        return arcs
 
 
 # ------------------------------------------------------------
@@ -146,34 +175,76 @@ class SketchOps:
         """
         self.display = display
         self.line_width = line_width
+
+        # ألوان Fusion-like للأدوات
+        self.colors = {
+            "line":   (0.29, 0.56, 0.89),  # أزرق ناعم
+            "circle": (0.96, 0.65, 0.14),  # برتقالي
+            "rect":   (0.49, 0.82, 0.13),  # أخضر
+            "arc":    (0.61, 0.35, 0.71),  # بنفسجي
+            "offset": (0.45, 0.55, 0.80),
+            "mirror": (0.50, 0.50, 0.70),
+            "fillet": (0.60, 0.50, 0.80),
+            "dim":    (0.20, 0.20, 0.20),  # نص القياسات
+        }
+
+        # 📄 نموذج الرسم + 🗂️ فهرس مكاني مشترك (يُنشآن هنا إن لم يوفّرهما العارض)
+        for attr, factory in (("sketch_doc", SketchDocument), ("sketch_index", SketchIndex)):
+            if getattr(display, attr, None) is None:
+                try:
+                    setattr(display, attr, factory())
+                except AttributeError:
+                    pass
+        self.doc: SketchDocument = getattr(display, "sketch_doc", None)
+        if self.doc is None:
+            self.doc = SketchDocument()
+        self.index: Optional[SketchIndex] = getattr(display, "sketch_index", None)
+
+        # 📐 القيود والأبعاد (مرتبطة بسجل التراجع إن وُجد)
+        self.constraints: SketchConstraints = getattr(display, "sketch_constraints", None)
+        if self.constraints is None:
+            self.constraints = SketchConstraints(self.doc)
+            try:
+                display.sketch_constraints = self.constraints
+            except AttributeError:
+                pass
+        if self.constraints.history is None:
+            self.constraints.history = getattr(display, "history", None)
+
         self.modify_ops = ModifyOps(self.display)
 
         # كشف نوع العارض
         if hasattr(display, "GetContext") and _HAS_OCC:
             self.ctx = display.GetContext()
             self.viewer_type = "OCC"
+            self.view = None
             _debug("Linked to OCC Display Context ✅")
         else:
             self.ctx = None
             self.viewer_type = "VTK"
+            self.view = getattr(display, "sketch_view", None)
+            if self.view is None:
+                from draw.sketch_view import SketchView
+                self.view = SketchView(display.renderer, self.doc, self.index,
+                                       colors=self.colors, line_width=line_width,
+                                       label_color=self.colors["dim"])
+                try:
+                    display.sketch_view = self.view
+                except AttributeError:
+                    pass
             _debug("Linked to VTKViewer ⚙️")
 
         # نقاط تفاعلية
         self.temp_points: List[Point3D] = []
 
-        # ألوان Fusion-like للأدوات
-        self.colors = {
-            "line":   (0.29, 0.56, 0.89),  # أزرق ناعم
-            "circle": (0.96, 0.65, 0.14),  # برتقالي
-            "rect":   (0.49, 0.82, 0.13),  # أخضر
-            "arc":    (0.61, 0.35, 0.71),  # بنفسجي
-            "dim":    (0.20, 0.20, 0.20),  # نص القياسات
-        }
-
     # ---------------------------- عرض/Render ----------------------------
     def _render(self):
         if self.viewer_type == "VTK":
-            self.display.vtk_widget.GetRenderWindow().Render()
+            update = getattr(self.display, "update_view", None)
+            if update is not None:
+                update()
+            else:
+                self.display.vtk_widget.GetRenderWindow().Render()
 
     def _show_occ(self, shape, color: ColorTuple):
         ais = self.display.DisplayShape(shape, update=False)
@@ -183,173 +254,157 @@ class SketchOps:
         except Exception:
             pass
 
-    def _label3d_vtk(self, text: str, world_pos: Point3D, scale: float = 2.0):
-        """ملصق ثلاثي الأبعاد مرتبط بالشكل (يتبع الكاميرا)"""
-        if self.viewer_type != "VTK":
+    def _label3d_vtk(self, eid: int, text: str, world_pos: Point3D, scale: float = 2.0):
+        """ملصق ثلاثي الأبعاد مرتبط بالعنصر eid (يتبع الكاميرا ويتحرك/يُحذف مع العنصر)"""
+        if self.view is None:
             return
-        import vtk
-        vtext = vtk.vtkVectorText()
-        vtext.SetText(text)
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputConnection(vtext.GetOutputPort())
-        follower = vtk.vtkFollower()
-        follower.SetMapper(mapper)
-        follower.SetScale(scale, scale, scale)
-        follower.SetPosition(*world_pos)
-        follower.GetProperty().SetColor(*self.colors["dim"])
-        follower.SetCamera(self.display.renderer.GetActiveCamera())
-        self.display.renderer.AddActor(follower)
+        self.view.add_label(eid, text, world_pos, scale)
 
     # ---------------------------- أدوات الرسم ---------------------------
     def line(self, p1: Point3D, p2: Point3D, color: Optional[ColorTuple] = None):
         color = color or self.colors["line"]
         _debug(f"Line {p1} -> {p2}")
+        with _transaction(self.display, "Line"):
+            eid = self.doc.add_line(p1, p2, style="line")
         if self.viewer_type == "VTK":
-            import vtk
-            src = vtk.vtkLineSource()
-            src.SetPoint1(*p1); src.SetPoint2(*p2); src.Update()
-            m = vtk.vtkPolyDataMapper(); m.SetInputData(src.GetOutput())
-            a = vtk.vtkActor(); a.SetMapper(m)
-            a.GetProperty().SetColor(*color)
-            a.GetProperty().SetLineWidth(self.line_width)
-            self.display.renderer.AddActor(a)
-            self._label3d_vtk(f"{math.dist((p1[0],p1[1]),(p2[0],p2[1])):.1f} mm",
+            self._label3d_vtk(eid, f"{math.dist((p1[0],p1[1]),(p2[0],p2[1])):.1f} mm",
                               ((p1[0]+p2[0])/2.0, (p1[1]+p2[1])/2.0, 0.0))
             self._render()
-            return
-        if not _HAS_OCC:
-            return
-        edge = BRepBuilderAPI_MakeEdge(GC_MakeLine(gp_Pnt(*p1), gp_Pnt(*p2)).Value()).Edge()
-        self._show_occ(edge, color)
+            return eid
+        if _HAS_OCC:
+            edge = BRepBuilderAPI_MakeEdge(GC_MakeLine(gp_Pnt(*p1), gp_Pnt(*p2)).Value()).Edge()
+            self._show_occ(edge, color)
+        return eid
 
     def circle(self, center: Point3D, radius: float, color: Optional[ColorTuple] = None):
         color = color or self.colors["circle"]
         _debug(f"Circle C={center} R={radius}")
+        with _transaction(self.display, "Circle"):
+            eid = self.doc.add_circle(center, radius, style="circle")
         if self.viewer_type == "VTK":
-            import vtk
-            src = vtk.vtkRegularPolygonSource()
-            src.SetCenter(*center); src.SetRadius(float(radius)); src.SetNumberOfSides(64); src.Update()
-            m = vtk.vtkPolyDataMapper(); m.SetInputData(src.GetOutput())
-            a = vtk.vtkActor(); a.SetMapper(m)
-            a.GetProperty().SetColor(*color)
-            a.GetProperty().SetRepresentationToWireframe()
-            a.GetProperty().SetLineWidth(self.line_width)
-            self.display.renderer.AddActor(a)
-            self._label3d_vtk(f"R = {radius:.1f} mm", (center[0]+radius, center[1], 0.0))
+            self._label3d_vtk(eid, f"R = {radius:.1f} mm", (center[0]+radius, center[1], 0.0))
             self._render()
-            return
-        if not _HAS_OCC:
-            return
-        ax2 = gp_Ax2(gp_Pnt(*center), gp_Dir(0, 0, 1))
-        circ = GC_MakeCircle(ax2, float(radius)).Value()
-        edge = BRepBuilderAPI_MakeEdge(circ).Edge()
-        self._show_occ(edge, color)
+            return eid
+        if _HAS_OCC:
+            ax2 = gp_Ax2(gp_Pnt(*center), gp_Dir(0, 0, 1))
+            circ = GC_MakeCircle(ax2, float(radius)).Value()
+            edge = BRepBuilderAPI_MakeEdge(circ).Edge()
+            self._show_occ(edge, color)
+        return eid
 
     def rectangle(self, origin: Point3D, width: float, height: float, color: Optional[ColorTuple] = None):
         color = color or self.colors["rect"]
         _debug(f"Rect origin={origin} w={width} h={height}")
+        x, y, z = origin
+        corners = [(x, y), (x+width, y), (x+width, y+height), (x, y+height)]
+        # 4 خطوط في مجموعة واحدة (التحديد/النسخ/الحذف يشمل المستطيل كاملاً)
+        with _transaction(self.display, "Rectangle"):
+            ids = self.doc.add_polyline(corners, closed=True, style="rect")
+            # المستطيل يبقى مستطيلاً عند تعديل أي بُعد أو تحريك ضلع
+            sides = [int(i) for i in ids]
+            for k in range(4):
+                self.constraints.coincident((sides[k], END), (sides[(k + 1) % 4], START), solve=False)
+            for k in (0, 2):
+                self.constraints.horizontal(sides[k], solve=False)
+                self.constraints.vertical(sides[k + 1], solve=False)
         if self.viewer_type == "VTK":
-            import vtk
-            x, y, z = origin
-            pts = [(x, y, z), (x+width, y, z), (x+width, y+height, z), (x, y+height, z)]
-            poly = vtk.vtkPolygon(); poly.GetPointIds().SetNumberOfIds(4)
-            points = vtk.vtkPoints()
-            for i, p in enumerate(pts):
-                points.InsertNextPoint(*p); poly.GetPointIds().SetId(i, i)
-            cells = vtk.vtkCellArray(); cells.InsertNextCell(poly)
-            pd = vtk.vtkPolyData(); pd.SetPoints(points); pd.SetPolys(cells)
-            m = vtk.vtkPolyDataMapper(); m.SetInputData(pd)
-            a = vtk.vtkActor(); a.SetMapper(m)
-            a.GetProperty().SetColor(*color)
-            a.GetProperty().SetRepresentationToWireframe()
-            self.display.renderer.AddActor(a)
             cx, cy = x + width/2.0, y + height/2.0
-            self._label3d_vtk(f"{abs(width):.1f} × {abs(height):.1f} mm", (cx, cy, 0.0))
+            self._label3d_vtk(int(ids[0]), f"{abs(width):.1f} × {abs(height):.1f} mm", (cx, cy, 0.0))
             self._render()
-            return
-        if not _HAS_OCC:
-            return
-        x, y, z = origin
-        pts = [gp_Pnt(x, y, z), gp_Pnt(x+width, y, z), gp_Pnt(x+width, y+height, z),
-               gp_Pnt(x, y+height, z), gp_Pnt(x, y, z)]
-        wmk = BRepBuilderAPI_MakeWire()
-        for i in range(4):
-            wmk.Add(BRepBuilderAPI_MakeEdge(pts[i], pts[i+1]).Edge())
-        wire = wmk.Wire()
-        self._show_occ(wire, color)
+            return ids
+        if _HAS_OCC:
+            pts = [gp_Pnt(px, py, z) for px, py in corners + corners[:1]]
+            wmk = BRepBuilderAPI_MakeWire()
+            for k in range(4):
+                wmk.Add(BRepBuilderAPI_MakeEdge(pts[k], pts[k+1]).Edge())
+            self._show_occ(wmk.Wire(), color)
+        return ids
 
     def arc_3pt(self, p1: Point3D, p2: Point3D, p3: Point3D, color: Optional[ColorTuple] = None):
         color = color or self.colors["arc"]
         _debug(f"Arc 3pt: {p1} , {p2} , {p3}")
+        arc = arc_from_3pts(p1, p2, p3)
+        if arc is None:
+            # نقاط شبه مستقيمة
+            _debug("Arc: نقاط شبه مستقيمة — تجاهل.")
+            return None
+        center, r, a0, a1 = arc
+        with _transaction(self.display, "Arc"):
+            eid = self.doc.add_arc(center, r, a0, a1, style="arc")
         if self.viewer_type == "VTK":
-            import vtk
-            # إذا كانت النقاط شبه مستقيمة، نتجاهل
-            def area2(a,b,c): return abs((b[0]-a[0])*(c[1]-a[1])-(b[1]-a[1])*(c[0]-a[0]))
-            if area2(p1, p2, p3) < 1e-6:
-                _debug("Arc: نقاط شبه مستقيمة — تجاهل.")
-                return
-            # توليد قوس يدويًا (متوافق مع كل نسخ VTK)
-            num_pts = 100
-            # مركز الدائرة من 3 نقاط:
-            c = self._circle_center_from_3pts(p1, p2, p3)
-            if c is None:
-                _debug("Arc: فشل إيجاد المركز — تجاهل.")
-                return
-            r = math.hypot(p1[0]-c[0], p1[1]-c[1])
-            ang1 = math.atan2(p1[1]-c[1], p1[0]-c[0])
-            angm = math.atan2(p2[1]-c[1], p2[0]-c[0])
-            ang2 = math.atan2(p3[1]-c[1], p3[0]-c[0])
-            # اختيار اتجاه يمر بالنقطة الوسطى
-            def norm(a):
-                while a < 0: a += 2*math.pi
-                while a >= 2*math.pi: a -= 2*math.pi
-                return a
-            ang1, angm, ang2 = norm(ang1), norm(angm), norm(ang2)
-            if not (ang1 <= angm <= ang2 or (ang2 < ang1 and (angm >= ang1 or angm <= ang2))):
-                # اعكس الاتجاه
-                ang1, ang2 = ang2, ang1
-            import vtk
-            pts = vtk.vtkPoints()
-            lines = vtk.vtkCellArray()
-            for i in range(num_pts):
-                t = i/(num_pts-1)
-                a = ang1 + t*(ang2-ang1)
-                x = c[0] + r*math.cos(a)
-                y = c[1] + r*math.sin(a)
-                pts.InsertNextPoint(x, y, 0.0)
-            for i in range(num_pts-1):
-                ln = vtk.vtkLine()
-                ln.GetPointIds().SetId(0, i)
-                ln.GetPointIds().SetId(1, i+1)
-                lines.InsertNextCell(ln)
-            pd = vtk.vtkPolyData()
-            pd.SetPoints(pts); pd.SetLines(lines)
-            m = vtk.vtkPolyDataMapper(); m.SetInputData(pd)
-            a = vtk.vtkActor(); a.SetMapper(m)
-            a.GetProperty().SetColor(*color)
-            a.GetProperty().SetLineWidth(self.line_width)
-            self.display.renderer.AddActor(a)
             # ملصق نصف القطر
-            self._label3d_vtk(f"R ≈ {r:.1f} mm", p2)
+            self._label3d_vtk(eid, f"R ≈ {r:.1f} mm", p2)
             self._render()
+            return eid
+        if _HAS_OCC:
+            edge = BRepBuilderAPI_MakeEdge(
+                GC_MakeArcOfCircle(gp_Pnt(*p1), gp_Pnt(*p2), gp_Pnt(*p3)).Value()
+            ).Edge()
+            self._show_occ(edge, color)
+        return eid
+
+    # ---------------------------- الأبعاد والقيود ---------------------------
+    def dimension(self, eid: int, value: float) -> bool:
+        """
+        بُعد قائد للعنصر: طول الخط أو نصف قطر القوس/الدائرة.
+        إن وُجد بُعد سابق تتغير قيمته، ويُعاد حل عنقود القيود المرتبط به فقط.
+        القيمة التي تتعارض مع القيود الحالية تُرفض: يبقى البُعد السابق والرسم كما هو، ويُبلَّغ المستخدم.
+        """
+        eid = int(eid)
+        if eid not in self.doc:
+            return False
+        if value <= 0:
+            self._report(f"⚠️ Dimension: القيمة {value:g} غير صالحة (يجب أن تكون موجبة).")
+            return False
+        with _transaction(self.display, "Dimension"):
+            cid = self.constraints.dimension_of(eid)
+            if cid is not None:
+                ok = self.constraints.set_value(cid, value)
+            elif self.doc.kind_of(eid) == LINE:
+                ok = self.constraints.length(eid, value) is not None
+            else:
+                ok = self.constraints.radius(eid, value) is not None
+        if not ok:
+            self._report(f"⚠️ Dimension: تعذر تحقيق القيمة {value:g} — تتعارض مع القيود الحالية.")
+        self._refresh_labels(self.constraints.cluster([eid])[0])
+        self._render()
+        return ok
+
+    def solve_moved(self, ids) -> bool:
+        """بعد تحريك عناصر: تثبيتها وإعادة حل العناقيد المرتبطة بها."""
+        ok = self.constraints.solve_around(ids, locked=ids)
+        self._refresh_labels(self.constraints.cluster(ids)[0])
+        return ok
+
+    def _report(self, msg: str):
+        """رسالة للمستخدم: في السجل + تلميح عند المؤشر (بدون نافذة حاجبة) في عارض VTK."""
+        _debug(msg)
+        if self.viewer_type != "VTK":
             return
-        if not _HAS_OCC:
+        try:
+            from PySide6.QtGui import QCursor
+            from PySide6.QtWidgets import QToolTip, QWidget
+            if isinstance(self.display, QWidget):
+                QToolTip.showText(QCursor.pos(), msg, self.display)
+        except Exception:
+            pass
+
+    def _dim_text(self, eid: int) -> str:
+        kind, g = self.doc.kind_of(eid), self.doc.geom_of(eid)
+        if kind == LINE:
+            members = self.doc.group_members(eid)
+            if self.doc.style_of(eid) == "rect" and len(members) == 4:
+                w, h = (math.hypot(*(self.doc.geom_of(m)[2:4] - self.doc.geom_of(m)[0:2])) for m in members[:2])
+                return f"{w:.1f} × {h:.1f} mm"
+            return f"{math.hypot(g[2] - g[0], g[3] - g[1]):.1f} mm"
+        return f"R = {g[2]:.1f} mm" if kind == CIRCLE else f"R ≈ {g[2]:.1f} mm"
+
+    def _refresh_labels(self, ids):
+        if self.view is None:
             return
-        edge = BRepBuilderAPI_MakeEdge(
-            GC_MakeArcOfCircle(gp_Pnt(*p1), gp_Pnt(*p2), gp_Pnt(*p3)).Value()
-        ).Edge()
-        self._show_occ(edge, color)
-
-    # ------------------------- هندسة مساعدة -------------------------
-    @staticmethod
-    def _circle_center_from_3pts(p1: Point3D, p2: Point3D, p3: Point3D) -> Optional[Point3D]:
-        (x1, y1, _), (x2, y2, _), (x3, y3, _) = p1, p2, p3
-        a = 2 * (x1*(y2-y3) + x2*(y3-y1) + x3*(y1-y2))
-        if abs(a) < 1e-9: return None
-        x1s, x2s, x3s = x1*x1 + y1*y1, x2*x2 + y2*y2, x3*x3 + y3*y3
-        cx = (x1s*(y2-y3) + x2s*(y3-y1) + x3s*(y1-y2)) / a
-        cy = (x1*(x2s-x3s) + x2*(x3s-x1s) + x3*(x1s-x2s)) / a
-        return (cx, cy, 0.0)
+        for eid in ids:
+            if eid in self.doc:
+                self.view.set_label_text(eid, self._dim_text(eid))
 
     # ---------------------- نظام النقرات التفاعلي ----------------------
     def handle_click(self, world: Point3D, tool: str):
@@ -397,37 +452,33 @@ class SketchOps:
 
     # ---------------------- وصل أدوات التعديل ----------------------
     # يمكن استدعاء هذه الدوال من interactor/toolbar عبر viewer.modify_ops
-    def trim_at(self, click_world: Point3D):
-        self.modify_ops.trim(click_world)
+    def trim_at(self, click_world: Point3D, pick_radius: float = 20.0):
+        self.modify_ops.trim(click_world, pick_radius)
+
+    def extend_at(self, click_world: Point3D, pick_radius: float = 20.0):
+        self.modify_ops.extend(click_world, pick_radius)
+
+    def _last_entity(self):
+        """آخر عنصر مُضاف (مع مجموعته، مثل أضلاع المستطيل)."""
+        ids = self.doc.ids()
+        return self.doc.group_members(ids[-1]) if len(ids) else None
 
     def offset_last(self, distance: float = 10.0):
-        """إزاحة آخر عنصر (VTK فقط حالياً)"""
-        if self.viewer_type != "VTK":
-            _debug("Offset: وضع OCC غير مدعوم بعد.")
-            return
-        actors = self.display.renderer.GetActors()
-        actors.InitTraversal()
-        last_actor = None
-        a = actors.GetNextActor()
-        while a:
-            last_actor = a
-            a = actors.GetNextActor()
-        if last_actor:
-            self.modify_ops.offset(last_actor, distance)
+        """إزاحة آخر عنصر"""
+        last = self._last_entity()
+        if last is not None:
+            self.modify_ops.offset(last, distance)
 
     def mirror_last(self, axis: str = "Y"):
-        if self.viewer_type != "VTK":
-            _debug("Mirror: وضع OCC غير مدعوم بعد.")
-            return
-        actors = self.display.renderer.GetActors()
-        actors.InitTraversal()
-        last_actor = None
-        a = actors.GetNextActor()
-        while a:
-            last_actor = a
-            a = actors.GetNextActor()
-        if last_actor:
-            self.modify_ops.mirror(last_actor, axis)
+        last = self._last_entity()
+        if last is not None:
+            self.modify_ops.mirror(last, axis)
 
     def fillet_two_points(self, p1: Point3D, p2: Point3D, radius: float = 5.0):
         self.modify_ops.fillet(p1, p2, radius)
+
+    def fillet_last(self, radius: float = 5.0):
+        """تدوير كل زوايا آخر عنصر (مثل المستطيل)"""
+        last = self._last_entity()
+        if last is not None:
+            self.modify_ops.fillet_loop(last, radius)
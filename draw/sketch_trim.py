@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+sketch_trim.py — تقاطعات عناصر الرسم + Trim / Extend
+- التقاطع تحليلي (خط/قوس/دائرة) ومتجه على كل المرشحين دفعة واحدة
+- المرشحون من SketchIndex (box_query على صندوق العنصر فقط) بدل المرور على كل المخطط
+- Trim: يقسم العنصر عند تقاطعاته ويحذف الجزء الذي نُقر عليه فقط
+- Extend: يمد الخط/القوس من الطرف الأقرب للنقرة حتى أول عنصر يقطعه
+النطاق: عناصر SketchDocument فقط (ما رُسم في المخطط). مقاطع DXF المستوردة تُعرض
+كشكل بروفايل على مستوى XZ (load_dxf) ولا تدخل المخطط، فلا تُقص ولا يُمد إليها.
+"""
+
+from __future__ import annotations
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from draw.sketch_document import ARC, CIRCLE, LINE, SketchDocument
+
+TWO_PI = 2.0 * math.pi
+# سماحية المعاملات (t للخط، زاوية للقوس) لاعتبار التقاطع داخلياً
+PARAM_EPS = 1e-9
+
+
+def _in_sweep(theta: np.ndarray, a0: np.ndarray, a1: np.ndarray) -> np.ndarray:
+    return np.mod(theta - a0, TWO_PI) <= (a1 - a0) + 1e-9
+
+
+def _on_curves(kind: np.ndarray, g: np.ndarray, pts: np.ndarray) -> np.ndarray:
+    """هل تقع نقاط التقاطع (على دوائر المرشحين) داخل مدى الأقواس؟ (الدوائر دائماً)"""
+    theta = np.arctan2(pts[:, 1] - g[:, 1], pts[:, 0] - g[:, 0])
+    return (kind == CIRCLE) | _in_sweep(theta, g[:, 3], g[:, 4])
+
+
+def carrier_hits(doc: SketchDocument, eid: int, others) -> np.ndarray:
+    """
+    معاملات تقاطع "حامل" العنصر eid مع العناصر others (كل منها ضمن حدوده هو):
+    - خط: t غير محدود على p1 + t (p2 - p1)  (0..1 = الخط نفسه)
+    - قوس/دائرة: زاوية النقطة حول المركز (راديان، -pi..pi)
+    الحامل غير محدود حتى يصلح نفس الاستعلام لـ Extend.
+    """
+    others = np.asarray([o for o in np.atleast_1d(others).tolist() if o != eid and o in doc], dtype=np.int64)
+    if not len(others):
+        return np.empty(0)
+    rec = doc.records(others)
+    kind, g = rec.kind, rec.geom
+    seg = kind == LINE
+    gl, gc, kc = g[seg], g[~seg], kind[~seg]
+    out: List[np.ndarray] = []
+
+    k0, g0 = doc.kind_of(eid), doc.geom_of(eid)
+    if k0 == LINE:
+        p, d = g0[0:2], g0[2:4] - g0[0:2]
+        # خط × مقاطع
+        if len(gl):
+            a, e = gl[:, 0:2], gl[:, 2:4] - gl[:, 0:2]
+            denom = d[0] * e[:, 1] - d[1] * e[:, 0]
+            ok = np.abs(denom) > 1e-12
+            w = a[ok] - p
+            t = (w[:, 0] * e[ok, 1] - w[:, 1] * e[ok, 0]) / denom[ok]
+            u = (w[:, 0] * d[1] - w[:, 1] * d[0]) / denom[ok]
+            out.append(t[(u >= -PARAM_EPS) & (u <= 1 + PARAM_EPS)])
+        # خط × دوائر/أقواس
+        if len(gc):
+            f = p - gc[:, 0:2]
+            A = float(d @ d)
+            B = 2.0 * (f @ d)
+            C = np.einsum("ij,ij->i", f, f) - gc[:, 2] ** 2
+            disc = B * B - 4 * A * C
+            ok = (disc >= 0) & (A > 1e-24)
+            root = np.sqrt(np.where(ok, disc, 0.0))
+            for sign in (-1.0, 1.0):
+                t = (-B + sign * root) / (2 * A if A > 1e-24 else 1.0)
+                pts = p + t[:, None] * d
+                out.append(t[ok & _on_curves(kc, gc, pts)])
+    else:
+        c0, r0 = g0[0:2], g0[2]
+        # دائرة × مقاطع
+        if len(gl):
+            a, e = gl[:, 0:2], gl[:, 2:4] - gl[:, 0:2]
+            f = a - c0
+            A = np.einsum("ij,ij->i", e, e)
+            B = 2.0 * np.einsum("ij,ij->i", f, e)
+            C = np.einsum("ij,ij->i", f, f) - r0 * r0
+            disc = B * B - 4 * A * C
+            ok = (disc >= 0) & (A > 1e-24)
+            root = np.sqrt(np.where(ok, disc, 0.0))
+            A_safe = np.where(A > 1e-24, A, 1.0)
+            for sign in (-1.0, 1.0):
+                u = (-B + sign * root) / (2 * A_safe)
+                keep = ok & (u >= -PARAM_EPS) & (u <= 1 + PARAM_EPS)
+                pts = a[keep] + u[keep, None] * e[keep]
+                out.append(np.arctan2(pts[:, 1] - c0[1], pts[:, 0] - c0[0]))
+        # دائرة × دوائر/أقواس
+        if len(gc):
+            dv = gc[:, 0:2] - c0
+            dist = np.hypot(dv[:, 0], dv[:, 1])
+            r1 = gc[:, 2]
+            ok = (dist > 1e-12) & (dist <= r0 + r1 + 1e-9) & (dist >= np.abs(r0 - r1) - 1e-9)
+            dist_safe = np.where(ok, dist, 1.0)
+            along = (r0 * r0 - r1 * r1 + dist_safe ** 2) / (2 * dist_safe)
+            h = np.sqrt(np.maximum(r0 * r0 - along ** 2, 0.0))
+            unit = dv / dist_safe[:, None]
+            base = c0 + along[:, None] * unit
+            perp = np.stack([-unit[:, 1], unit[:, 0]], axis=1)
+            for sign in (-1.0, 1.0):
+                pts = base + sign * h[:, None] * perp
+                keep = ok & _on_curves(kc, gc, pts)
+                out.append(np.arctan2(pts[keep, 1] - c0[1], pts[keep, 0] - c0[0]))
+    return np.concatenate(out) if out else np.empty(0)
+
+
+def _candidates(doc: SketchDocument, eid: int, index, box) -> np.ndarray:
+    """العناصر التي تلمس الصندوق (من الفهرس المكاني إن وُجد، وإلا كل المخطط)."""
+    if index is None:
+        return doc.ids()
+    return np.asarray(index.box_query(*box, crossing=True), dtype=np.int64)
+
+
+def _unique_sorted(values: np.ndarray) -> np.ndarray:
+    values = np.sort(values)
+    if len(values) < 2:
+        return values
+    return values[np.concatenate([[True], np.diff(values) > PARAM_EPS])]
+
+
+def _click_angle(g: np.ndarray, click) -> float:
+    return math.atan2(click[1] - g[1], click[0] - g[0])
+
+
+# ------------------------------------------------------------
+# ✂️ Trim
+# ------------------------------------------------------------
+def trim_entity(doc: SketchDocument, eid: int, click, index=None) -> Optional[np.ndarray]:
+    """
+    يحذف جزء العنصر الواقع بين أقرب تقاطعين حول النقرة.
+    بدون تقاطعات يُحذف العنصر كاملاً. يُعيد IDs الأجزاء المتبقية (قد تكون فارغة)، أو None.
+    """
+    if eid not in doc:
+        return None
+    kind, g = doc.kind_of(eid), doc.geom_of(eid)
+    style, group = doc.style_of(eid), doc.group_of(eid)
+    box = doc.bounds([eid])
+    params = carrier_hits(doc, eid, _candidates(doc, eid, index, box))
+
+    if kind == CIRCLE:
+        cuts = _unique_sorted(np.mod(params, TWO_PI))
+        if len(cuts) < 2:
+            doc.remove([eid])
+            return np.empty(0, dtype=np.int64)
+        # القوس المتبقي يبدأ من نهاية الجزء المحذوف ويدور حتى بدايته
+        at = np.mod(_click_angle(g, click), TWO_PI)
+        k = int(np.searchsorted(cuts, at))
+        lo, hi = cuts[k - 1], cuts[k % len(cuts)]
+        with doc.batch():
+            doc.remove([eid])
+            return doc.add_many(ARC, [[g[0], g[1], g[2], hi, lo + TWO_PI if lo <= hi else lo]], style, group)
+
+    if kind == LINE:
+        p, d = g[0:2], g[2:4] - g[0:2]
+        span = 1.0
+        denom = float(d @ d)
+        at = float((np.asarray(click[:2]) - p) @ d / denom) if denom > 0 else 0.0
+        cuts = params
+    else:
+        span = g[4] - g[3]
+        cuts = np.mod(params - g[3], TWO_PI)
+        at = math.fmod(_click_angle(g, click) - g[3] + 2 * TWO_PI, TWO_PI)
+        if at > span:
+            # نقرة خارج مدى القوس: أقرب طرف
+            at = span if at - span < TWO_PI - at else 0.0
+    cuts = _unique_sorted(cuts[(cuts > PARAM_EPS) & (cuts < span - PARAM_EPS)])
+    at = min(max(at, 0.0), span)
+    lo = float(cuts[cuts < at].max()) if (cuts < at).any() else 0.0
+    hi = float(cuts[cuts > at].min()) if (cuts > at).any() else span
+    pieces = [(0.0, lo)] if lo > PARAM_EPS else []
+    if hi < span - PARAM_EPS:
+        pieces.append((hi, span))
+
+    if not pieces:
+        doc.remove([eid])
+        return np.empty(0, dtype=np.int64)
+    if kind == LINE:
+        rows = [np.concatenate([p + t0 * d, p + t1 * d]) for t0, t1 in pieces]
+    else:
+        rows = [[g[0], g[1], g[2], g[3] + t0, g[3] + t1] for t0, t1 in pieces]
+    with doc.batch():
+        # الجزء الأول يحتفظ بـ ID العنصر (ملصقه ومجموعته)، والثاني عنصر جديد بنفس النمط
+        doc.set_geom([eid], [rows[0]])
+        extra = doc.add_many(kind, rows[1:], style, group) if len(rows) > 1 else np.empty(0, dtype=np.int64)
+    return np.concatenate([[eid], extra]).astype(np.int64)
+
+
+# ------------------------------------------------------------
+# ↦ Extend
+# ------------------------------------------------------------
+def extend_entity(doc: SketchDocument, eid: int, click, index=None) -> bool:
+    """
+    يمد الطرف الأقرب للنقرة حتى أول تقاطع مع عنصر آخر.
+    الخط على امتداده المستقيم، والقوس على دائرته. يُعيد True إن تم المد.
+    """
+    if eid not in doc:
+        return False
+    kind, g = doc.kind_of(eid), doc.geom_of(eid)
+    if kind == CIRCLE:
+        return False
+    extent = doc.bounds()
+    reach = math.hypot(extent[2] - extent[0], extent[3] - extent[1])
+    click = np.asarray(click[:2], dtype=np.float64)
+
+    if kind == LINE:
+        p, q = g[0:2], g[2:4]
+        at_end = np.hypot(*(click - q)) <= np.hypot(*(click - p))
+        d = q - p
+        length = float(np.hypot(*d))
+        if length < 1e-12:
+            return False
+        tip = q if at_end else p
+        far = tip + (d if at_end else -d) / length * reach
+        box = (min(tip[0], far[0]), min(tip[1], far[1]), max(tip[0], far[0]), max(tip[1], far[1]))
+        t = carrier_hits(doc, eid, _candidates(doc, eid, index, box))
+        if at_end:
+            t = t[t > 1 + PARAM_EPS]
+            if not len(t):
+                return False
+            doc.set_geom([eid], [np.concatenate([p, p + t.min() * d])])
+        else:
+            t = t[t < -PARAM_EPS]
+            if not len(t):
+                return False
+            doc.set_geom([eid], [np.concatenate([p + t.max() * d, q])])
+        return True
+
+    cx, cy, r, a0, a1 = g[:5]
+    span = a1 - a0
+    tip0 = (cx + r * math.cos(a0), cy + r * math.sin(a0))
+    tip1 = (cx + r * math.cos(a1), cy + r * math.sin(a1))
+    at_end = math.hypot(click[0] - tip1[0], click[1] - tip1[1]) <= math.hypot(click[0] - tip0[0], click[1] - tip0[1])
+    ang = carrier_hits(doc, eid, _candidates(doc, eid, index, (cx - r, cy - r, cx + r, cy + r)))
+    if at_end:
+        gap = np.mod(ang - a1, TWO_PI)
+    else:
+        gap = np.mod(a0 - ang, TWO_PI)
+    # المد لا يتجاوز إغلاق الدائرة
+    gap = gap[(gap > PARAM_EPS) & (gap < TWO_PI - span - PARAM_EPS)]
+    if not len(gap):
+        return False
+    step = float(gap.min())
+    doc.set_geom([eid], [[cx, cy, r, a0, a1 + step] if at_end else [cx, cy, r, a0 - step, a1]])
+    return True
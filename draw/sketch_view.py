@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+sketch_view.py — عرض مُجمّع (batched) لنموذج الرسم
+- actor واحد لكل نمط (line / circle / rect / arc / ...) بدل actor لكل عنصر
+- التحديد له actor خاص به (يُحرَّك مباشرة أثناء السحب بدون إعادة بناء)
+- أي تعديل في SketchDocument يعيد بناء الأنماط المتأثرة فقط ويحدّث الفهرس المكاني
+- ملصقات القياس مرتبطة بـ ID العنصر وتتبعه عند التحريك وتُحذف معه
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import vtk
+
+from viewer import vtk_bridge
+from draw.sketch_document import SketchDocument
+
+SELECTION_STYLE = "__selection__"
+SELECTION_COLOR = (0.1, 0.6, 1.0)
+DEFAULT_COLOR = (0.3, 0.3, 0.3)
+
+
+class SketchView:
+    """مزامنة SketchDocument -> actors مجمّعة + SketchIndex."""
+
+    def __init__(self, renderer, document: SketchDocument, index=None,
+                 colors: Optional[Dict[str, Tuple[float, float, float]]] = None,
+                 line_width: float = 2.0, label_color=(0.2, 0.2, 0.2)):
+        self.renderer = renderer
+        self.doc = document
+        self.index = index
+        self.colors = dict(colors or {})
+        self.line_width = line_width
+        self.label_color = label_color
+
+        self._actors: Dict[str, vtk.vtkActor] = {}
+        self._style_of: Dict[int, str] = {}
+        self._dirty: Set[str] = set()
+        self.selection: Set[int] = set()
+
+        # ملصقات: id -> (follower, إزاحة عن أول نقطة التقاط)
+        self._labels: Dict[int, Tuple[vtk.vtkFollower, np.ndarray]] = {}
+        # ملصقات عناصر محذوفة (تعود إن أعاد التراجع العنصر بنفس ID)
+        self._detached: Dict[int, Tuple[vtk.vtkFollower, np.ndarray]] = {}
+
+        document.add_listener(self._on_changed)
+
+    # ------------------------------------------------------------
+    # 🎨 actors
+    # ------------------------------------------------------------
+    def _actor(self, style: str) -> vtk.vtkActor:
+        actor = self._actors.get(style)
+        if actor is None:
+            mapper = vtk.vtkPolyDataMapper()
+            mapper.SetInputData(vtk.vtkPolyData())
+            actor = vtk.vtkActor()
+            actor.SetMapper(mapper)
+            color = SELECTION_COLOR if style == SELECTION_STYLE else self.colors.get(style, DEFAULT_COLOR)
+            actor.GetProperty().SetColor(*color)
+            actor.GetProperty().SetLineWidth(self.line_width)
+            actor.PickableOff()
+            self.renderer.AddActor(actor)
+            self._actors[style] = actor
+        return actor
+
+    @property
+    def selection_actor(self) -> vtk.vtkActor:
+        return self._actor(SELECTION_STYLE)
+
+    def actors(self):
+        return list(self._actors.values())
+
+    def label_actors(self):
+        return [follower for follower, _ in self._labels.values()]
+
+    def attach(self):
+        """إعادة إضافة كل actors للـ renderer (بعد مسح المشهد)."""
+        for actor in self._actors.values():
+            self.renderer.AddActor(actor)
+        for follower, _ in self._labels.values():
+            self.renderer.AddActor(follower)
+
+    # ------------------------------------------------------------
+    # 🔔 تغييرات النموذج
+    # ------------------------------------------------------------
+    def _on_changed(self, changed: np.ndarray, removed: np.ndarray):
+        for eid in removed.tolist():
+            style = self._style_of.pop(eid, None)
+            if style is not None:
+                self._dirty.add(style)
+            if eid in self.selection:
+                self.selection.discard(eid)
+                self._dirty.add(SELECTION_STYLE)
+            if self.index is not None:
+                self.index.remove(eid)
+            item = self._labels.pop(eid, None)
+            if item is not None:
+                self.renderer.RemoveActor(item[0])
+                self._detached[eid] = item
+
+        for eid in changed.tolist():
+            old = self._style_of.get(eid)
+            new = self.doc.style_of(eid)
+            if old is not None:
+                self._dirty.add(old)
+            self._style_of[eid] = new
+            self._dirty.add(SELECTION_STYLE if eid in self.selection else new)
+
+        if len(changed):
+            self._update_index(changed)
+            self._update_labels(changed)
+        self.refresh()
+
+    def _update_index(self, ids: np.ndarray):
+        if self.index is None:
+            return
+        segs, owner = self.doc.tessellate(ids)
+        keys, seg_owner = np.unique(owner, return_inverse=True)
+        snaps, snap_owner, kinds = self.doc.snaps_many(keys)
+        self.index.insert_many(keys.tolist(), segs, seg_owner, snaps, snap_owner, kinds)
+
+    def refresh(self):
+        """إعادة بناء PolyData للأنماط المتأثرة فقط."""
+        for style in self._dirty:
+            if style == SELECTION_STYLE:
+                ids = np.fromiter(self.selection, dtype=np.int64)
+            else:
+                ids = self.doc.ids_with_style(style)
+                if self.selection:
+                    ids = ids[~np.isin(ids, np.fromiter(self.selection, dtype=np.int64))]
+            segs, _ = self.doc.tessellate(ids)
+            pd = vtk_bridge.segments_polydata(segs, plane="XY") if len(segs) else vtk.vtkPolyData()
+            self._actor(style).GetMapper().SetInputData(pd)
+        self._dirty.clear()
+
+    # ------------------------------------------------------------
+    # 🔵 التحديد
+    # ------------------------------------------------------------
+    def set_selection(self, ids: Iterable[int]):
+        new = {int(i) for i in ids if int(i) in self.doc}
+        for eid in self.selection ^ new:
+            self._dirty.add(self._style_of.get(eid, ""))
+        self._dirty.discard("")
+        self._dirty.add(SELECTION_STYLE)
+        self.selection = new
+        self.selection_actor.SetPosition(0.0, 0.0, 0.0)
+        self.refresh()
+
+    def clear_selection(self):
+        self.set_selection(())
+
+    # ------------------------------------------------------------
+    # 🏷️ ملصقات القياس
+    # ------------------------------------------------------------
+    def add_label(self, eid: int, text: str, world_pos, scale: float = 2.0):
+        self._drop_label(eid)
+        vtext = vtk.vtkVectorText()
+        vtext.SetText(text)
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputConnection(vtext.GetOutputPort())
+        follower = vtk.vtkFollower()
+        follower.SetMapper(mapper)
+        follower.SetScale(scale, scale, scale)
+        follower.SetPosition(world_pos[0], world_pos[1], 0.0)
+        follower.GetProperty().SetColor(*self.label_color)
+        follower.SetCamera(self.renderer.GetActiveCamera())
+        follower.PickableOff()
+        self.renderer.AddActor(follower)
+        anchor = self.doc.snaps(eid)[0][0]
+        self._labels[int(eid)] = (follower, np.asarray(world_pos[:2], dtype=np.float64) - anchor)
+
+    def set_label_text(self, eid: int, text: str):
+        """تحديث نص ملصق موجود (بعد تغيير بُعد أو حل القيود)."""
+        item = self._labels.get(int(eid)) or self._detached.get(int(eid))
+        if item is None:
+            return
+        source = item[0].GetMapper().GetInputAlgorithm()
+        if isinstance(source, vtk.vtkVectorText):
+            source.SetText(text)
+
+    def release_detached(self, keep: Iterable[int] = ()):
+        """تحرير ملصقات العناصر المحذوفة التي لا يستطيع أي أمر في السجل إعادتها (keep = ما زال قابلاً)."""
+        keep = set(keep)
+        for eid in [eid for eid in self._detached if eid not in keep]:
+            del self._detached[eid]
+
+    @property
+    def has_detached(self) -> bool:
+        return bool(self._detached)
+
+    def _drop_label(self, eid: int):
+        self._detached.pop(int(eid), None)
+        item = self._labels.pop(int(eid), None)
+        if item is not None:
+            self.renderer.RemoveActor(item[0])
+
+    def _update_labels(self, ids: np.ndarray):
+        for eid in ids.tolist():
+            item = self._detached.pop(eid, None)
+            if item is not None:
+                self._labels[eid] = item
+                self.renderer.AddActor(item[0])
+            item = self._labels.get(eid)
+            if item is None:
+                continue
+            follower, offset = item
+            x, y = self.doc.snaps(eid)[0][0] + offset
+            follower.SetPosition(x, y, 0.0)
@@ -6,7 +6,7 @@ AlumProCNC — Top Bar
 
 from PySide6.QtWidgets import QWidget, QHBoxLayout, QFrame, QPushButton
 from PySide6.QtGui import QPainter, QPainterPath, QBrush, QColor, QPixmap, QIcon
-from PySide6.QtCore import Qt, QSize, QEvent
+from PySide6.QtCore import Qt, QSize, QEvent, Signal
 from PySide6.QtSvg import QSvgRenderer
 
 # 🎨 ألوان AlumProCNC الرسمية
@@ -42,6 +42,10 @@ def tint_svg(svg_path: str, color_hex: str, size: QSize) -> QIcon:
 # 🧭 الكلاس الأساسي للشريط العلوي
 # ==============================================================
 class TopBar(QWidget):
+    # ↩️ أزرار التراجع / التقدم (تُربط بسجل العارض في WorkspacePage)
+    undo_requested = Signal()
+    redo_requested = Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -92,6 +96,12 @@ class TopBar(QWidget):
             left_layout.addWidget(btn)
             self.buttons.append((btn, icon_name))
 
+        self.undo_btn = self._button("undo.svg")
+        self.redo_btn = self._button("redo.svg")
+        self.undo_btn.clicked.connect(self.undo_requested.emit)
+        self.redo_btn.clicked.connect(self.redo_requested.emit)
+        self.set_history_state(False, False)
+
         # 🟦 القسم الفاتح الأوسط
         center = QFrame()
         center.setStyleSheet(f"background-color: {LIGHT_COLOR};")
@@ -133,6 +143,19 @@ class TopBar(QWidget):
         # أضف زر الإعدادات إلى القائمة العامة
         self.buttons.append((self.settings_btn, "gear.svg"))
 
+    def _button(self, icon_name: str):
+        for btn, path in self.buttons:
+            if path == icon_name:
+                return btn
+        return None
+
+    def set_history_state(self, can_undo: bool, can_redo: bool, undo_label: str = "", redo_label: str = ""):
+        """تفعيل/تعطيل أزرار التراجع والتقدم حسب السجل."""
+        self.undo_btn.setEnabled(can_undo)
+        self.redo_btn.setEnabled(can_redo)
+        self.undo_btn.setToolTip(f"تراجع: {undo_label}" if undo_label else "تراجع")
+        self.redo_btn.setToolTip(f"تقدم: {redo_label}" if redo_label else "تقدم")
+
     # ==============================================================
     # 🖱️ تغيير لون الأيقونات عند hover فقط
     # ==============================================================
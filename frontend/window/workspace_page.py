@@ -76,6 +76,13 @@ class WorkspacePage(QWidget):
         # 🔗 ربط الأدوات بالعارض
         self.sketch_tools_panel.vtk_viewer = self.vtk_viewer
 
+        # ↩️ ربط أزرار التراجع / التقدم بسجل العارض
+        history = self.vtk_viewer.history
+        self.top_bar.undo_requested.connect(self.vtk_viewer.undo)
+        self.top_bar.redo_requested.connect(self.vtk_viewer.redo)
+        history.changed.connect(lambda: self.top_bar.set_history_state(
+            history.can_undo, history.can_redo, history.undo_label(), history.redo_label()))
+
         # 🔗 ربط إشارة التبويبات
         self.tabs_content.tab_selected.connect(self.on_tab_changed)
 
@@ -6,14 +6,25 @@
 تعتمد فقط على tools/geometry_ops.py للمنطق الهندسي.
 """
 
+from contextlib import nullcontext
+
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QProgressBar
 )
 from PySide6.QtCore import Qt
 
 from frontend.base.base_tool_window import BaseToolWindow
+from operation.job_runner import job_runner
 from tools.geometry_ops import extrude_profile
 
+# أسماء المراحل كما تظهر للمستخدم، ووزن كل مرحلة من شريط التقدم الكلي
+_STAGES = {
+    "parse": ("Parsing DXF", 0, 30),
+    "loops": ("Finding loops", 30, 20),
+    "faces": ("Building faces", 50, 30),
+    "prism": ("Extruding", 80, 20),
+}
+
 
 
 class ExtrudeWindow(BaseToolWindow):
@@ -21,6 +32,7 @@ class ExtrudeWindow(BaseToolWindow):
         super().__init__("Extrude", parent)
         self.setFixedSize(400, 260)
         self.profile_path = profile_path  # المسار القادم من Profile Manager
+        self._job = None
         self._build_ui()
 
     # ------------------------------------------------------------------
@@ -48,6 +60,17 @@ class ExtrudeWindow(BaseToolWindow):
         row_axis.addWidget(self.axis_selector)
         layout.addLayout(row_axis)
 
+        # التقدم (يظهر فقط أثناء التنفيذ في الخلفية)
+        self.status_label = QLabel("")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setFixedHeight(6)
+        self.status_label.hide()
+        self.progress_bar.hide()
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.progress_bar)
+
         # الأزرار
         row_btns = QHBoxLayout()
         self.preview_btn = QPushButton("Preview")
@@ -66,7 +89,7 @@ class ExtrudeWindow(BaseToolWindow):
         # الأحداث
         self.preview_btn.clicked.connect(lambda: self._on_apply(preview=True))
         self.apply_btn.clicked.connect(lambda: self._on_apply(preview=False))
-        self.cancel_btn.clicked.connect(self.close)
+        self.cancel_btn.clicked.connect(self._on_cancel)
 
     # ------------------------------------------------------------------
     def _find_viewer(self):
@@ -114,21 +137,73 @@ class ExtrudeWindow(BaseToolWindow):
         axis = self.axis_selector.currentText().upper()
         print(f"🟢 [ExtrudeWindow] بدء الإكسترود على المحور {axis} بعمق {depth}mm ...")
 
-        try:
-            solid = extrude_profile(dxf_path, depth, axis)
-            if solid and not solid.IsNull():
+        # عملية واحدة فقط في كل مرة لهذه النافذة (الأزرار معطلة أثناء التنفيذ)
+        if self._job is not None:
+            return
+
+        self._set_running(True)
+        self._job = job_runner().submit(
+            "extrude",
+            lambda ctx: extrude_profile(dxf_path, depth, axis, progress=ctx),
+            on_progress=self._on_progress,
+            on_result=lambda solid, job_preview=preview: self._on_result(viewer, solid, job_preview),
+            on_error=self._on_error,
+            on_cancel=lambda: self._set_running(False),
+        )
+
+    # ------------------------------------------------------------------
+    def _set_running(self, running: bool):
+        if not running:
+            self._job = None
+        self.preview_btn.setEnabled(not running)
+        self.apply_btn.setEnabled(not running)
+        self.status_label.setVisible(running)
+        self.progress_bar.setVisible(running)
+        if running:
+            self.progress_bar.setValue(0)
+            self.status_label.setText("Starting...")
+
+    def _on_progress(self, stage: str, percent: int):
+        label, start, weight = _STAGES.get(stage, (stage, 0, 100))
+        self.status_label.setText(f"{label}...")
+        self.progress_bar.setValue(start + weight * percent // 100)
+
+    def _on_result(self, viewer, solid, preview):
+        """يُستدعى على خيط الواجهة بعد انتهاء العملية."""
+        self._set_running(False)
+        if solid and not solid.IsNull():
+            # المسح + العرض = أمر تراجع واحد (يعيد المشهد والرسم السابقين)
+            history = getattr(viewer, "history", None)
+            with history.transaction("Extrude") if history is not None else nullcontext():
                 if hasattr(viewer, "clear_scene"):
                     viewer.clear_scene()
                 if hasattr(viewer, "display_shape"):
-                    viewer.display_shape(solid)
+                    actor = viewer.display_shape(solid)
                 else:
-                    viewer.core.display_shape(solid)
-                print("🟢 [ExtrudeWindow] تم عرض الشكل بعد الإكسترود بنجاح.")
-            else:
-                print("⚠️ [ExtrudeWindow] لم يُنشأ شكل صالح للإكسترود.")
-
-        except Exception as e:
-            print(f"❌ [ExtrudeWindow] خطأ أثناء الإكسترود: {e}")
+                    actor = viewer.core.display_shape(solid)
+                if history is not None:
+                    history.actor_added(actor)
+            print("🟢 [ExtrudeWindow] تم عرض الشكل بعد الإكسترود بنجاح.")
+        else:
+            print("⚠️ [ExtrudeWindow] لم يُنشأ شكل صالح للإكسترود.")
+            return
 
         if not preview:
             self.close()
+
+    def _on_error(self, message: str):
+        self._set_running(False)
+        print(f"❌ [ExtrudeWindow] خطأ أثناء الإكسترود: {message}")
+
+    def _on_cancel(self):
+        """Cancel: يلغي العملية الجارية أولاً، ثم يغلق النافذة."""
+        if self._job is not None:
+            self._job.cancel()
+            self.status_label.setText("Cancelling...")
+            return
+        self.close()
+
+    def closeEvent(self, event):
+        if self._job is not None:
+            self._job.cancel()
+        super().closeEvent(event)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+⏳ JobRunner — تشغيل العمليات الهندسية الثقيلة خارج خيط الواجهة
+- كل عملية (Extrude / Cut / Hole / Pattern ...) دالة عادية: fn(ctx, *args, **kwargs)
+- ctx(stage, fraction) يرسل تقدم المرحلة ويتحقق من الإلغاء (يرمي JobCancelled)
+- النتيجة تعود لخيط الواجهة عبر Signals (اتصال Queued تلقائي بين الخيوط)
+"""
+
+from __future__ import annotations
+import threading
+import traceback
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class JobCancelled(Exception):
+    """تُرمى داخل العملية عند طلب الإلغاء."""
+
+
+class JobContext:
+    """يُمرَّر للعملية: تقرير التقدم + نقطة فحص الإلغاء."""
+
+    def __init__(self, signals: "JobSignals"):
+        self._signals = signals
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def __call__(self, stage: str, fraction: float = 0.0):
+        """تقرير تقدم المرحلة stage (0..1) ثم فحص الإلغاء."""
+        self.check()
+        self._signals.progress.emit(stage, int(max(0.0, min(1.0, fraction)) * 100))
+
+
+class JobSignals(QObject):
+    progress = Signal(str, int)     # (المرحلة، النسبة 0..100)
+    finished = Signal(object)       # النتيجة
+    failed = Signal(str)            # رسالة الخطأ
+    cancelled = Signal()
+
+
+class Job(QRunnable):
+    """عملية واحدة على QThreadPool."""
+
+    def __init__(self, name: str, fn: Callable, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # المرجع محفوظ في JobRunner حتى انتهاء الإشارات
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self.ctx = JobContext(self.signals)
+        self.done = False
+
+    def cancel(self):
+        self.ctx.cancel()
+
+    def run(self):
+        try:
+            self.ctx.check()
+            result = self.fn(self.ctx, *self.args, **self.kwargs)
+            self.ctx.check()
+        except JobCancelled:
+            print(f"⏹️ [JobRunner] أُلغيت العملية: {self.name}")
+            self.signals.cancelled.emit()
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(f"{type(e).__name__}: {e}")
+        else:
+            self.signals.finished.emit(result)
+        finally:
+            self.done = True
+
+
+class JobRunner(QObject):
+    """مشغّل مشترك للعمليات الخلفية (مجمع خيوط خاص بالعمليات الهندسية)."""
+
+    def __init__(self, max_threads: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool()
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._jobs: set = set()
+
+    def submit(self, name: str, fn: Callable, *args,
+               on_result: Optional[Callable] = None,
+               on_progress: Optional[Callable] = None,
+               on_error: Optional[Callable] = None,
+               on_cancel: Optional[Callable] = None,
+               **kwargs) -> Job:
+        """
+        جدولة fn(ctx, *args, **kwargs) في الخلفية.
+        كل callbacks تُستدعى على خيط الواجهة.
+        """
+        job = Job(name, fn, *args, **kwargs)
+        s = job.signals
+        if on_progress:
+            s.progress.connect(on_progress)
+        if on_result:
+            s.finished.connect(on_result)
+        if on_error:
+            s.failed.connect(on_error)
+        if on_cancel:
+            s.cancelled.connect(on_cancel)
+        for sig in (s.finished, s.failed, s.cancelled):
+            sig.connect(lambda *_, j=job: self._jobs.discard(j))
+
+        self._jobs.add(job)
+        print(f"⏳ [JobRunner] بدء العملية: {name}")
+        self.pool.start(job)
+        return job
+
+    def cancel_all(self):
+        for job in list(self._jobs):
+            job.cancel()
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._jobs)
+
+
+_runner: Optional[JobRunner] = None
+
+
+def job_runner() -> JobRunner:
+    """المشغّل المشترك (يُنشأ عند أول استخدام على خيط الواجهة)."""
+    global _runner
+    if _runner is None:
+        _runner = JobRunner()
+    return _runner
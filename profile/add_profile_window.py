@@ -200,7 +200,7 @@ class AddProfileWindow(BaseToolWindow):
     # --------------------------------------------------------------
     def _generate_preview(self, file_path: str):
         try:
-            segs, bbox = load_dxf_segments(Path(file_path))
+            segs, bbox = load_dxf_segments(Path(file_path), as_array=True)
             # 🧩 استخدم اسم البروفايل بدل اسم DXF
             safe_name = self.name_input.text().strip() or Path(file_path).stem
             safe_name = safe_name.replace(" ", "_").replace("/", "_")
@@ -241,7 +241,8 @@ class AddProfileWindow(BaseToolWindow):
             import shutil
             from profile import profiles_db
             from profile.dxf_normalizer import load_dxf_segments
-            from profile.thumbnailer import draw_segments_thumbnail
+            from profile.envelope import profile_envelope
+            from profile.thumbnailer import DEFAULT_SIZE, save_thumbnails
 
             # مجلدات التخزين
             shapes_dir = Path("data/shapes")
@@ -261,9 +262,11 @@ class AddProfileWindow(BaseToolWindow):
                 shutil.copy2(src, dst)
             print(f"📂 [AddProfile] DXF copied as: {dst.name}")
 
-            # توليد/تحديث الصورة المصغّرة بنفس الاسم
-            segs, bbox = load_dxf_segments(dst)
-            png_path = str(Path(draw_segments_thumbnail(segs, bbox, safe_name)).resolve())
+            # توليد/تحديث الصور المصغّرة (كل الأحجام) بنفس الاسم
+            segs, bbox = load_dxf_segments(dst, as_array=True)
+            png_path = str(Path(save_thumbnails(segs, bbox, safe_name)[DEFAULT_SIZE]).resolve())
+            # غلاف البروفايل (عرض/ارتفاع/جدار/مساحة) للبحث بالقياس
+            envelope = profile_envelope(segs, bbox)
 
             # حفظ في قاعدة البيانات بالمسارات النهائية
             profiles_db.add_profile({
@@ -275,6 +278,7 @@ class AddProfileWindow(BaseToolWindow):
                 "thumb_path": png_path,  # عادةً data/thumbnails/<safe_name>.png
                 "source": "DXF",
                 "desc": desc,
+                **envelope,
             })
 
             print(f"💾 [AddProfile] Added to DB: {name} ({size})")
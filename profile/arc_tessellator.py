@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+ArcBatch — تقسيم الأقواس والدوائر وأقواس bulge دفعة واحدة (vectorized)
+- تُجمع كل الأقواس من الملف أولاً (مركز، نصف قطر، زاوية بداية، امتداد)
+- عدد الخطوات لكل قوس يُحسب من خطأ الوتر المسموح (chord error) بدل 5° الثابتة
+- التقييم النهائي cos/sin يتم في تمريرة NumPy واحدة لكل الأقواس
+"""
+
+from __future__ import annotations
+from typing import List
+
+import numpy as np
+
+TWO_PI = 2.0 * np.pi
+
+# خطأ الوتر الافتراضي (mm): أقصى بعد بين القوس الحقيقي والمقطع المستقيم
+DEFAULT_CHORD_TOL = 0.01
+# أكبر زاوية لخطوة واحدة حتى للأقواس الكبيرة جداً مقارنة بالسماحية
+MAX_STEP_ANGLE = np.pi / 8.0
+# حد أعلى لعدد المقاطع لكل قوس (حماية من أنصاف أقطار ضخمة)
+MAX_STEPS_PER_ARC = 2048
+
+
+def arc_step_counts(radius, span, chord_tol: float = DEFAULT_CHORD_TOL) -> np.ndarray:
+    """عدد المقاطع اللازم لكل قوس بحيث لا يتجاوز خطأ الوتر chord_tol."""
+    r = np.abs(np.asarray(radius, dtype=np.float64))
+    span = np.abs(np.asarray(span, dtype=np.float64))
+    tol = max(float(chord_tol), 1e-9)
+    # زاوية الخطوة: 2·acos(1 - tol/r)  (عند r <= tol يكفي أكبر خطوة مسموحة)
+    ratio = np.clip(1.0 - tol / np.maximum(r, 1e-12), -1.0, 1.0)
+    step = np.minimum(2.0 * np.arccos(ratio), MAX_STEP_ANGLE)
+    step = np.maximum(step, 1e-9)
+    n = np.ceil(span / step).astype(np.int64)
+    return np.clip(n, 1, MAX_STEPS_PER_ARC)
+
+
+def bulge_to_arcs(x1, y1, x2, y2, bulge):
+    """
+    تحويل مقاطع LWPOLYLINE ذات bulge إلى (cx, cy, r, a0, span) كمصفوفات.
+    bulge = tan(θ/4) ، والإشارة تحدد الاتجاه (موجب = عكس عقارب الساعة).
+    """
+    x1 = np.asarray(x1, dtype=np.float64)
+    y1 = np.asarray(y1, dtype=np.float64)
+    x2 = np.asarray(x2, dtype=np.float64)
+    y2 = np.asarray(y2, dtype=np.float64)
+    b = np.asarray(bulge, dtype=np.float64)
+
+    dx, dy = x2 - x1, y2 - y1
+    chord = np.hypot(dx, dy)
+    span = 4.0 * np.arctan(b)
+    radius = chord * (1.0 + b * b) / (4.0 * np.abs(b))
+
+    # المركز على العمود المنصّف، بإزاحة مُوقّعة نحو يسار اتجاه الوتر
+    h = (1.0 - b * b) / (4.0 * b)
+    cx = (x1 + x2) * 0.5 - dy * h
+    cy = (y1 + y2) * 0.5 + dx * h
+    a0 = np.arctan2(y1 - cy, x1 - cx)
+    return cx, cy, radius, a0, span
+
+
+class ArcBatch:
+    """يجمع الأقواس ثم يقسّمها كلها في تمريرة واحدة."""
+
+    def __init__(self):
+        self._arcs: List[tuple] = []      # (cx, cy, r, a0, span)
+        self._bulges: List[tuple] = []    # (x1, y1, x2, y2, bulge)
+
+    def __len__(self) -> int:
+        return len(self._arcs) + len(self._bulges)
+
+    # ------------------------------------------------------------
+    # ➕ إضافة عناصر
+    # ------------------------------------------------------------
+    def add_arc(self, cx: float, cy: float, r: float, a0: float, span: float):
+        """قوس بزاوية بداية a0 وامتداد مُوقّع span (راديان)."""
+        self._arcs.append((cx, cy, r, a0, span))
+
+    def add_circle(self, cx: float, cy: float, r: float):
+        self._arcs.append((cx, cy, r, 0.0, TWO_PI))
+
+    def add_dxf_arc(self, cx: float, cy: float, r: float, start_deg: float, end_deg: float):
+        """قوس DXF: دائماً عكس عقارب الساعة من start إلى end."""
+        a0 = np.radians(start_deg)
+        span = np.radians(end_deg - start_deg) % TWO_PI
+        if span == 0.0:
+            span = TWO_PI
+        self._arcs.append((cx, cy, r, a0, span))
+
+    def add_bulge(self, x1: float, y1: float, x2: float, y2: float, bulge: float):
+        self._bulges.append((x1, y1, x2, y2, bulge))
+
+    # ------------------------------------------------------------
+    # 🧮 التقسيم
+    # ------------------------------------------------------------
+    def _arc_params(self):
+        cols = [np.empty(0)] * 5
+        ends = np.empty((0, 4))
+        if self._arcs:
+            cols = list(np.asarray(self._arcs, dtype=np.float64).T)
+            ends = np.full((len(self._arcs), 4), np.nan)
+        if self._bulges:
+            bx = np.asarray(self._bulges, dtype=np.float64).T
+            valid = np.hypot(bx[2] - bx[0], bx[3] - bx[1]) >= 1e-12
+            extra = bulge_to_arcs(*(c[valid] for c in bx))
+            cols = [np.concatenate([a, e]) for a, e in zip(cols, extra)]
+            # نقاط bulge الأصلية تُحفظ لتبقى متصلة تماماً بباقي المضلع
+            ends = np.concatenate([ends, bx[:4, valid].T])
+        return cols, ends
+
+    def tessellate(self, chord_tol: float = DEFAULT_CHORD_TOL, return_circles: bool = False):
+        """
+        يُعيد مصفوفة مقاطع (M, 2, 2) لكل الأقواس المجمّعة.
+        return_circles=True: يُعيد أيضاً (M, 3) = (cx, cy, r) للقوس الأصلي لكل مقطع.
+        """
+        (cx, cy, r, a0, span), ends = self._arc_params()
+        if not len(cx):
+            out = np.empty((0, 2, 2), dtype=np.float64)
+            return (out, np.empty((0, 3))) if return_circles else out
+
+        steps = arc_step_counts(r, span, chord_tol)
+        n_arcs = len(steps)
+        total = int(steps.sum())
+
+        # كل قوس له steps+1 نقطة؛ نقيّم cos/sin لكل النقاط مرة واحدة
+        pts_per_arc = steps + 1
+        arc_of_pt = np.repeat(np.arange(n_arcs), pts_per_arc)
+        first_pt = np.cumsum(pts_per_arc) - pts_per_arc
+        j = np.arange(total + n_arcs) - first_pt[arc_of_pt]
+        t = a0[arc_of_pt] + span[arc_of_pt] * (j / steps[arc_of_pt])
+
+        pts = np.empty((total + n_arcs, 2), dtype=np.float64)
+        pts[:, 0] = cx[arc_of_pt] + r[arc_of_pt] * np.cos(t)
+        pts[:, 1] = cy[arc_of_pt] + r[arc_of_pt] * np.sin(t)
+
+        # إرجاع نقاط الطرفين الدقيقة حيث تتوفر (bulge)
+        exact = ~np.isnan(ends[:, 0])
+        if exact.any():
+            pts[first_pt[exact]] = ends[exact, 0:2]
+            pts[first_pt[exact] + steps[exact]] = ends[exact, 2:4]
+
+        # المقطع k من القوس i يصل النقطة (first_pt[i] + k) بالتي تليها
+        seg_arc = np.repeat(np.arange(n_arcs), steps)
+        start = np.arange(total) + seg_arc
+        out = np.empty((total, 2, 2), dtype=np.float64)
+        out[:, 0, :] = pts[start]
+        out[:, 1, :] = pts[start + 1]
+        if return_circles:
+            circles = np.stack([cx, cy, r], axis=1)[seg_arc]
+            return out, circles
+        return out
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+📦 BulkImportWindow — استيراد مجلد DXF كامل من مورّد
+الواجهة فقط: العمل الفعلي في profile.bulk_importer.import_folder
+على JobRunner (والتحليل نفسه داخل ProcessPool).
+"""
+
+from pathlib import Path
+
+from PySide6.QtWidgets import (
+    QLabel, QLineEdit, QPushButton, QFileDialog, QCheckBox,
+    QVBoxLayout, QHBoxLayout, QProgressBar
+)
+from PySide6.QtCore import Qt, Signal
+
+from frontend.base.base_tool_window import BaseToolWindow
+from operation.job_runner import job_runner
+from profile.bulk_importer import import_folder
+
+# أسماء المراحل كما تظهر للمستخدم، ووزن كل مرحلة من شريط التقدم الكلي
+_STAGES = {
+    "scan": ("Scanning folder", 0, 2),
+    "hash": ("Checking duplicates", 2, 8),
+    "import": ("Importing profiles", 10, 90),
+}
+
+
+class BulkImportWindow(BaseToolWindow):
+    # يُرسل بعد انتهاء الاستيراد أو إلغائه أو فشله (عدد المضاف، أو 0 إن لم يُعرف)
+    # لتحديث مكتبة البروفايلات — الدفعات المكتملة تُحفظ في كل الحالات
+    imported = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__("Import Folder", parent)
+        self.setMinimumSize(520, 360)
+        self._job = None
+        self._build_ui()
+
+    # --------------------------------------------------------------
+    def _build_ui(self):
+        layout = QVBoxLayout(self.content_area)
+        layout.setContentsMargins(24, 20, 24, 10)
+        layout.setSpacing(12)
+        layout.setAlignment(Qt.AlignTop)
+
+        row_folder = QHBoxLayout()
+        row_folder.addWidget(QLabel("المجلد:"))
+        self.folder_input = QLineEdit()
+        self.folder_input.setPlaceholderText("Supplier DXF folder...")
+        row_folder.addWidget(self.folder_input, 1)
+        browse_btn = QPushButton("Browse…")
+        browse_btn.clicked.connect(self._browse_folder)
+        row_folder.addWidget(browse_btn)
+        layout.addLayout(row_folder)
+
+        row_company = QHBoxLayout()
+        row_company.addWidget(QLabel("الشركة:"))
+        self.company_input = QLineEdit()
+        self.company_input.setPlaceholderText("Company (default: folder name)")
+        row_company.addWidget(self.company_input, 1)
+        layout.addLayout(row_company)
+
+        self.recursive_check = QCheckBox("Include subfolders")
+        self.recursive_check.setChecked(True)
+        layout.addWidget(self.recursive_check)
+
+        # التقدم (يظهر فقط أثناء التنفيذ في الخلفية)
+        self.status_label = QLabel("")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setFixedHeight(6)
+        self.progress_bar.hide()
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.progress_bar)
+
+        # ملخص النتيجة + مسار تقرير الفشل
+        self.result_label = QLabel("")
+        self.result_label.setWordWrap(True)
+        self.result_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.result_label)
+
+        self.btn_ok.setText("Import")
+        self.btn_ok.clicked.connect(self._on_import)
+        self.btn_cancel.clicked.disconnect()
+        self.btn_cancel.clicked.connect(self._on_cancel)
+
+    # --------------------------------------------------------------
+    def _browse_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Supplier Folder")
+        if folder:
+            self.folder_input.setText(folder)
+            if not self.company_input.text().strip():
+                self.company_input.setPlaceholderText(Path(folder).name)
+
+    def _on_import(self):
+        if self._job is not None:
+            return
+        folder = self.folder_input.text().strip()
+        if not folder or not Path(folder).is_dir():
+            self.show_message("مجلد غير صالح", "يرجى اختيار مجلد ملفات DXF.", "warn")
+            return
+        company = self.company_input.text().strip() or None
+        recursive = self.recursive_check.isChecked()
+
+        print(f"📦 [BulkImport] بدء استيراد: {folder}")
+        self._set_running(True)
+        self._job = job_runner().submit(
+            "bulk_import",
+            lambda ctx: import_folder(folder, company=company, recursive=recursive, progress=ctx),
+            on_progress=self._on_progress,
+            on_result=self._on_result,
+            on_error=self._on_error,
+            on_cancel=self._on_cancelled,
+        )
+
+    # --------------------------------------------------------------
+    def _set_running(self, running: bool):
+        if not running:
+            self._job = None
+        self.btn_ok.setEnabled(not running)
+        self.progress_bar.setVisible(running)
+        if running:
+            self.progress_bar.setValue(0)
+            self.status_label.setText("Starting...")
+            self.result_label.setText("")
+
+    def _on_progress(self, stage: str, percent: int):
+        label, start, weight = _STAGES.get(stage, (stage, 0, 100))
+        self.status_label.setText(f"{label}... {percent}%")
+        self.progress_bar.setValue(start + weight * percent // 100)
+
+    def _on_result(self, report):
+        """يُستدعى على خيط الواجهة بعد انتهاء الاستيراد."""
+        self._set_running(False)
+        self.status_label.setText("Done")
+        text = report.summary()
+        if report.failed or report.duplicates:
+            text += f"\nالتقرير: {report.write().resolve()}"
+        self.result_label.setText(text)
+        self.imported.emit(report.added)
+
+    def _on_error(self, message: str):
+        self._set_running(False)
+        self.status_label.setText("Failed")
+        self.result_label.setText(message)
+        print(f"❌ [BulkImport] خطأ أثناء الاستيراد: {message}")
+        self.imported.emit(0)
+
+    def _on_cancelled(self):
+        self._set_running(False)
+        self.status_label.setText("Cancelled (الدفعات المكتملة محفوظة)")
+        self.imported.emit(0)
+
+    def _on_cancel(self):
+        """Cancel: يلغي الاستيراد الجاري أولاً، ثم يغلق النافذة."""
+        if self._job is not None:
+            self._job.cancel()
+            self.status_label.setText("Cancelling...")
+            return
+        self.close()
+
+    def closeEvent(self, event):
+        if self._job is not None:
+            self._job.cancel()
+        super().closeEvent(event)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+📦 استيراد جماعي لمجلد بروفايلات (DXF) من مورّد
+- مسح المجلد ثم بصمة SHA-256 لكل ملف، والمكرر (في القاعدة أو داخل نفس المجلد) يُتجاوز قبل أي تحليل
+- التحليل والتطبيع + الغلاف + نسخ الملف + المصغّرة: في ProcessPoolExecutor (كل ملف في عملية مستقلة)
+- الكتابة في profiles_db على دفعات (transaction لكل دفعة) من العملية الرئيسية فقط
+- progress(stage, fraction) بنفس أسلوب JobContext (يرمي استثناءً للإلغاء)
+- تقرير بالمضاف / المكرر / الفاشل مع سبب الفشل (CSV)
+- لا ملفات يتيمة: ما كتبه العامل (نسخة DXF + المصغّرات) يُحذف إن فشل الملف أو أُلغي قبل تسجيله
+
+سطر الأوامر:
+    python -m profile.bulk_importer <folder> [--company NAME] [--workers N] [--report out.csv]
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from profile import profiles_db
+
+# 📂 مجلد نسخ ملفات DXF (نفس مجلد AddProfileWindow)
+SHAPES_DIR = Path("data/shapes")
+# 📂 مجلد تقارير الاستيراد
+REPORTS_DIR = Path("data/import_reports")
+# عدد السجلات في كل transaction
+BATCH_SIZE = 200
+DXF_SUFFIXES = (".dxf",)
+
+
+def _no_progress(stage, fraction=0.0):
+    pass
+
+
+def safe_stem(name: str) -> str:
+    """اسم ملف آمن مشتق من اسم البروفايل (نفس قاعدة AddProfileWindow)."""
+    name = (name or "profile").strip()
+    return name.replace(" ", "_").replace("/", "_").replace("\\", "_")
+
+
+def scan_folder(folder, recursive: bool = True) -> List[Path]:
+    """كل ملفات DXF في المجلد (مرتبة لتكون نتيجة الاستيراد ثابتة)."""
+    folder = Path(folder)
+    pattern = "**/*" if recursive else "*"
+    return sorted(p for p in folder.glob(pattern) if p.is_file() and p.suffix.lower() in DXF_SUFFIXES)
+
+
+class ImportReport:
+    """نتيجة الاستيراد: المضاف، المكرر (مع السبب)، الفاشل (مع الخطأ)."""
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.total = 0
+        self.added = 0
+        self.duplicates: List[Tuple[str, str]] = []
+        self.failed: List[Tuple[str, str]] = []
+        self.elapsed = 0.0
+
+    def summary(self) -> str:
+        return (f"{self.total} ملف: أُضيف {self.added}، مكرر {len(self.duplicates)}، "
+                f"فشل {len(self.failed)} ({self.elapsed:.1f} ث)")
+
+    def write(self, path=None) -> Path:
+        """حفظ المكرر والفاشل كـ CSV (status, file, detail)."""
+        if path is None:
+            REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+            path = REPORTS_DIR / f"import_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        path = Path(path)
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            w = csv.writer(f)
+            w.writerow(["status", "file", "detail"])
+            w.writerows(("failed", p, e) for p, e in self.failed)
+            w.writerows(("duplicate", p, d) for p, d in self.duplicates)
+        return path
+
+
+# -----------------------------------------------------------
+# ⚙️ العامل (يعمل في عملية منفصلة — دالة على مستوى الوحدة لتُنقل بـ pickle)
+# -----------------------------------------------------------
+def _remove_files(paths: List[str]):
+    for p in paths:
+        try:
+            Path(p).unlink(missing_ok=True)
+        except OSError as e:
+            print(f"⚠️ [Import] تعذر حذف {p}: {e}")
+
+
+def _import_one(src: str, dst: str, thumb_name: str, company: str, content_hash: str,
+                created: List[str]) -> Dict:
+    """
+    created: تُضاف إليه الملفات التي أنشأها هذا العامل فعلاً (لا تُلمس الملفات الموجودة مسبقاً).
+    النسخ إلى shapes_dir آخر خطوة، بعد نجاح التحليل والمصغّرات.
+    """
+    from profile.dxf_normalizer import load_dxf_segments
+    from profile.envelope import profile_envelope
+    from profile.thumbnailer import DEFAULT_SIZE, THUMB_SIZES, save_thumbnails, thumb_path
+
+    segs, bbox = load_dxf_segments(Path(src), as_array=True)
+    if not len(segs):
+        raise ValueError("لا توجد مقاطع صالحة في DXF")
+    env = profile_envelope(segs, bbox)
+    # المصغّرات قد تفشل في منتصفها: كل حجم لم يكن موجوداً يُعتبر من إنشاء هذا العامل
+    created.extend(str(p) for p in (thumb_path(thumb_name, s) for s in THUMB_SIZES) if not p.exists())
+    thumb = save_thumbnails(segs, bbox, thumb_name)[DEFAULT_SIZE]
+    if Path(src).resolve() != Path(dst).resolve():
+        created.append(dst)
+        shutil.copy2(src, dst)
+    name = Path(src).stem
+    return {
+        "name": name,
+        "code": thumb_name,
+        "company": company,
+        "size": f"{round(env['width'], 1):g}x{round(env['height'], 1):g}",
+        "file_path": dst,
+        "thumb_path": str(Path(thumb).resolve()),
+        "source": "DXF",
+        "desc": "",
+        "content_hash": content_hash,
+        **env,
+    }
+
+
+def _run_task(args) -> Tuple[str, Optional[Dict], Optional[str], List[str]]:
+    """(المصدر، السجل أو None، الخطأ، الملفات المنشأة — للحذف إن لم يُسجَّل السجل)."""
+    src = args[0]
+    created: List[str] = []
+    try:
+        return src, _import_one(*args, created), None, created
+    except Exception as e:
+        _remove_files(created)
+        return src, None, f"{type(e).__name__}: {e}", []
+
+
+# -----------------------------------------------------------
+# 🚚 الاستيراد
+# -----------------------------------------------------------
+def _plan_names(files: List[Path], shapes_dir: Path) -> List[str]:
+    """أسماء وجهة فريدة: ملفان بنفس الاسم (مجلدات فرعية مختلفة) لا يكتب أحدهما فوق الآخر."""
+    used = {p.stem.lower() for p in shapes_dir.glob("*")}
+    names = []
+    for f in files:
+        base = stem = safe_stem(f.stem)
+        k = 2
+        while stem.lower() in used:
+            stem = f"{base}_{k}"
+            k += 1
+        used.add(stem.lower())
+        names.append(stem)
+    return names
+
+
+def import_folder(folder, company: Optional[str] = None, recursive: bool = True,
+                  workers: Optional[int] = None, batch_size: int = BATCH_SIZE,
+                  shapes_dir=SHAPES_DIR, progress: Optional[Callable] = None) -> ImportReport:
+    """
+    استيراد كل DXF في folder إلى مكتبة البروفايلات.
+    company: اسم المورّد (الافتراضي اسم المجلد).
+    progress(stage, fraction): المراحل "scan" / "hash" / "import".
+    """
+    progress = progress or _no_progress
+    started = time.perf_counter()
+    folder = Path(folder)
+    company = company or folder.resolve().name
+    report = ImportReport(folder)
+    shapes_dir = Path(shapes_dir)
+    shapes_dir.mkdir(parents=True, exist_ok=True)
+
+    progress("scan", 0.0)
+    files = scan_folder(folder, recursive)
+    report.total = len(files)
+    print(f"📦 [Import] {len(files)} DXF in: {folder}")
+
+    # 🧬 البصمات والتكرار (قبل أي تحليل مكلف)
+    hashes = []
+    for i, f in enumerate(files):
+        if i % 50 == 0:
+            progress("hash", i / max(len(files), 1))
+        hashes.append(profiles_db.file_hash(f))
+    known = profiles_db.existing_hashes(hashes)
+    todo: List[Tuple[Path, str]] = []
+    first_of: Dict[str, Path] = {}
+    for f, h in zip(files, hashes):
+        if h is None:
+            report.failed.append((str(f), "تعذرت قراءة الملف"))
+        elif h in known:
+            report.duplicates.append((str(f), "موجود في المكتبة"))
+        elif h in first_of:
+            report.duplicates.append((str(f), f"نسخة من {first_of[h].name}"))
+        else:
+            first_of[h] = f
+            todo.append((f, h))
+
+    names = _plan_names([f for f, _ in todo], shapes_dir)
+    tasks = [(str(f), str((shapes_dir / f"{n}{f.suffix.lower()}").resolve()), n, company, h)
+             for (f, h), n in zip(todo, names)]
+
+    # ⚙️ التحليل + المصغّرات في عمليات متوازية، والكتابة على دفعات هنا
+    pending: List[Dict] = []
+
+    def flush():
+        if pending:
+            report.added += profiles_db.add_profiles(pending)
+            pending.clear()
+
+    progress("import", 0.0)
+    if tasks:
+        # spawn دائماً: fork من عملية فيها خيوط Qt/JobRunner قد يتجمد (وهو الافتراضي على Windows أصلاً)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_run_task, t) for t in tasks]
+            consumed = set()
+            try:
+                for done, fut in enumerate(as_completed(futures), start=1):
+                    consumed.add(fut)
+                    src, row, error, _ = fut.result()
+                    if error:
+                        report.failed.append((src, error))
+                    else:
+                        pending.append(row)
+                        if len(pending) >= batch_size:
+                            flush()
+                    progress("import", done / len(tasks))
+            except BaseException:
+                # إلغاء: ما لم يبدأ يُلغى، والدفعات المستلمة تُحفظ،
+                # وما انتهى (أو كان قيد التنفيذ) دون استلامه تُحذف ملفاته حتى لا تبقى يتيمة
+                for fut in futures:
+                    fut.cancel()
+                flush()
+                rest = [f for f in futures if f not in consumed and not f.cancelled()]
+                wait(rest)
+                for fut in rest:
+                    try:
+                        _remove_files(fut.result()[3])
+                    except Exception:
+                        pass
+                raise
+    flush()
+
+    report.elapsed = time.perf_counter() - started
+    print(f"✅ [Import] {report.summary()}")
+    return report
+
+
+# -----------------------------------------------------------
+# 🖥️ سطر الأوامر
+# -----------------------------------------------------------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m profile.bulk_importer",
+                                     description="استيراد مجلد DXF كامل إلى مكتبة البروفايلات")
+    parser.add_argument("folder", help="مجلد ملفات DXF الخاص بالمورّد")
+    parser.add_argument("--company", help="اسم المورّد (الافتراضي: اسم المجلد)")
+    parser.add_argument("--workers", type=int, default=None, help="عدد العمليات المتوازية")
+    parser.add_argument("--no-recursive", action="store_true", help="عدم الدخول للمجلدات الفرعية")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="عدد السجلات في كل transaction")
+    parser.add_argument("--db", help="مسار قاعدة بيانات بديلة")
+    parser.add_argument("--report", help="مسار تقرير CSV (الافتراضي data/import_reports)")
+    args = parser.parse_args(argv)
+
+    if not Path(args.folder).is_dir():
+        print(f"❌ [Import] المجلد غير موجود: {args.folder}")
+        return 2
+    if args.db:
+        profiles_db.DB_PATH = Path(args.db)
+
+    def progress(stage, fraction=0.0):
+        sys.stdout.write(f"\r⏳ {stage:<6} {fraction * 100:5.1f}%")
+        sys.stdout.flush()
+
+    report = import_folder(args.folder, company=args.company, recursive=not args.no_recursive,
+                           workers=args.workers, batch_size=args.batch, progress=progress)
+    if report.failed or report.duplicates:
+        print(f"📝 [Import] Report: {report.write(args.report)}")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+💾 DXF parse cache — كاش لنتائج load_dxf_segments
+- المفتاح: hash محتوى الملف (sha256) + إعدادات التطبيع (chord_tol، المسار OCC/ezdxf)
+- طبقتان: ذاكرة (LRU بميزانية بايت) + قرص (مصفوفات .npy ثنائية float64 في data/cache/dxf)
+  كل صف على القرص: x1, y1, x2, y2, cx, cy, r (الدائرة الأصلية أو NaN)
+- نفس الملف بأي اسم/مسار يُحلَّل مرة واحدة فقط
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from profile.segment_array import SegmentArray, BBox
+
+# 📂 مجلد الكاش على القرص
+CACHE_DIR = Path("data/cache/dxf")
+
+# ميزانيات الحجم (بايت)
+MEMORY_BUDGET = 256 * 1024 * 1024
+DISK_BUDGET = 1024 * 1024 * 1024
+
+# يتغير عند تغيير صيغة الملفات أو منطق التطبيع لإبطال الكاش القديم تلقائياً
+FORMAT_VERSION = 3
+
+
+def _nbytes(segs: SegmentArray) -> int:
+    return segs.data.nbytes + (0 if segs.circles is None else segs.circles.nbytes)
+
+
+def _freeze(segs: SegmentArray):
+    segs.data.flags.writeable = False
+    if segs.circles is not None:
+        segs.circles.flags.writeable = False
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """sha256 لمحتوى الملف (مقروء على دفعات)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DxfParseCache:
+    """كاش LRU بطبقتين (ذاكرة + قرص) لنتائج تحليل DXF."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR,
+                 memory_budget: int = MEMORY_BUDGET, disk_budget: int = DISK_BUDGET):
+        self.cache_dir = Path(cache_dir)
+        self.memory_budget = int(memory_budget)
+        self.disk_budget = int(disk_budget)
+        self.enabled = True
+
+        self._mem: "OrderedDict[str, SegmentArray]" = OrderedDict()
+        self._mem_bytes = 0
+        # (مسار، mtime، حجم) -> digest لتفادي إعادة قراءة الملف عند كل طلب
+        self._digests: dict = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------
+    # 🔑 المفاتيح
+    # ------------------------------------------------------------
+    def _digest(self, path: Path) -> str:
+        st = path.stat()
+        stamp = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._digests.get(stamp)
+        if digest is None:
+            digest = file_digest(path)
+            with self._lock:
+                self._digests[stamp] = digest
+        return digest
+
+    def make_key(self, path, settings: tuple) -> str:
+        """مفتاح = hash(المحتوى + الإعدادات + نسخة الصيغة)."""
+        h = hashlib.sha256(self._digest(Path(path)).encode())
+        h.update(repr((FORMAT_VERSION,) + tuple(settings)).encode())
+        return h.hexdigest()[:40]
+
+    # ------------------------------------------------------------
+    # 🧠 طبقة الذاكرة
+    # ------------------------------------------------------------
+    def _mem_get(self, key: str) -> Optional[SegmentArray]:
+        with self._lock:
+            segs = self._mem.get(key)
+            if segs is not None:
+                self._mem.move_to_end(key)
+            return segs
+
+    def _mem_put(self, key: str, segs: SegmentArray):
+        size = _nbytes(segs)
+        if size > self.memory_budget:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= _nbytes(old)
+            self._mem[key] = segs
+            self._mem_bytes += size
+            while self._mem_bytes > self.memory_budget and self._mem:
+                _, evicted = self._mem.popitem(last=False)
+                self._mem_bytes -= _nbytes(evicted)
+
+    # ------------------------------------------------------------
+    # 💽 طبقة القرص
+    # ------------------------------------------------------------
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npy"
+
+    def _disk_get(self, key: str) -> Optional[SegmentArray]:
+        p = self._disk_path(key)
+        if not p.exists():
+            return None
+        try:
+            rows = np.load(p, allow_pickle=False).reshape(-1, 7)
+            os.utime(p)  # تحديث وقت الوصول لترتيب LRU على القرص
+            segs = SegmentArray(rows[:, :4], rows[:, 4:])
+            _freeze(segs)
+            return segs
+        except Exception as e:
+            print(f"⚠️ [DxfCache] ملف كاش تالف، سيُحذف: {p.name} ({e})")
+            p.unlink(missing_ok=True)
+            return None
+
+    def _disk_put(self, key: str, segs: SegmentArray):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            p = self._disk_path(key)
+            tmp = p.with_name(f"{p.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                rows = np.concatenate([segs.data.reshape(-1, 4), segs.circles_or_nan()], axis=1)
+                np.save(f, rows, allow_pickle=False)
+            os.replace(tmp, p)  # كتابة ذرّية
+            self._evict_disk()
+        except Exception as e:
+            print(f"⚠️ [DxfCache] فشل حفظ الكاش على القرص: {e}")
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        for p in self.cache_dir.glob("*.npy"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total <= self.disk_budget:
+            return
+        files.sort()  # الأقدم استخداماً أولاً
+        for _, size, p in files:
+            if total <= self.disk_budget:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+
+    # ------------------------------------------------------------
+    # 🌐 الواجهة
+    # ------------------------------------------------------------
+    def get_or_load(self, path, settings: tuple,
+                    loader: Callable[[Path], Tuple[SegmentArray, BBox]]) -> Tuple[SegmentArray, BBox]:
+        """يُعيد النتيجة من الكاش أو يستدعي loader ويخزّن ناتجه."""
+        path = Path(path)
+        if not self.enabled:
+            return loader(path)
+
+        try:
+            key = self.make_key(path, settings)
+        except OSError:
+            return loader(path)
+
+        segs = self._mem_get(key)
+        if segs is None:
+            segs = self._disk_get(key)
+            if segs is not None:
+                self._mem_put(key, segs)
+        if segs is not None:
+            self.hits += 1
+            return segs, segs.bbox
+
+        self.misses += 1
+        segs, _ = loader(path)
+        # النتيجة مشتركة بين المستهلكين: للقراءة فقط
+        _freeze(segs)
+        self._mem_put(key, segs)
+        self._disk_put(key, segs)
+        return segs, segs.bbox
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+            self._digests.clear()
+        if disk and self.cache_dir.exists():
+            for p in self.cache_dir.glob("*.npy"):
+                p.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_items": len(self._mem),
+            "memory_bytes": self._mem_bytes,
+        }
+
+
+# كاش مشترك على مستوى البرنامج
+dxf_cache = DxfParseCache()
@@ -4,7 +4,7 @@ DXF normalizer (hybrid)
 - يحاول أولاً استخدام OCC/VTK (الدقّة الأعلى) لتفكيك جميع الكيانات إلى Edges ثم sampling -> segments
 - عند عدم توفر OCC/VTK، يستخدم ezdxf فقط مع تقسيم أقواس/دوائر/سبلاين إلى segments ناعمة
 - يُعيد: (segments, bbox)
-    segments: List[((x1,y1), (x2,y2))]
+    segments: List[((x1,y1), (x2,y2))]  أو SegmentArray عند as_array=True
     bbox: (xmin, ymin, xmax, ymax)
 """
 
@@ -13,19 +13,24 @@ from pathlib import Path
 from typing import List, Tuple
 import math
 
+import numpy as np
+
+from profile.segment_array import SegmentArray, BBox
+from profile.arc_tessellator import ArcBatch, DEFAULT_CHORD_TOL, bulge_to_arcs
+from profile.dxf_cache import dxf_cache
+
 # ----------------------------
 # محاولة استيراد OCC/VTK (اختيارية)
 # ----------------------------
 _HAS_OCC = True
 try:
     from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeEdge
-    from OCC.Core.BRep import BRep_Builder, BRep_Tool
-    from OCC.Core.TopoDS import TopoDS_Compound
-    from OCC.Core.TopExp import TopExp_Explorer
-    from OCC.Core.TopAbs import TopAbs_EDGE
     from OCC.Core.gp import gp_Pnt, gp_Dir, gp_Ax2, gp_Circ
     from OCC.Core.GeomAPI import GeomAPI_PointsToBSpline
     from OCC.Core.TColgp import TColgp_Array1OfPnt
+    from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
+    from OCC.Core.GCPnts import GCPnts_QuasiUniformDeflection
+    from OCC.Core.GeomAbs import GeomAbs_Line, GeomAbs_Circle
 except Exception:
     _HAS_OCC = False
 
@@ -38,31 +43,31 @@ except Exception as e:
 Point = Tuple[float, float]
 Segment = Tuple[Point, Point]
 
+# مقطع ليس جزءاً من دائرة/قوس
+_NO_CIRCLE = (np.nan, np.nan, np.nan)
+
 
 # ==============================================================
 #                    Fallback: ezdxf فقط
 # ==============================================================
-def _segments_by_ezdxf(path: Path) -> Tuple[List[Segment], Tuple[float,float,float,float]]:
+def _segments_by_ezdxf(path: Path, chord_tol: float = DEFAULT_CHORD_TOL) -> Tuple[SegmentArray, BBox]:
     doc = ezdxf.readfile(str(path))
     msp = doc.modelspace()
 
-    segs: List[Segment] = []
-    xmin = ymin = float("inf")
-    xmax = ymax = float("-inf")
+    # إحداثيات مسطّحة [x1, y1, x2, y2, ...] تتحول لمصفوفة واحدة في النهاية
+    coords: List[float] = []
 
     def add_seg(x1, y1, x2, y2):
-        nonlocal xmin, ymin, xmax, ymax
-        segs.append(((float(x1), float(y1)), (float(x2), float(y2))))
-        xmin = min(xmin, x1, x2)
-        ymin = min(ymin, y1, y2)
-        xmax = max(xmax, x1, x2)
-        ymax = max(ymax, y1, y2)
+        coords.extend((x1, y1, x2, y2))
 
     # --- LINE
     for e in msp.query("LINE"):
         s, t = e.dxf.start, e.dxf.end
         add_seg(s[0], s[1], t[0], t[1])
 
+    # الأقواس/الدوائر/bulge تُجمع هنا ثم تُقسّم كلها دفعة واحدة
+    arcs = ArcBatch()
+
     # --- LWPOLYLINE (مع bulge)
     for poly in msp.query("LWPOLYLINE"):
         pts = poly.get_points("xyb")  # (x,y,bulge)
@@ -76,85 +81,72 @@ def _segments_by_ezdxf(path: Path) -> Tuple[List[Segment], Tuple[float,float,flo
             if abs(bulge) < 1e-9:
                 add_seg(x1, y1, x2, y2)
             else:
-                # تحويل bulge إلى قوس
-                ang = 4.0 * math.atan(bulge)  # الزاوية الممركزة
-                # اتجاه الحبل
-                dx, dy = (x2 - x1), (y2 - y1)
-                chord = math.hypot(dx, dy)
-                if chord < 1e-12:
-                    continue
-                # نصف قطر القوس
-                radius = chord / (2.0 * math.sin(ang / 2.0))
-                # مركز القوس
-                # زاوية اتجاه الحبل:
-                theta = math.atan2(dy, dx)
-                # المسافة من منتصف الحبل لمركز القوس:
-                sagitta_dir = theta + (math.pi/2.0 - ang/2.0)
-                mx, my = (x1 + x2) * 0.5, (y1 + y2) * 0.5
-                cx = mx - radius * math.sin(theta) * (1 if bulge > 0 else -1)
-                cy = my + radius * math.cos(theta) * (1 if bulge > 0 else -1)
-
-                # زوايا البداية والنهاية بالنسبة للمركز
-                a_start = math.atan2(y1 - cy, x1 - cx)
-                # الانحراف a_start->a_start+ang
-                steps = max(16, int(abs(ang) / (math.pi/36)))  # ~5° خطوة
-                for j in range(steps):
-                    t1 = a_start + ang * (j / steps)
-                    t2 = a_start + ang * ((j + 1) / steps)
-                    add_seg(cx + radius * math.cos(t1), cy + radius * math.sin(t1),
-                            cx + radius * math.cos(t2), cy + radius * math.sin(t2))
+                arcs.add_bulge(x1, y1, x2, y2, bulge)
 
     # --- CIRCLE
     for circ in msp.query("CIRCLE"):
-        cx, cy = circ.dxf.center.x, circ.dxf.center.y
-        r = circ.dxf.radius
-        steps = max(48, int(2 * math.pi * r / 2.0))  # خطوة ~2 وحدات
-        steps = min(256, steps)
-        for i in range(steps):
-            a1 = 2 * math.pi * i / steps
-            a2 = 2 * math.pi * (i + 1) / steps
-            add_seg(cx + r * math.cos(a1), cy + r * math.sin(a1),
-                    cx + r * math.cos(a2), cy + r * math.sin(a2))
+        arcs.add_circle(circ.dxf.center.x, circ.dxf.center.y, circ.dxf.radius)
 
     # --- ARC
     for arc in msp.query("ARC"):
-        cx, cy = arc.dxf.center.x, arc.dxf.center.y
-        r = arc.dxf.radius
-        a0 = math.radians(arc.dxf.start_angle)
-        a1 = math.radians(arc.dxf.end_angle)
-        span = a1 - a0
-        # ط normalise
-        if span == 0:
-            span = 2 * math.pi
-        steps = max(24, int(abs(span) / (math.pi/36)))  # ~5°
-        for i in range(steps):
-            t1 = a0 + span * (i / steps)
-            t2 = a0 + span * ((i + 1) / steps)
-            add_seg(cx + r * math.cos(t1), cy + r * math.sin(t1),
-                    cx + r * math.cos(t2), cy + r * math.sin(t2))
+        arcs.add_dxf_arc(arc.dxf.center.x, arc.dxf.center.y, arc.dxf.radius,
+                         arc.dxf.start_angle, arc.dxf.end_angle)
 
     # --- SPLINE (fit_points)
     for sp in msp.query("SPLINE"):
         fit = list(sp.fit_points)
         if len(fit) >= 2:
-            # تقسيم ناعم بين نقاط الملائمة
-            steps = max(32, len(fit) * 8)
             # تقريب بخطوط بين النقاط المتتالية
             for i in range(len(fit) - 1):
                 x1, y1 = fit[i][0], fit[i][1]
                 x2, y2 = fit[i+1][0], fit[i+1][1]
                 add_seg(x1, y1, x2, y2)
 
-    if not segs:
+    arc_segs, arc_circles = arcs.tessellate(chord_tol, return_circles=True)
+    if not coords and not len(arc_segs):
         raise RuntimeError("لم يتم العثور على هندسة صالحة في DXF (ezdxf).")
 
-    return segs, (xmin, ymin, xmax, ymax)
+    line_segs = np.asarray(coords, dtype=np.float64).reshape(-1, 2, 2)
+    # الخطوط بلا دائرة (NaN)، ومقاطع الأقواس تحمل دائرتها الأصلية
+    circles = np.concatenate([np.full((len(line_segs), 3), np.nan), arc_circles])
+    segs = SegmentArray(np.concatenate([line_segs, arc_segs]), circles)
+    return segs, segs.bbox
 
 
 # ==============================================================
 #                OCC/VTK -> Segments (إذا متوفر)
 # ==============================================================
-def _segments_by_occ(path: Path) -> Tuple[List[Segment], Tuple[float,float,float,float]]:
+def _sample_edge(edge, deflection: float):
+    """
+    تقسيم Edge حسب انحراف الوتر (deflection) بدل عدد عينات ثابت.
+    - الخط المستقيم: نقطتان فقط
+    - المنحنيات: GCPnts_QuasiUniformDeflection بالسماحية المطلوبة
+    يُعيد (نقاط (k, 2)، الدائرة (cx, cy, r) أو NaN لغير الدوائر).
+    """
+    curve = BRepAdaptor_Curve(edge)
+    first, last = curve.FirstParameter(), curve.LastParameter()
+    kind = curve.GetType()
+
+    if kind == GeomAbs_Line:
+        p1, p2 = curve.Value(first), curve.Value(last)
+        return np.array([[p1.X(), p1.Y()], [p2.X(), p2.Y()]], dtype=np.float64), _NO_CIRCLE
+
+    circle = _NO_CIRCLE
+    if kind == GeomAbs_Circle:
+        c = curve.Circle()
+        loc = c.Location()
+        circle = (loc.X(), loc.Y(), c.Radius())
+
+    disc = GCPnts_QuasiUniformDeflection(curve, deflection, first, last)
+    if disc.IsDone() and disc.NbPoints() >= 2:
+        pts = [disc.Value(i) for i in range(1, disc.NbPoints() + 1)]
+    else:
+        # احتياط نادر: تقسيم منتظم بسيط
+        pts = [curve.Value(first + (last - first) * i / 32.0) for i in range(33)]
+    return np.array([(p.X(), p.Y()) for p in pts], dtype=np.float64), circle
+
+
+def _segments_by_occ(path: Path, deflection: float = DEFAULT_CHORD_TOL) -> Tuple[SegmentArray, BBox]:
     if not _HAS_OCC:
         raise RuntimeError("OCC غير متوفر، سيُستخدم مسار ezdxf فقط.")
 
@@ -168,8 +160,7 @@ def _segments_by_occ(path: Path) -> Tuple[List[Segment], Tuple[float,float,float
         s, e = line.dxf.start, line.dxf.end
         edges.append(BRepBuilderAPI_MakeEdge(gp_Pnt(s[0], s[1], 0), gp_Pnt(e[0], e[1], 0)).Edge())
 
-    # LWPOLYLINE (نحوّل كل مقطع لخط، ونترك الأقواس كخطوات صغيرة ezdxf سبق عالجناها أفضل؛
-    # هنا نضيف فقط الخطوط المباشرة)
+    # LWPOLYLINE (الخطوط مباشرة، ومقاطع bulge تتحول لأقواس دائرية حقيقية)
     for poly in msp.query("LWPOLYLINE"):
         pts = poly.get_points("xyb")
         n = len(pts)
@@ -181,6 +172,11 @@ def _segments_by_occ(path: Path) -> Tuple[List[Segment], Tuple[float,float,float
             x2, y2, _ = pts[(i + 1) % n]
             if abs(b) < 1e-9:
                 edges.append(BRepBuilderAPI_MakeEdge(gp_Pnt(x1, y1, 0), gp_Pnt(x2, y2, 0)).Edge())
+            elif math.hypot(x2 - x1, y2 - y1) > 1e-12:
+                cx, cy, r, a0, span = (float(v) for v in bulge_to_arcs(x1, y1, x2, y2, b))
+                circle = gp_Circ(gp_Ax2(gp_Pnt(cx, cy, 0), gp_Dir(0, 0, 1)), r)
+                u0, u1 = (a0, a0 + span) if span > 0 else (a0 + span, a0)
+                edges.append(BRepBuilderAPI_MakeEdge(circle, u0, u1).Edge())
     # CIRCLE
     for circ in msp.query("CIRCLE"):
         c = circ.dxf.center
@@ -211,77 +207,83 @@ def _segments_by_occ(path: Path) -> Tuple[List[Segment], Tuple[float,float,float
             edges.append(BRepBuilderAPI_MakeEdge(bspline).Edge())
 
     if not edges:
-        # لو الملف كله arcs داخل LWPOLYLINE ب bulge، الأفضل نرجع لمسار ezdxf
-        return _segments_by_ezdxf(path)
-
-    # Compound
-    builder = BRep_Builder()
-    comp = TopoDS_Compound()
-    builder.MakeCompound(comp)
-    for e in edges:
-        builder.Add(comp, e)
-
-    # Sampling لكل edge -> segments
-    segs: List[Segment] = []
-    xmin = ymin = float("inf")
-    xmax = ymax = float("-inf")
-
-    exp = TopExp_Explorer(comp, TopAbs_EDGE)
-    while exp.More():
-        edge = exp.Current()
-        curve, first, last = BRep_Tool.Curve(edge)
-        if curve is not None:
-            # عدد العينات مناسب (تكيفي)
-            samples = 40
-            prev = None
-            for i in range(samples + 1):
-                u = first + (last - first) * (i / samples)
-                pnt = curve.Value(u)
-                x, y = float(pnt.X()), float(pnt.Y())
-                if prev is not None:
-                    x0, y0 = prev
-                    segs.append(((x0, y0), (x, y)))
-                    xmin = min(xmin, x0, x)
-                    ymin = min(ymin, y0, y)
-                    xmax = max(xmax, x0, x)
-                    ymax = max(ymax, y0, y)
-                prev = (x, y)
-        exp.Next()
-
-    if not segs:
+        # ملف بدون كيانات يدعمها OCC — نرجع لمسار ezdxf
+        return _segments_by_ezdxf(path, deflection)
+
+    # Sampling تكيفي لكل edge -> segments
+    chunks: List[np.ndarray] = []
+    circles: List[np.ndarray] = []
+
+    skipped = 0
+    for i, edge in enumerate(edges):
+        try:
+            pts, circle = _sample_edge(edge, deflection)
+            if len(pts) >= 2:
+                chunks.append(np.stack([pts[:-1], pts[1:]], axis=1))
+                circles.append(np.tile(circle, (len(pts) - 1, 1)))
+        except Exception as e:
+            skipped += 1
+            print(f"⚠️ [DXFNormalizer] تم تجاوز Edge رقم {i} (فشل التقسيم): {e}")
+    if skipped:
+        print(f"⚠️ [DXFNormalizer] {skipped}/{len(edges)} Edges متجاوزة في {Path(path).name}")
+
+    if not chunks:
         # fallback أخير
-        return _segments_by_ezdxf(path)
+        return _segments_by_ezdxf(path, deflection)
 
-    return segs, (xmin, ymin, xmax, ymax)
+    segs = SegmentArray(np.concatenate(chunks), np.concatenate(circles))
+    return segs, segs.bbox
 
 
 # ==============================================================
 #                    الواجهة العامة
 # ==============================================================
-def load_dxf_segments(path: Path) -> Tuple[List[Segment], Tuple[float,float,float,float]]:
-    """واجهة واحدة للمشروع: تُعيد segments + bbox بدقّة عالية، مع fallback تلقائي."""
+def _load_segment_array(path: Path, chord_tol: float = DEFAULT_CHORD_TOL) -> Tuple[SegmentArray, BBox]:
     try:
         if _HAS_OCC:
-            return _segments_by_occ(path)
+            return _segments_by_occ(path, chord_tol)
         else:
-            return _segments_by_ezdxf(path)
+            return _segments_by_ezdxf(path, chord_tol)
     except Exception as e:
         # كحل أخير جرّب ezdxf فقط
         try:
-            return _segments_by_ezdxf(path)
+            return _segments_by_ezdxf(path, chord_tol)
         except Exception as e2:
             raise RuntimeError(f"فشل تفكيك DXF: {e}\nFallback error: {e2}")
 
 
+def load_dxf_segments(path: Path, as_array: bool = False, chord_tol: float = DEFAULT_CHORD_TOL,
+                      use_cache: bool = True):
+    """
+    واجهة واحدة للمشروع: تُعيد segments + bbox بدقّة عالية، مع fallback تلقائي.
+    - as_array=False: قائمة tuples ((x1,y1),(x2,y2)) كما في السابق
+    - as_array=True : SegmentArray (مصفوفة (N,2,2) float64) بدون أي نسخ إضافي
+    - chord_tol: أقصى خطأ وتر (mm) عند تقسيم الأقواس والدوائر
+      (نفس القيمة تُستخدم كـ deflection في مسار OCC؛ الخطوط تبقى مقطعاً واحداً)
+    - use_cache: استخدام كاش المحتوى (نفس الملف لا يُحلَّل مرتين)
+      المصفوفة المُعادة من الكاش مشتركة وللقراءة فقط.
+    """
+    if use_cache:
+        settings = (float(chord_tol), "occ" if _HAS_OCC else "ezdxf")
+        segs, bbox = dxf_cache.get_or_load(path, settings,
+                                           lambda p: _load_segment_array(p, chord_tol))
+    else:
+        segs, bbox = _load_segment_array(path, chord_tol)
+    if as_array:
+        return segs, bbox
+    return segs.to_list(), bbox
+
+
 
 
 # --------------------------------------------------------------
 # 🧱 بناء وجه هندسي من المقاطع (نسخة آمنة ضد NULL)
 # --------------------------------------------------------------
-from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeWire, BRepBuilderAPI_MakeEdge, BRepBuilderAPI_MakeFace
-from OCC.Core.BRepCheck import BRepCheck_Analyzer
-from OCC.Core.gp import gp_Pnt
-from OCC.Core.TopoDS import TopoDS_Shape
+if _HAS_OCC:
+    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeWire, BRepBuilderAPI_MakeEdge, BRepBuilderAPI_MakeFace
+    from OCC.Core.BRepCheck import BRepCheck_Analyzer
+    from OCC.Core.gp import gp_Pnt
+    from OCC.Core.TopoDS import TopoDS_Shape
 
 def build_face_from_segments(segments):
     """
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+📐 غلاف البروفايل (envelope) — أرقام قابلة للبحث تُخزَّن مع كل سجل
+- width / height: من bbox مقاطع DXF
+- area: مساحة المادة = الحدود الخارجية ناقص الثقوب/الحجرات
+- wall: سماكة الجدار التقريبية = 2 × المساحة ÷ المحيط الكلي
+  (دقيقة لجدار رفيع منتظم: مساحة الشريط ≈ السماكة × متوسط محيطَي جانبيه)
+"""
+
+from __future__ import annotations
+from typing import Dict, Optional
+
+import numpy as np
+
+from profile.segment_array import as_segment_array
+from tools.endpoint_welder import weld_endpoints
+from tools.loop_nesting import classify_loops
+from tools.planar_faces import PlanarGraph, extract_loops, signed_area
+
+ENVELOPE_KEYS = ("width", "height", "wall", "area")
+
+
+def _perimeter(loop: np.ndarray) -> float:
+    return float(np.hypot(*(np.roll(loop, -1, axis=0) - loop).T).sum())
+
+
+def profile_envelope(segments, bbox=None, tolerance: float = 0.01) -> Dict[str, Optional[float]]:
+    """
+    {"width", "height", "wall", "area"} لمقاطع بروفايل.
+    wall و area تكون None إن لم توجد حلقات مغلقة (رسم مفتوح).
+    """
+    segs = as_segment_array(segments)
+    xmin, ymin, xmax, ymax = bbox if bbox is not None else segs.bbox
+    env: Dict[str, Optional[float]] = {"width": float(xmax - xmin), "height": float(ymax - ymin),
+                                       "wall": None, "area": None}
+    if not len(segs):
+        return env
+
+    vertices, ids, _ = weld_endpoints(segs.points, tolerance)
+    graph = PlanarGraph.from_segments(segs, vertex_ids=ids, vertices=vertices)
+    loops = extract_loops(segs, graph=graph)
+    if not loops:
+        return env
+
+    area = perimeter = 0.0
+    for outer, holes in classify_loops(loops):
+        area += abs(signed_area(loops[outer])) - sum(abs(signed_area(loops[h])) for h in holes)
+        perimeter += _perimeter(loops[outer]) + sum(_perimeter(loops[h]) for h in holes)
+    env["area"] = area
+    if perimeter > 0:
+        env["wall"] = 2.0 * area / perimeter
+    return env
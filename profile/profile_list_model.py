@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+📚 نموذج قائمة البروفايلات (Model/View) لكتالوجات كبيرة
+- ProfileListModel: صفحات من SQLite عبر canFetchMore/fetchMore (لا تحميل لكل الصفوف دفعة واحدة)
+- ThumbnailLoader: فك ضغط PNG المصغّرات على QThreadPool بحجم العرض مباشرة (QImageReader.setScaledSize)
+  ثم تخزينها في QPixmapCache (LRU) على خيط الواجهة
+- العرض يطلب DecorationRole للصفوف الظاهرة فقط، فلا يُفك إلا ما يظهر على الشاشة
+QPixmap غير آمن خارج خيط الواجهة، لذلك العمال ينتجون QImage فقط.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from PySide6.QtCore import (
+    QAbstractListModel, QModelIndex, QObject, QRunnable, QSize, QThreadPool, Qt, Signal
+)
+from PySide6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache
+
+from profile import profiles_db
+from profile.envelope import ENVELOPE_KEYS
+from profile.thumbnailer import best_variant
+
+# دور البيانات الذي يحمل dict البروفايل كاملاً
+ProfileRole = Qt.UserRole
+# حجم ذاكرة QPixmapCache (KB) — تكفي آلاف الأيقونات الصغيرة + عدة معاينات كبيرة
+PIXMAP_CACHE_KB = 64 * 1024
+
+
+def row_to_profile(row) -> dict:
+    """صف القاعدة (أعمدة profiles_db.COLUMNS) -> dict؛ image = thumb_path."""
+    p = {k: ("" if v is None and k not in ENVELOPE_KEYS else v)
+         for k, v in zip(profiles_db.COLUMNS, row)}
+    p["image"] = p.pop("thumb_path")
+    return p
+
+
+# -----------------------------------------------------------
+# 🖼️ فك المصغّرات في الخلفية
+# -----------------------------------------------------------
+class _DecodeSignals(QObject):
+    decoded = Signal(str, str, QImage)   # (مفتاح الكاش، المسار، الصورة)
+
+
+class _DecodeTask(QRunnable):
+    """فك صورة واحدة بحجم الهدف (بدون تحميل الدقة الكاملة ثم التصغير)."""
+
+    def __init__(self, key: str, path: str, size: QSize, signals: _DecodeSignals):
+        super().__init__()
+        self.key = key
+        self.path = path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        # أصغر نسخة محفوظة تكفي الحجم المطلوب (64 للأيقونات بدل 280)
+        reader = QImageReader(best_variant(self.path, max(self.size.width(), self.size.height())))
+        src = reader.size()
+        if src.isValid():
+            reader.setScaledSize(src.scaled(self.size, Qt.KeepAspectRatio))
+        img = reader.read()
+        # صورة فارغة = فشل (تُخزَّن أيضاً حتى لا يُعاد المحاولة مع كل رسم)
+        self.signals.decoded.emit(self.key, self.path, img)
+
+
+class ThumbnailLoader(QObject):
+    """
+    request(path, size) -> QPixmap من الكاش فوراً، أو None مع جدولة فكّها في الخلفية
+    ثم إرسال ready(path) عند الجاهزية، أو failed(path) إن تعذر فكّها.
+    """
+    ready = Signal(str)
+    failed = Signal(str)
+
+    def __init__(self, max_threads: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        if QPixmapCache.cacheLimit() < PIXMAP_CACHE_KB:
+            QPixmapCache.setCacheLimit(PIXMAP_CACHE_KB)
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._signals = _DecodeSignals()
+        self._signals.decoded.connect(self._on_decoded)
+        self._pending: Set[str] = set()
+        self._failed: Set[str] = set()
+
+    @staticmethod
+    def _key(path: str, size: QSize) -> str:
+        return f"thumb:{size.width()}x{size.height()}:{path}"
+
+    def request(self, path: str, size: QSize) -> Optional[QPixmap]:
+        if not path:
+            return None
+        key = self._key(path, size)
+        pix = QPixmapCache.find(key)
+        if pix is not None and not pix.isNull():
+            return pix
+        if key in self._pending or key in self._failed:
+            return None
+        if not Path(path).is_file():
+            self._failed.add(key)
+            return None
+        self._pending.add(key)
+        self.pool.start(_DecodeTask(key, path, size, self._signals))
+        return None
+
+    def is_failed(self, path: str, size: QSize) -> bool:
+        """المسار غير موجود أو فشل فكّه بهذا الحجم (لن يصل ready له)."""
+        return self._key(path, size) in self._failed
+
+    def cancel_pending(self):
+        """إلغاء ما لم يبدأ بعد (صفوف خرجت من الشاشة)؛ الظاهرة ستُطلب مجدداً عند الرسم."""
+        self.pool.clear()
+        self._pending.clear()
+
+    def _on_decoded(self, key: str, path: str, img: QImage):
+        self._pending.discard(key)
+        if img.isNull():
+            self._failed.add(key)
+            print(f"⚠️ [Thumb] تعذر فك المصغّرة: {path}")
+            self.failed.emit(path)
+            return
+        QPixmapCache.insert(key, QPixmap.fromImage(img))
+        self.ready.emit(path)
+
+
+# -----------------------------------------------------------
+# 📋 النموذج
+# -----------------------------------------------------------
+class ProfileListModel(QAbstractListModel):
+    """صفوف نتيجة البحث الحالية، تُجلب من القاعدة صفحةً صفحة حسب التمرير."""
+
+    def __init__(self, loader: Optional[ThumbnailLoader] = None, icon_size: QSize = QSize(32, 32),
+                 page_size: int = profiles_db.PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.loader = loader or ThumbnailLoader(parent=self)
+        self.loader.ready.connect(self._on_thumb_ready)
+        self.icon_size = icon_size
+        self.page_size = page_size
+        self._query = ""
+        self._rows: List[dict] = []
+        self._by_image: Dict[str, List[int]] = {}
+        self._exhausted = False
+
+    # ---------- البحث ----------
+    def set_query(self, text: str):
+        """نتيجة بحث جديدة: تفريغ الصفوف ثم جلب الصفحة الأولى فقط."""
+        self.beginResetModel()
+        self._query = text or ""
+        self._rows = []
+        self._by_image = {}
+        self._exhausted = False
+        self.endResetModel()
+        self.loader.cancel_pending()
+        self.fetchMore(QModelIndex())
+
+    def refresh(self):
+        self.set_query(self._query)
+
+    @property
+    def query(self) -> str:
+        return self._query
+
+    def profile(self, row: int) -> Optional[dict]:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    # ---------- الجلب التدريجي ----------
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        rows = profiles_db.search_profiles(self._query, limit=self.page_size, offset=len(self._rows))
+        self._exhausted = len(rows) < self.page_size
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for i, r in enumerate(rows, start=first):
+            p = row_to_profile(r)
+            self._rows.append(p)
+            if p["image"]:
+                self._by_image.setdefault(p["image"], []).append(i)
+        self.endInsertRows()
+
+    # ---------- واجهة النموذج ----------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        p = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return p["name"]
+        if role == Qt.DecorationRole:
+            # يُستدعى للصفوف الظاهرة فقط؛ غير الجاهز يُفك في الخلفية
+            return self.loader.request(p["image"], self.icon_size)
+        if role == Qt.ToolTipRole:
+            return " | ".join(x for x in (p["code"], p["company"], p["size"]) if x)
+        if role == ProfileRole:
+            return p
+        return None
+
+    def _on_thumb_ready(self, path: str):
+        for row in self._by_image.get(path, ()):
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [Qt.DecorationRole])
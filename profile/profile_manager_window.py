@@ -1,20 +1,32 @@
 # -*- coding: utf-8 -*-
 from pathlib import Path
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem,
+    QWidget, QVBoxLayout, QHBoxLayout, QListView, QAbstractItemView,
     QLabel, QLineEdit, QFrame, QSizePolicy, QSpacerItem, QPushButton
 )
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt, QSize, QTimer
 from PySide6.QtGui import QPixmap
 from frontend.base.base_tool_window import BaseToolWindow
 from profile.face_selector import FaceSelector
+from profile.profile_list_model import ProfileListModel, ProfileRole, ThumbnailLoader
+
+# مهلة توقف الكتابة قبل تنفيذ البحث (ms)
+SEARCH_DELAY_MS = 150
+# حجم أيقونة القائمة وحجم المعاينة الكبيرة
+ICON_SIZE = QSize(32, 32)
+PREVIEW_SIZE = QSize(260, 180)
 
 
 class ProfileManagerWindow(BaseToolWindow):
     def __init__(self, parent=None):
         super().__init__(title="Profile Manager", parent=parent)
-        self._profiles = []
         self._current = None
+        self._thumbs = ThumbnailLoader(parent=self)
+        # المعاينة بمحمّل مستقل حتى لا يلغيها التمرير (الكاش QPixmapCache مشترك)
+        self._previews = ThumbnailLoader(max_threads=1, parent=self)
+        self._previews.ready.connect(self._on_thumb_ready)
+        self._previews.failed.connect(self._on_thumb_ready)
+        self.model = ProfileListModel(self._thumbs, icon_size=ICON_SIZE, parent=self)
         self._build_ui()
         self._load_profiles_from_db()
 
@@ -32,7 +44,12 @@ class ProfileManagerWindow(BaseToolWindow):
 
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("🔍 Search profiles...")
+        self.search_box.setToolTip('مثال: "40x40 from Alumil" أو "40x20x2" أو كلمات من الاسم/الكود/الوصف')
         self.search_box.textChanged.connect(self._apply_filter)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._load_profiles_from_db)
         self.search_box.setStyleSheet("""
             QLineEdit {
                 background: #fff;
@@ -44,10 +61,17 @@ class ProfileManagerWindow(BaseToolWindow):
             QLineEdit:focus { border-color: #999; }
         """)
 
-        self.list_widget = QListWidget()
-        self.list_widget.itemSelectionChanged.connect(self._on_select_item)
-        self.list_widget.setStyleSheet("""
-            QListWidget {
+        # القائمة: صفوف بارتفاع موحد (تخطيط فوري لآلاف الصفوف) + جلب تدريجي من النموذج
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setIconSize(ICON_SIZE)
+        self.list_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.list_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.list_view.selectionModel().currentChanged.connect(self._on_select_item)
+        self.list_view.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.list_view.setStyleSheet("""
+            QListView {
                 background: #fff;
                 border: 1px solid #C8C9C8;
                 border-radius: 3px;
@@ -55,15 +79,15 @@ class ProfileManagerWindow(BaseToolWindow):
                 font-family: "Roboto";
                 font-size: 12.5px;
             }
-            QListWidget::item { padding: 6px 8px; }
-            QListWidget::item:selected {
+            QListView::item { padding: 6px 8px; }
+            QListView::item:selected {
                 background-color: #E67E22;
                 color: white;
                 border-radius: 3px;
             }
         """)
         left_layout.addWidget(self.search_box)
-        left_layout.addWidget(self.list_widget, 1)
+        left_layout.addWidget(self.list_view, 1)
 
         # ---------- القسم الأيمن ----------
         right_panel = QFrame()
@@ -214,48 +238,24 @@ class ProfileManagerWindow(BaseToolWindow):
 
     # ------------------------------------------------------------------
     def _load_profiles_from_db(self):
-        """تحميل البيانات الفعلية من قاعدة SQLite"""
-        from profile import profiles_db
-        rows = profiles_db.get_all_profiles()
-
-        self._profiles = []
-        for r in rows:
-            self._profiles.append({
-                "id": r[0],
-                "name": r[1],
-                "code": r[2],
-                "company": r[3],
-                "size": r[4],
-                "file_path": r[5],
-                "image": r[6],  # thumb_path
-                "source": r[7],
-                "date_added": r[8],
-            })
-        self._populate_list(self._profiles)
-
-    def _populate_list(self, items):
-        self.list_widget.clear()
-        for p in items:
-            it = QListWidgetItem(p["name"])
-            it.setData(Qt.UserRole, p)
-            self.list_widget.addItem(it)
-        if self.list_widget.count() > 0:
-            self.list_widget.setCurrentRow(0)
+        """تحميل الصفحة الأولى من قاعدة SQLite (البقية يجلبها النموذج عند التمرير)"""
+        self.model.set_query(self.search_box.text())
+        if self.model.rowCount() > 0:
+            self.list_view.setCurrentIndex(self.model.index(0))
+        else:
+            self._on_select_item()
+
+    def _on_scroll(self, _value):
+        # صفوف خرجت من الشاشة لا تستحق الفك؛ الظاهرة تُطلب مجدداً عند إعادة الرسم
+        self._thumbs.cancel_pending()
 
     def _apply_filter(self, text):
-        t = (text or "").lower().strip()
-        if not t:
-            self._populate_list(self._profiles)
-            return
-        f = [p for p in self._profiles if any(t in p[k].lower() for k in ("name","size","company","desc"))]
-        self._populate_list(f)
+        # البحث يُنفَّذ في القاعدة بعد توقف الكتابة لحظة (لا استعلام مع كل ضغطة)
+        self._search_timer.start()
 
-    def _on_select_item(self):
-        items = self.list_widget.selectedItems()
-        if not items:
-            self._show_details(None)
-            return
-        self._current = items[0].data(Qt.UserRole)
+    def _on_select_item(self, *_):
+        idx = self.list_view.currentIndex()
+        self._current = idx.data(ProfileRole) if idx.isValid() else None
         self._show_details(self._current)
 
     def _show_details(self, p: dict | None):
@@ -269,26 +269,31 @@ class ProfileManagerWindow(BaseToolWindow):
             self.desc_val.setText("-")
             return
 
-        self.name_val.setText(p.get("name", "-"))
-        self.size_val.setText(p.get("size", "-"))
-        self.company_val.setText(p.get("company", "-"))
-        self.desc_val.setText(p.get("desc", "-"))
-
-        # 🖼️ تحميل الصورة من الحقل الصحيح في القاعدة (image = thumb_path)
-        thumb = Path(p.get("image", ""))  # ✅ بدل thumb_path إلى image
-        if thumb.exists():
-            print(f"🖼️ [ProfileManager] تحميل الصورة من: {thumb}")
-            pix = QPixmap(str(thumb)).scaled(
-                QSize(260, 180),
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
+        self.name_val.setText(p.get("name") or "-")
+        size = p.get("size") or "-"
+        if p.get("width") is not None:
+            size += f"   ({p['width']:g} × {p['height']:g}"
+            size += f", t≈{p['wall']:.2f})" if p.get("wall") is not None else ")"
+        self.size_val.setText(size)
+        self.company_val.setText(p.get("company") or "-")
+        self.desc_val.setText(p.get("desc") or "-")
+
+        # 🖼️ المعاينة تُفك في الخلفية (image = thumb_path)؛ _on_thumb_ready يعرضها عند الجاهزية
+        self._show_preview(p.get("image", ""))
+
+    def _show_preview(self, path: str):
+        pix = self._previews.request(path, PREVIEW_SIZE)
+        if pix is not None:
             self.preview_label.setPixmap(pix)
             self.preview_label.setText("")
         else:
-            print(f"⚠️ [ProfileManager] لا توجد صورة مصغّرة عند المسار: {thumb}")
             self.preview_label.setPixmap(QPixmap())
-            self.preview_label.setText("No Image")
+            loading = path and Path(path).is_file() and not self._previews.is_failed(path, PREVIEW_SIZE)
+            self.preview_label.setText("Loading..." if loading else "No Image")
+
+    def _on_thumb_ready(self, path: str):
+        if self._current and self._current.get("image") == path:
+            self._show_preview(path)
 
     def _on_ok_clicked(self):
         """إرسال مسار ملف البروفايل للعارض بدون أي معالجة DXF هنا"""
@@ -5,6 +5,7 @@ from PySide6.QtCore import Qt, QSize, Signal
 
 from profile.profile_manager_window import ProfileManagerWindow
 from profile.add_profile_window import AddProfileWindow
+from profile.bulk_import_window import BulkImportWindow
 
 
 class ProfileToolsPanel(QWidget):
@@ -22,6 +23,7 @@ class ProfileToolsPanel(QWidget):
         profile_tools = [
             ("select.png", "تحديد بروفايل", "select"),
             ("add_profile.png", "إضافة بروفايل", "add_profile"),
+            ("import_folder.png", "استيراد مجلد بروفايلات", "import_folder"),
             ("edit_profile.png", "تعديل بروفايل", "edit_profile"),
             ("library.png", "مكتبة البروفايلات", "library"),  # ← فتح النافذة
         ]
@@ -128,6 +130,10 @@ class ProfileToolsPanel(QWidget):
         if tool_name == "add_profile":
             self.open_add_profile_window()
 
+        # 📦 استيراد مجلد مورّد كامل
+        if tool_name == "import_folder":
+            self.open_bulk_import_window()
+
         if self.vtk_viewer:
             self.vtk_viewer.set_active_tool(self.active_tool)
 
@@ -156,3 +162,21 @@ class ProfileToolsPanel(QWidget):
             print("🟢 [UI] تم فتح نافذة الإضافة بنجاح.")
         except Exception as e:
             print("🔥 [Error] فشل في فتح نافذة الإضافة:", e)
+
+    def open_bulk_import_window(self):
+        """فتح نافذة الاستيراد الجماعي لمجلد DXF"""
+        print("📂 فتح نافذة الاستيراد الجماعي...")
+        try:
+            self.import_window = BulkImportWindow(parent=self)
+            self.import_window.imported.connect(self._on_profiles_imported)
+            self.import_window.show()
+            print("🟢 [UI] تم فتح نافذة الاستيراد بنجاح.")
+        except Exception as e:
+            print("🔥 [Error] فشل في فتح نافذة الاستيراد:", e)
+
+    def _on_profiles_imported(self, count: int):
+        # تحديث المكتبة المفتوحة لتظهر البروفايلات الجديدة
+        # (دائماً: عند الإلغاء/الفشل تكون الدفعات المكتملة محفوظة وعددها غير معروف هنا)
+        window = getattr(self, "profile_window", None)
+        if window is not None and window.isVisible():
+            window.model.refresh()
@@ -1,26 +1,49 @@
 # -*- coding: utf-8 -*-
 """
 📦 Profile Database Manager (SQLite)
-يدير قاعدة بيانات البروفايلات:
-- إنشاء قاعدة البيانات عند أول تشغيل
-- إضافة / قراءة البروفايلات
+طبقة الوصول لقاعدة بيانات البروفايلات:
+- اتصال واحد طويل العمر لكل thread (بدل فتح اتصال جديد في كل استدعاء)
+- WAL: القراءة لا تنتظر الكتابة (الواجهة + عمال الاستيراد معاً)
+- مخطط بإصدارات (PRAGMA user_version) وترقيات متتالية للقواعد القديمة
+- فهارس على name / code / company / size + عمود content_hash (بصمة ملف DXF)
+- الإدخال الجماعي داخل transaction واحدة
+- بحث نصي FTS5 (name / code / company / desc) + أعمدة الغلاف الرقمية (width / height / wall / area)
+  فيُنفَّذ استعلام مثل "40x40 from Alumil" داخل القاعدة وبصفحات (LIMIT / OFFSET)
+الاستعلامات نصوص ثابتة، فيعيد sqlite3 استخدام الـ statements المُجهّزة من ذاكرة الاتصال.
 """
 
+import hashlib
 import os
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 
 # تحديد مسار القاعدة داخل مجلد المشروع
 DB_PATH = Path(__file__).parent / "profiles.db"
 
+# حجم ذاكرة الـ statements المُجهّزة لكل اتصال
+_STATEMENT_CACHE = 256
+
+# ترتيب الأعمدة المُعادة من get_all_profiles (الأعمدة التسعة الأولى كما كانت سابقاً)
+COLUMNS = ("id", "name", "code", "company", "size", "file_path", "thumb_path",
+           "source", "date_added", "desc", "content_hash", "width", "height", "wall", "area")
+_SELECT = f"SELECT {', '.join(COLUMNS)} FROM profiles"
+
+# حجم الصفحة الافتراضي لنتائج البحث
+PAGE_SIZE = 100
+# سماحية مطابقة القياسات (mm): "40x40" يطابق 39.5..40.5
+DIM_TOLERANCE = 0.5
+
 # -----------------------------------------------------------
-def init_db():
-    """تهيئة القاعدة وإنشاء الجدول إن لم يكن موجوداً"""
-    os.makedirs(DB_PATH.parent, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
+# 🧱 ترقيات المخطط: (الإصدار, [أوامر SQL]) — تُطبَّق بالترتيب مرة واحدة فقط
+# -----------------------------------------------------------
+MIGRATIONS = [
+    (1, [
+        """
         CREATE TABLE IF NOT EXISTS profiles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT,
@@ -32,26 +55,206 @@ def init_db():
             source TEXT,
             date_added TEXT
         )
-    """)
-    conn.commit()
-    conn.close()
+        """,
+    ]),
+    (2, [
+        "ALTER TABLE profiles ADD COLUMN desc TEXT DEFAULT ''",
+        "ALTER TABLE profiles ADD COLUMN content_hash TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_name ON profiles(name COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_code ON profiles(code COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_company ON profiles(company COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_size ON profiles(size)",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_hash ON profiles(content_hash)",
+    ]),
+    (3, [
+        # غلاف البروفايل من DXF (NULL للسجلات القديمة حتى backfill_envelopes)
+        "ALTER TABLE profiles ADD COLUMN width REAL",
+        "ALTER TABLE profiles ADD COLUMN height REAL",
+        "ALTER TABLE profiles ADD COLUMN wall REAL",
+        "ALTER TABLE profiles ADD COLUMN area REAL",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_dims ON profiles(width, height)",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_height ON profiles(height)",
+    ]),
+]
+
+# فهرس FTS5 خارجي المحتوى (لا يكرر النصوص) تُحدّثه الـ triggers تلقائياً.
+# يُنشأ خارج الترقيات لأن FTS5 قد لا يكون مُضمّناً في كل نسخ sqlite؛ بدونه يُستخدم LIKE.
+_FTS_COLUMNS = ("name", "code", "company", "desc")
+_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
+        name, code, company, "desc",
+        content='profiles', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS profiles_fts_ai AFTER INSERT ON profiles BEGIN
+        INSERT INTO profiles_fts(rowid, name, code, company, "desc")
+        VALUES (new.id, new.name, new.code, new.company, new."desc");
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS profiles_fts_ad AFTER DELETE ON profiles BEGIN
+        INSERT INTO profiles_fts(profiles_fts, rowid, name, code, company, "desc")
+        VALUES ('delete', old.id, old.name, old.code, old.company, old."desc");
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS profiles_fts_au AFTER UPDATE OF name, code, company, "desc" ON profiles BEGIN
+        INSERT INTO profiles_fts(profiles_fts, rowid, name, code, company, "desc")
+        VALUES ('delete', old.id, old.name, old.code, old.company, old."desc");
+        INSERT INTO profiles_fts(rowid, name, code, company, "desc")
+        VALUES (new.id, new.name, new.code, new.company, new."desc");
+    END
+    """,
+]
+# أوزان bm25 بترتيب _FTS_COLUMNS (تطابق الاسم أهم من الوصف)
+_FTS_WEIGHTS = (10.0, 6.0, 3.0, 1.0)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_local = threading.local()
+_migrate_lock = threading.Lock()
+_migrated: set = set()
+_fts_paths: set = set()
+
+
+# -----------------------------------------------------------
+# 🔌 الاتصال
+# -----------------------------------------------------------
+def _open(path: Path) -> sqlite3.Connection:
+    os.makedirs(path.parent, exist_ok=True)
+    # isolation_level=None: نتحكم بالـ transactions صراحةً (BEGIN/COMMIT)
+    conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None,
+                           cached_statements=_STATEMENT_CACHE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """اتصال هذا الـ thread بالقاعدة الحالية (يُنشأ مرة واحدة ثم يُعاد استخدامه)."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    path = Path(DB_PATH)
+    conn = conns.get(path)
+    if conn is None:
+        conn = conns[path] = _open(path)
+    if path not in _migrated:
+        _migrate(conn, path)
+    return conn
+
+
+def close_connection():
+    """إغلاق اتصالات هذا الـ thread (مثلاً عند انتهاء عامل استيراد)."""
+    for conn in getattr(_local, "conns", {}).values():
+        conn.close()
+    _local.conns = {}
+
+
+@contextmanager
+def transaction():
+    """كتلة كتابة واحدة: COMMIT عند النجاح و ROLLBACK عند أي خطأ."""
+    conn = get_connection()
+    if conn.in_transaction:
+        # transaction متداخلة: تندمج في الخارجية
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _migrate(conn: sqlite3.Connection, path: Path):
+    with _migrate_lock:
+        if path in _migrated:
+            return
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for target, steps in MIGRATIONS:
+                    if target <= version:
+                        continue
+                    for sql in steps:
+                        try:
+                            conn.execute(sql)
+                        except sqlite3.OperationalError as e:
+                            # قواعد أُنشئت يدوياً قد تحوي العمود مسبقاً
+                            if "duplicate column" not in str(e):
+                                raise
+                    conn.execute(f"PRAGMA user_version = {int(target)}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"🧱 [DB] Schema v{version} -> v{SCHEMA_VERSION} at: {path}")
+        if _ensure_fts(conn):
+            _fts_paths.add(path)
+        _migrated.add(path)
+
+
+def _fts5_available(conn: sqlite3.Connection) -> bool:
+    opts = {r[0] for r in conn.execute("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in opts
+
+
+def _ensure_fts(conn: sqlite3.Connection) -> bool:
+    """إنشاء فهرس FTS5 وملؤه من السجلات الموجودة (مرة واحدة). False إن لم يتوفر FTS5."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'profiles_fts'").fetchone()
+    if exists:
+        return True
+    if not _fts5_available(conn):
+        print("⚠️ [DB] FTS5 غير متوفر في sqlite — البحث سيستخدم LIKE")
+        return False
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for sql in _FTS_SCHEMA:
+            conn.execute(sql)
+        conn.execute("INSERT INTO profiles_fts(profiles_fts) VALUES ('rebuild')")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    print("🔎 [DB] FTS5 index built")
+    return True
+
+
+def init_db():
+    """تهيئة القاعدة (إنشاء/ترقية المخطط). آمنة للاستدعاء المتكرر."""
+    get_connection()
     print(f"🧱 [DB] Ready at: {DB_PATH}")
 
+
+# -----------------------------------------------------------
+# 🧮 أدوات
 # -----------------------------------------------------------
-def add_profile(data: dict):
-    """إضافة سجل بروفايل جديد"""
-    init_db()
+def file_hash(path, chunk: int = 1 << 20) -> Optional[str]:
+    """بصمة SHA-256 لمحتوى الملف (None إن لم يوجد)."""
+    if not path:
+        return None
+    try:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(chunk), b""):
+                h.update(block)
+        return h.hexdigest()
+    except OSError:
+        return None
+
 
+def _row_values(data: dict) -> tuple:
     # 🧩 تصحيح المسارات لتكون مطلقة
     file_path = str(Path(data.get("file_path", "")).resolve())
     thumb_path = str(Path(data.get("thumb_path", "")).resolve())
-
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO profiles (name, code, company, size, file_path, thumb_path, source, date_added)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    content_hash = data.get("content_hash") or file_hash(file_path)
+    return (
         data.get("name", ""),
         data.get("code", ""),
         data.get("company", ""),
@@ -59,23 +262,259 @@ def add_profile(data: dict):
         file_path,
         thumb_path,
         data.get("source", "DXF"),
-        datetime.now().strftime("%Y-%m-%d %H:%M")
-    ))
-    conn.commit()
-    conn.close()
+        data.get("date_added") or datetime.now().strftime("%Y-%m-%d %H:%M"),
+        data.get("desc", ""),
+        content_hash,
+        data.get("width"),
+        data.get("height"),
+        data.get("wall"),
+        data.get("area"),
+    )
+
+
+_INSERT = """
+    INSERT INTO profiles (name, code, company, size, file_path, thumb_path, source, date_added,
+                          desc, content_hash, width, height, wall, area)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-    print(f"💾 [DB] Added Profile: {data.get('name')} | Thumb={thumb_path}")
 
 # -----------------------------------------------------------
-def get_all_profiles():
-    """جلب جميع البروفايلات"""
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT id, name, code, company, size, file_path, thumb_path, source, date_added
-        FROM profiles ORDER BY id DESC
-    """)
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+# ✏️ الكتابة
+# -----------------------------------------------------------
+def add_profile(data: dict) -> int:
+    """إضافة سجل بروفايل جديد؛ يُعيد id السجل."""
+    values = _row_values(data)
+    with transaction() as conn:
+        pid = conn.execute(_INSERT, values).lastrowid
+    print(f"💾 [DB] Added Profile: {data.get('name')} | Thumb={values[5]}")
+    return pid
+
+
+def add_profiles(items: Iterable[dict]) -> int:
+    """إدخال جماعي داخل transaction واحدة؛ يُعيد عدد السجلات المضافة."""
+    rows = [_row_values(d) for d in items]
+    if not rows:
+        return 0
+    with transaction() as conn:
+        conn.executemany(_INSERT, rows)
+    print(f"💾 [DB] Added {len(rows)} profiles")
+    return len(rows)
+
+
+_EDITABLE = ("name", "code", "company", "size", "desc", "file_path", "thumb_path", "source", "content_hash",
+             "width", "height", "wall", "area")
+
+
+def update_profile(pid: int, name: Optional[str] = None, code: Optional[str] = None,
+                   company: Optional[str] = None, size: Optional[str] = None, **fields) -> bool:
+    """تعديل حقول سجل موجود (الحقول None لا تتغير). يُعيد True إن وُجد السجل."""
+    fields.update(name=name, code=code, company=company, size=size)
+    changes = {k: v for k, v in fields.items() if v is not None}
+    unknown = set(changes) - set(_EDITABLE)
+    if unknown:
+        raise ValueError(f"حقول غير معروفة: {sorted(unknown)}")
+    if not changes:
+        return get_profile(pid) is not None
+    cols = sorted(changes)
+    sql = f"UPDATE profiles SET {', '.join(f'{c} = ?' for c in cols)} WHERE id = ?"
+    with transaction() as conn:
+        done = conn.execute(sql, [changes[c] for c in cols] + [int(pid)]).rowcount > 0
+    print(f"✏️ [DB] Updated Profile #{pid}: {', '.join(cols)}")
+    return done
+
+
+def delete_profile(pid: int) -> bool:
+    with transaction() as conn:
+        return conn.execute("DELETE FROM profiles WHERE id = ?", (int(pid),)).rowcount > 0
+
+
+# -----------------------------------------------------------
+# 🔎 القراءة
+# -----------------------------------------------------------
+def get_all_profiles() -> List[tuple]:
+    """جلب جميع البروفايلات (أعمدة COLUMNS بالترتيب، الأحدث أولاً)."""
+    return get_connection().execute(f"{_SELECT} ORDER BY id DESC").fetchall()
+
+
+def get_profile(pid: int) -> Optional[tuple]:
+    return get_connection().execute(f"{_SELECT} WHERE id = ?", (int(pid),)).fetchone()
+
+
+def find_by_hash(content_hash: str) -> Optional[tuple]:
+    """أول بروفايل بنفس بصمة المحتوى (لكشف الملفات المكررة)."""
+    return get_connection().execute(f"{_SELECT} WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone()
+
+
+def existing_hashes(hashes: Iterable[str], chunk: int = 500) -> set:
+    """أي من البصمات موجود مسبقاً في القاعدة (استعلام IN على دفعات)."""
+    hashes = [h for h in dict.fromkeys(hashes) if h]
+    conn = get_connection()
+    found = set()
+    for i in range(0, len(hashes), chunk):
+        part = hashes[i:i + chunk]
+        sql = f"SELECT content_hash FROM profiles WHERE content_hash IN ({', '.join('?' * len(part))})"
+        found.update(r[0] for r in conn.execute(sql, part))
+    return found
+
+
+def count_profiles() -> int:
+    return get_connection().execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+
+def backfill_hashes() -> int:
+    """حساب content_hash للسجلات القديمة (قبل الترقية v2) التي ملفاتها موجودة."""
+    conn = get_connection()
+    rows = conn.execute("SELECT id, file_path FROM profiles WHERE content_hash IS NULL").fetchall()
+    updates = [(h, pid) for pid, path in rows if (h := file_hash(path)) is not None]
+    if updates:
+        with transaction() as conn:
+            conn.executemany("UPDATE profiles SET content_hash = ? WHERE id = ?", updates)
+    return len(updates)
+
+
+def backfill_envelopes() -> int:
+    """حساب أعمدة الغلاف (width/height/wall/area) للسجلات القديمة من ملفات DXF الموجودة."""
+    from profile.dxf_normalizer import load_dxf_segments
+    from profile.envelope import profile_envelope
+
+    conn = get_connection()
+    rows = conn.execute("SELECT id, file_path FROM profiles WHERE width IS NULL").fetchall()
+    updates = []
+    for pid, path in rows:
+        if not path or not Path(path).is_file():
+            continue
+        try:
+            segs, bbox = load_dxf_segments(Path(path), as_array=True)
+            env = profile_envelope(segs, bbox)
+        except Exception as e:
+            print(f"⚠️ [DB] تعذر حساب غلاف #{pid}: {e}")
+            continue
+        updates.append((env["width"], env["height"], env["wall"], env["area"], pid))
+    if updates:
+        with transaction() as conn:
+            conn.executemany("UPDATE profiles SET width = ?, height = ?, wall = ?, area = ? WHERE id = ?",
+                             updates)
+    return len(updates)
+
+
+# -----------------------------------------------------------
+# 🔍 البحث
+# -----------------------------------------------------------
+_NUM = r"\d+(?:[.,]\d+)?"
+# 40x40 / 40×40x2 / 40*20 (العرض × الارتفاع [× سماكة الجدار])
+_DIMS_RE = re.compile(rf"(?<![\w.])({_NUM})\s*[x×*]\s*({_NUM})(?:\s*[x×*]\s*({_NUM}))?(?![\w.])", re.I)
+# "from X" / "من X" حتى نهاية النص = فلتر الشركة
+_FROM_RE = re.compile(r"(?:^|\s)(?:from|من)\s+(.+)$", re.I)
+_NUMBER_RE = re.compile(rf"^{_NUM}$")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _num(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def parse_query(text: str) -> Dict:
+    """
+    تفكيك نص البحث إلى:
+    - dims: (a, b, wall|None) من "AxB" أو "AxBxT" (يطابق أي اتجاه للبروفايل)
+    - company: ما بعد "from" / "من"
+    - numbers: أرقام منفردة (تطابق العرض أو الارتفاع أو النص)
+    - terms: بقية الكلمات (بحث نصي بالبادئة)
+    """
+    text = (text or "").strip()
+    query = {"dims": None, "company": None, "numbers": [], "terms": []}
+    m = _FROM_RE.search(text)
+    if m:
+        query["company"] = m.group(1).strip()
+        text = text[:m.start()]
+    m = _DIMS_RE.search(text)
+    if m:
+        query["dims"] = (_num(m.group(1)), _num(m.group(2)), _num(m.group(3)) if m.group(3) else None)
+        text = text[:m.start()] + " " + text[m.end():]
+    for tok in text.split():
+        if _NUMBER_RE.match(tok):
+            query["numbers"].append(_num(tok))
+        else:
+            query["terms"].extend(_WORD_RE.findall(tok))
+    return query
+
+
+def _fmt(x: float) -> str:
+    """رقم كنص بدون أصفار زائدة (40.0 -> "40")."""
+    return f"{x:g}"
+
+
+def _fts_phrase(word: str) -> str:
+    return '"' + word.replace('"', '""') + '"*'
+
+
+def _fts_enabled() -> bool:
+    get_connection()
+    return Path(DB_PATH) in _fts_paths
+
+
+def search_profiles(text: str = "", limit: int = PAGE_SIZE, offset: int = 0) -> List[tuple]:
+    """
+    بحث داخل القاعدة بصفحات؛ يُعيد صفوفاً بأعمدة COLUMNS.
+    الترتيب: صلة FTS (bm25) إن وُجدت كلمات، ثم قرب القياس، ثم الأحدث.
+    """
+    q = parse_query(text)
+    fts = _fts_enabled()
+    where: List[str] = []
+    args: List = []
+    order: List[str] = []
+    order_args: List = []
+    source = "profiles"
+    cols = ", ".join(f"profiles.{c}" for c in COLUMNS)
+
+    if q["terms"]:
+        if fts:
+            source = "profiles_fts JOIN profiles ON profiles.id = profiles_fts.rowid"
+            where.append("profiles_fts MATCH ?")
+            args.append(" ".join(_fts_phrase(w) for w in q["terms"]))
+            order.append(f"bm25(profiles_fts, {', '.join(map(str, _FTS_WEIGHTS))})")
+        else:
+            for w in q["terms"]:
+                where.append("(" + " OR ".join(f'profiles."{c}" LIKE ?' for c in _FTS_COLUMNS) + ")")
+                args.extend([f"%{w}%"] * len(_FTS_COLUMNS))
+
+    if q["company"]:
+        where.append("profiles.company LIKE ?")
+        args.append(f"%{q['company']}%")
+
+    tol = DIM_TOLERANCE
+    if q["dims"]:
+        a, b, wall = q["dims"]
+        between = "profiles.{0} BETWEEN ? AND ? AND profiles.{1} BETWEEN ? AND ?"
+        # السجلات بدون غلاف (NULL) تُطابق بنص القياس
+        where.append(f"(({between.format('width', 'height')}) OR ({between.format('height', 'width')})"
+                     " OR (profiles.width IS NULL AND profiles.size LIKE ?))")
+        args.extend([a - tol, a + tol, b - tol, b + tol] * 2)
+        args.append(f"%{_fmt(a)}%{_fmt(b)}%")
+        if wall is not None:
+            where.append("(profiles.wall IS NULL OR profiles.wall BETWEEN ? AND ?)")
+            args.extend([wall - tol, wall + tol])
+        order.append("IFNULL(MIN(ABS(profiles.width - ?) + ABS(profiles.height - ?),"
+                     " ABS(profiles.width - ?) + ABS(profiles.height - ?)), 1e9)")
+        order_args = [a, b, b, a]
+
+    for n in q["numbers"]:
+        cond = ["ABS(profiles.width - ?) <= ?", "ABS(profiles.height - ?) <= ?", "profiles.size LIKE ?"]
+        cond_args = [n, tol, n, tol, f"%{_fmt(n)}%"]
+        if fts:
+            cond.append("profiles.id IN (SELECT rowid FROM profiles_fts WHERE profiles_fts MATCH ?)")
+            cond_args.append(_fts_phrase(_fmt(n)))
+        else:
+            cond.extend(f'profiles."{c}" LIKE ?' for c in _FTS_COLUMNS)
+            cond_args.extend([f"%{_fmt(n)}%"] * len(_FTS_COLUMNS))
+        where.append("(" + " OR ".join(cond) + ")")
+        args.extend(cond_args)
+
+    order.append("profiles.id DESC")
+    sql = f"SELECT {cols} FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {', '.join(order)} LIMIT ? OFFSET ?"
+    return get_connection().execute(sql, args + order_args + [int(limit), int(offset)]).fetchall()
+
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+SegmentArray — تخزين مقاطع DXF في مصفوفة NumPy متجاورة
+- الشكل الداخلي: (N, 2, 2) float64  ->  [segment][start/end][x/y]
+- bbox محسوب دفعة واحدة (vectorized) بدون حلقات بايثون
+- يبقى متوافقاً مع الواجهة القديمة: التكرار عليه يُعيد ((x1,y1),(x2,y2))
+- circles (اختياري): (N, 3) = (cx, cy, r) للدائرة الأصلية التي قُسّم منها كل مقطع،
+  و NaN للخطوط المستقيمة — تسمح بإعادة بناء الأقواس الدقيقة لاحقاً في OCC
+"""
+
+from __future__ import annotations
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+Point = Tuple[float, float]
+Segment = Tuple[Point, Point]
+BBox = Tuple[float, float, float, float]
+
+
+class SegmentArray:
+    """حاوية خفيفة حول مصفوفة (N, 2, 2) مع عرض tuples للتوافق."""
+
+    __slots__ = ("data", "circles")
+
+    def __init__(self, data=None, circles=None):
+        if data is None:
+            data = np.empty((0, 2, 2), dtype=np.float64)
+        self.data = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 2, 2)
+        if circles is not None:
+            circles = np.ascontiguousarray(circles, dtype=np.float64).reshape(-1, 3)
+            if len(circles) != len(self.data):
+                raise ValueError("circles يجب أن يطابق عدد المقاطع")
+        self.circles = circles
+
+    # ------------------------------------------------------------
+    # 🏗️ إنشاء
+    # ------------------------------------------------------------
+    @classmethod
+    def from_segments(cls, segments: Iterable[Segment]) -> "SegmentArray":
+        """تحويل قائمة ((x1,y1),(x2,y2)) إلى SegmentArray."""
+        if isinstance(segments, SegmentArray):
+            return segments
+        flat = [c for (p1, p2) in segments for c in (p1[0], p1[1], p2[0], p2[1])]
+        return cls(np.asarray(flat, dtype=np.float64))
+
+    @classmethod
+    def from_coords(cls, x1, y1, x2, y2) -> "SegmentArray":
+        """بناء من أربع مصفوفات إحداثيات متساوية الطول."""
+        return cls(np.stack([x1, y1, x2, y2], axis=-1))
+
+    # ------------------------------------------------------------
+    # 🔍 خصائص
+    # ------------------------------------------------------------
+    @property
+    def starts(self) -> np.ndarray:
+        """نقاط البداية (N, 2) — view بدون نسخ."""
+        return self.data[:, 0, :]
+
+    @property
+    def ends(self) -> np.ndarray:
+        """نقاط النهاية (N, 2) — view بدون نسخ."""
+        return self.data[:, 1, :]
+
+    @property
+    def points(self) -> np.ndarray:
+        """كل النقاط بالترتيب (2N, 2) — view بدون نسخ."""
+        return self.data.reshape(-1, 2)
+
+    @property
+    def bbox(self) -> BBox:
+        """(xmin, ymin, xmax, ymax) محسوب دفعة واحدة."""
+        if not len(self.data):
+            return (0.0, 0.0, 0.0, 0.0)
+        pts = self.points
+        mn = pts.min(axis=0)
+        mx = pts.max(axis=0)
+        return (float(mn[0]), float(mn[1]), float(mx[0]), float(mx[1]))
+
+    @property
+    def has_arcs(self) -> bool:
+        return self.circles is not None and not np.isnan(self.circles[:, 2]).all()
+
+    def circles_or_nan(self) -> np.ndarray:
+        """(N, 3) دائماً — NaN لكل المقاطع عند غياب معلومات الأقواس."""
+        if self.circles is None:
+            return np.full((len(self.data), 3), np.nan)
+        return self.circles
+
+    def lengths(self) -> np.ndarray:
+        """طول كل مقطع (N,)."""
+        d = self.data[:, 1, :] - self.data[:, 0, :]
+        return np.hypot(d[:, 0], d[:, 1])
+
+    # ------------------------------------------------------------
+    # 🔁 توافق مع واجهة tuples القديمة
+    # ------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __bool__(self) -> bool:
+        return len(self.data) > 0
+
+    def __iter__(self) -> Iterator[Segment]:
+        for (a, b) in self.data.tolist():
+            yield (a[0], a[1]), (b[0], b[1])
+
+    def __getitem__(self, idx) -> Union[Segment, "SegmentArray"]:
+        if isinstance(idx, (int, np.integer)):
+            (a, b) = self.data[idx].tolist()
+            return (a[0], a[1]), (b[0], b[1])
+        circles = None if self.circles is None else self.circles[idx]
+        return SegmentArray(self.data[idx], circles)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"SegmentArray(n={len(self.data)})"
+
+    def to_list(self) -> List[Segment]:
+        """نسخة tuples كاملة (للكود القديم الذي يعدّل القائمة)."""
+        return list(self)
+
+    def concat(self, other: "SegmentArray") -> "SegmentArray":
+        other = as_segment_array(other)
+        circles = None
+        if self.circles is not None or other.circles is not None:
+            circles = np.concatenate([self.circles_or_nan(), other.circles_or_nan()])
+        return SegmentArray(np.concatenate([self.data, other.data]), circles)
+
+
+def as_segment_array(segments) -> SegmentArray:
+    """يقبل SegmentArray أو قائمة tuples أو ndarray ويُعيد SegmentArray."""
+    if isinstance(segments, SegmentArray):
+        return segments
+    if isinstance(segments, np.ndarray):
+        return SegmentArray(segments)
+    return SegmentArray.from_segments(segments)
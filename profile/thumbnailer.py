@@ -5,13 +5,29 @@
 - يرسم الخطوط بدقة عالية وبألوان هادئة مشابهة لـ Fusion.
 - يقوم بتصحيح اتجاه X/Y لتطابق العرض الحقيقي في برامج CAD.
 - يحفظ الصورة ضمن مجلد data/thumbnails.
+- كل النقاط تُحوَّل بمصفوفة affine واحدة (numpy) وتُرسم بـ drawLines (QLineF بدقة float)
+  نفس الخطوط تُستخدم لطبقة الخط وطبقة الظل.
+- الرسم على QImage فقط، فهو آمن خارج خيط الواجهة (render_many على ThreadPool).
+- عدة أحجام لنفس البروفايل: <name>.png (الحجم الافتراضي) + <name>@<size>.png
+
+سطر الأوامر (إعادة توليد الكتالوج كاملاً):
+    python -m profile.thumbnailer --regenerate-all [--sizes 64,280,512] [--workers N]
 """
 
 from __future__ import annotations
-from typing import List, Tuple
+import argparse
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 from PySide6.QtGui import QImage, QPainter, QPen, QColor
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QLineF
+
+from profile.segment_array import as_segment_array
 
 Point = Tuple[float, float]
 Segment = Tuple[Point, Point]
@@ -20,71 +36,203 @@ Segment = Tuple[Point, Point]
 THUMBS_DIR = Path("data/thumbnails")
 THUMBS_DIR.mkdir(parents=True, exist_ok=True)
 
+# الحجم الافتراضي (المسار المخزن في القاعدة) + الأحجام الإضافية
+DEFAULT_SIZE = 280
+THUMB_SIZES = (64, DEFAULT_SIZE, 512)
 
-def draw_segments_thumbnail(segs: List[Segment], bbox, out_name: str, size: int = 280) -> str:
-    """يرسم معاينة 2D من مقاطع DXF ويحفظها كـ PNG."""
+# 👇 زاوية التصحيح (يمكن تعديلها حسب نوع ملفاتك)
+ROT_ANGLE = 90  # جرّب 90 أو -90 حسب الحاجة
+# نسبة الشكل من الصورة (هامش حول الحواف)
+FILL = 0.85
+
+BACKGROUND = "#F1F2F1"   # خلفية موحدة لباقي البرنامج
+LINE_COLOR = "#34495E"   # رمادي أزرق ناعم
+LINE_WIDTH = 0.9
+SHADOW_COLOR = (0, 0, 0, 35)
+SHADOW_WIDTH = 2.2
+
+
+def _no_progress(stage, fraction=0.0):
+    pass
+
+
+def view_transform(bbox, size: int) -> np.ndarray:
+    """
+    مصفوفة affine (2, 3) من إحداثيات DXF إلى بكسلات الصورة:
+    إزاحة للمركز -> تدوير ROT_ANGLE -> قلب Y (QPainter يرسم للأسفل) -> تحجيم -> منتصف الصورة.
+    """
     x1, y1, x2, y2 = bbox
     w = max(1e-9, x2 - x1)
     h = max(1e-9, y2 - y1)
-    scale = 0.85 * size / max(w, h)
+    scale = FILL * size / max(w, h)
     cx = (x1 + x2) / 2.0
     cy = (y1 + y2) / 2.0
 
-    # 🧱 إنشاء الصورة الخلفية
+    rad = math.radians(ROT_ANGLE)
+    c, s = math.cos(rad), math.sin(rad)
+    linear = scale * np.array([[c, -s], [-s, -c]])   # الصف الثاني = -(تدوير Y)
+    offset = np.array([size / 2.0, size / 2.0]) - linear @ np.array([cx, cy])
+    return np.hstack([linear, offset[:, None]])
+
+
+def map_segments(segs, bbox, size: int) -> np.ndarray:
+    """كل المقاطع إلى بكسلات دفعة واحدة: (N, 4) = X1, Y1, X2, Y2."""
+    data = as_segment_array(segs).data
+    m = view_transform(bbox, size)
+    pts = data.reshape(-1, 2) @ m[:, :2].T + m[:, 2]
+    return pts.reshape(-1, 4)
+
+
+def render_thumbnail(segs, bbox, size: int = DEFAULT_SIZE) -> QImage:
+    """يرسم المعاينة على QImage (بدون حفظ) — آمن للاستدعاء من أي خيط."""
     img = QImage(size, size, QImage.Format.Format_ARGB32)
-    img.fill(QColor("#F1F2F1"))  # خلفية موحدة لباقي البرنامج
+    img.fill(QColor(BACKGROUND))
+
+    lines = [QLineF(*row) for row in map_segments(segs, bbox, size).tolist()]
 
     p = QPainter(img)
     p.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing, True)
 
-    # ✏️ إعداد القلم (ألوان Fusion-style)
-    pen = QPen(QColor("#34495E"))  # رمادي أزرق ناعم
-    pen.setWidthF(0.9)
+    # ✏️ المقاطع ثم 🔲 ظل خفيف فوقها — نفس قائمة الخطوط للطبقتين
+    pen = QPen(QColor(LINE_COLOR))
+    pen.setWidthF(LINE_WIDTH)
     p.setPen(pen)
+    p.drawLines(lines)
 
-    # ✨ دالة تحويل النقاط لتصحيح الاتجاه (X و Y)
-    from math import cos, sin, radians
+    shadow_pen = QPen(QColor(*SHADOW_COLOR))
+    shadow_pen.setWidthF(SHADOW_WIDTH)
+    p.setPen(shadow_pen)
+    p.drawLines(lines)
 
-    # 👇 زاوية التصحيح (يمكن تعديلها حسب نوع ملفاتك)
-    ROT_ANGLE = 90  # جرّب 90 أو -90 حسب الحاجة
+    p.end()
+    return img
 
-    def map_pt(px, py):
-        # مركز الشكل
-        dx = px - cx
-        dy = py - cy
 
-        # تدوير حول المركز (rotation)
-        rad = radians(ROT_ANGLE)
-        rx = dx * cos(rad) - dy * sin(rad)
-        ry = dx * sin(rad) + dy * cos(rad)
+def thumb_path(out_name: str, size: int = DEFAULT_SIZE) -> Path:
+    """مسار ملف المصغّرة لحجم معين (الحجم الافتراضي بدون لاحقة للتوافق)."""
+    suffix = "" if size == DEFAULT_SIZE else f"@{size}"
+    return THUMBS_DIR / f"{out_name}{suffix}.png"
 
-        # قلب محور Y لتوحيد الاتجاه (لأن QPainter يرسم للأسفل)
-        ry = -ry
 
-        # تحجيم ونقل إلى منتصف الصورة
-        X = rx * scale + size / 2
-        Y = ry * scale + size / 2
-        return X, Y
+def best_variant(path, size: int) -> str:
+    """أصغر نسخة محفوظة لا تقل عن size (لفك أسرع في القوائم)، وإلا المسار نفسه."""
+    path = Path(path)
+    for s in sorted(x for x in THUMB_SIZES if x >= size):
+        if s == DEFAULT_SIZE:
+            break
+        candidate = path.with_name(f"{path.stem}@{s}.png")
+        if candidate.is_file():
+            return str(candidate)
+    return str(path)
 
-    # 🖊️ رسم جميع المقاطع
-    for (a, b) in segs:
-        X1, Y1 = map_pt(a[0], a[1])
-        X2, Y2 = map_pt(b[0], b[1])
-        p.drawLine(int(X1), int(Y1), int(X2), int(Y2))
 
-    # 🔲 حدود ظل خفيف حول الشكل
-    shadow_pen = QPen(QColor(0, 0, 0, 35))
-    shadow_pen.setWidthF(2.2)
-    p.setPen(shadow_pen)
-    for (a, b) in segs:
-        X1, Y1 = map_pt(a[0], a[1])
-        X2, Y2 = map_pt(b[0], b[1])
-        p.drawLine(int(X1), int(Y1), int(X2), int(Y2))
+def save_thumbnails(segs, bbox, out_name: str, sizes: Sequence[int] = THUMB_SIZES) -> Dict[int, str]:
+    """يرسم ويحفظ كل الأحجام؛ يُعيد {size: path}."""
+    segs = as_segment_array(segs)
+    paths = {}
+    for size in sizes:
+        out_path = thumb_path(out_name, size)
+        render_thumbnail(segs, bbox, size).save(str(out_path))
+        paths[size] = str(out_path)
+    print(f"🖼️ [Thumb] saved {out_name} ({', '.join(map(str, sizes))})")
+    return paths
 
-    p.end()
 
-    # 💾 حفظ الناتج
-    out_path = THUMBS_DIR / f"{out_name}.png"
-    img.save(str(out_path))
+def draw_segments_thumbnail(segs: List[Segment], bbox, out_name: str, size: int = DEFAULT_SIZE) -> str:
+    """يرسم معاينة 2D من مقاطع DXF ويحفظها كـ PNG."""
+    out_path = thumb_path(out_name, size)
+    render_thumbnail(segs, bbox, size).save(str(out_path))
     print(f"🖼️ [Thumb] saved {out_path}")
     return str(out_path)
+
+
+# -----------------------------------------------------------
+# 🧵 رسم متوازٍ + إعادة توليد الكتالوج
+# -----------------------------------------------------------
+def render_many(jobs: Iterable[Tuple[object, object, str]], sizes: Sequence[int] = THUMB_SIZES,
+                workers: Optional[int] = None, progress: Optional[Callable] = None
+                ) -> Tuple[Dict[str, Dict[int, str]], List[Tuple[str, str]]]:
+    """
+    jobs: (segs, bbox, out_name) — segs قد تكون مسار DXF (يُحلَّل داخل العامل).
+    يُعيد ({out_name: {size: path}}, [(out_name, error), ...]).
+    """
+    from profile.dxf_normalizer import load_dxf_segments
+
+    progress = progress or _no_progress
+
+    def work(job):
+        segs, bbox, out_name = job
+        if isinstance(segs, (str, Path)):
+            segs, bbox = load_dxf_segments(Path(segs), as_array=True)
+        if not len(segs):
+            raise ValueError("لا توجد مقاطع صالحة في DXF")
+        return save_thumbnails(segs, bbox, out_name, sizes)
+
+    jobs = list(jobs)
+    done: Dict[str, Dict[int, str]] = {}
+    failed: List[Tuple[str, str]] = []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(work, job): job[2] for job in jobs}
+        for i, fut in enumerate(as_completed(futures), start=1):
+            name = futures[fut]
+            try:
+                done[name] = fut.result()
+            except Exception as e:
+                failed.append((name, f"{type(e).__name__}: {e}"))
+            progress("thumbs", i / len(jobs))
+    return done, failed
+
+
+def regenerate_all(sizes: Sequence[int] = THUMB_SIZES, workers: Optional[int] = None,
+                   progress: Optional[Callable] = None) -> Tuple[int, List[Tuple[str, str]]]:
+    """إعادة رسم مصغّرات كل البروفايلات في القاعدة (بنفس الأسماء) وتحديث thumb_path إن تغيّر."""
+    from profile import profiles_db
+
+    jobs, owners = [], {}
+    for pid, code, file_path, thumb in profiles_db.get_connection().execute(
+            "SELECT id, code, file_path, thumb_path FROM profiles"):
+        if not file_path or not Path(file_path).is_file():
+            continue
+        # الاسم الحالي للمصغّرة إن وُجد، وإلا الكود
+        name = Path(thumb).stem if thumb and thumb.lower().endswith(".png") else (code or f"profile_{pid}")
+        name = name.split("@")[0]
+        owners.setdefault(name, []).append((pid, thumb))
+        if len(owners[name]) == 1:
+            jobs.append((file_path, None, name))
+
+    done, failed = render_many(jobs, sizes, workers, progress)
+    updates = []
+    for name, paths in done.items():
+        main = str(Path(paths.get(DEFAULT_SIZE) or paths[max(paths)]).resolve())
+        updates.extend((main, pid) for pid, old in owners[name] if old != main)
+    if updates:
+        with profiles_db.transaction() as conn:
+            conn.executemany("UPDATE profiles SET thumb_path = ? WHERE id = ?", updates)
+    print(f"✅ [Thumb] regenerated {len(done)} profiles, {len(failed)} failed")
+    return len(done), failed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m profile.thumbnailer",
+                                     description="توليد مصغّرات البروفايلات")
+    parser.add_argument("--regenerate-all", action="store_true", help="إعادة توليد مصغّرات كل الكتالوج")
+    parser.add_argument("--sizes", default=",".join(map(str, THUMB_SIZES)), help="الأحجام مثل 64,280,512")
+    parser.add_argument("--workers", type=int, default=None, help="عدد خيوط الرسم")
+    parser.add_argument("--db", help="مسار قاعدة بيانات بديلة")
+    args = parser.parse_args(argv)
+    if not args.regenerate_all:
+        parser.print_help()
+        return 2
+    if args.db:
+        from profile import profiles_db
+        profiles_db.DB_PATH = Path(args.db)
+
+    sizes = sorted({int(s) for s in args.sizes.split(",") if s.strip()})
+    _, failed = regenerate_all(sizes, args.workers)
+    for name, error in failed:
+        print(f"❌ [Thumb] {name}: {error}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
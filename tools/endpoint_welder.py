@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+🧲 لحام نقاط النهاية (endpoint welding) بسماحية محددة
+- يجمّع كل النقاط التي تقع ضمن مسافة tol من بعضها في رأس واحد
+- فهرس مكاني: cKDTree من scipy، أو شبكة hash عند عدم توفرها
+- يعيد عدد الفجوات التي أُغلقت (نقاط مختلفة الإحداثيات دُمجت معاً)
+بديل عن round(p, 4) الذي يفشل عندما تقع نقطتان على جانبي حد التقريب.
+"""
+
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+
+from tools.planar_faces import _merge_rounded
+
+_HAS_SCIPY = True
+try:
+    from scipy.spatial import cKDTree
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+except Exception:
+    _HAS_SCIPY = False
+
+
+def _components_scipy(pts: np.ndarray, tol: float) -> np.ndarray:
+    pairs = cKDTree(pts).query_pairs(tol, output_type="ndarray")
+    n = len(pts)
+    if not len(pairs):
+        return np.arange(n)
+    graph = coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def _components_grid(pts: np.ndarray, tol: float) -> np.ndarray:
+    """شبكة خلايا بحجم tol: كل نقطة تُقارن فقط مع الخلايا التسع المجاورة."""
+    n = len(pts)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    cells = np.floor(pts / tol).astype(np.int64).tolist()
+    coords = pts.tolist()
+    grid: dict = {}
+    for i, c in enumerate(cells):
+        grid.setdefault((c[0], c[1]), []).append(i)
+
+    tol2 = tol * tol
+    for i, (cx, cy) in enumerate(cells):
+        xi, yi = coords[i]
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in grid.get((cx + dx, cy + dy), ()):
+                    if j <= i:
+                        continue
+                    xj, yj = coords[j]
+                    if (xi - xj) ** 2 + (yi - yj) ** 2 <= tol2:
+                        ri, rj = find(i), find(j)
+                        if ri != rj:
+                            parent[rj] = ri
+
+    roots = np.fromiter((find(i) for i in range(n)), dtype=np.int64, count=n)
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels
+
+
+def weld_endpoints(points: np.ndarray, tol: float = 0.01) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    لحام النقاط ضمن السماحية tol.
+    يُعيد (vertices, ids, gaps_closed):
+      vertices: (V, 2) مركز كل مجموعة
+      ids: (M,) رقم الرأس لكل نقطة إدخال
+      gaps_closed: عدد النقاط المختلفة التي دُمجت (فجوات أُغلقت)
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if not len(points):
+        return np.empty((0, 2)), np.empty(0, dtype=np.int64), 0
+
+    # 1) دمج النقاط المتطابقة فعلياً أولاً (يقلص حجم الفهرس كثيراً)
+    uniq, inv = _merge_rounded(points, 9)
+    if tol <= 0 or len(uniq) < 2:
+        return uniq, inv, 0
+
+    # 2) تجميع النقاط المتقاربة
+    labels = _components_scipy(uniq, tol) if _HAS_SCIPY else _components_grid(uniq, tol)
+    n_clusters = int(labels.max()) + 1
+
+    # 3) مركز كل مجموعة (متوسط النقاط الفريدة)
+    counts = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+    vertices = np.empty((n_clusters, 2), dtype=np.float64)
+    vertices[:, 0] = np.bincount(labels, weights=uniq[:, 0], minlength=n_clusters) / counts
+    vertices[:, 1] = np.bincount(labels, weights=uniq[:, 1], minlength=n_clusters) / counts
+
+    gaps_closed = len(uniq) - n_clusters
+    return vertices, labels[inv], gaps_closed
@@ -4,16 +4,31 @@
 """
 
 from profile.dxf_normalizer import load_dxf_segments
+from profile.segment_array import as_segment_array
+from tools.planar_faces import PlanarGraph, extract_loops, loop_to_segments, signed_area
+from tools.endpoint_welder import weld_endpoints
+from tools.loop_nesting import classify_loops
 
+import numpy as np
 
-def extrude_profile(file_path: str, depth: float = 40.0, axis: str = "Y"):
+
+def _no_progress(stage, fraction=0.0):
+    pass
+
+
+def extrude_profile(file_path: str, depth: float = 40.0, axis: str = "Y", progress=None):
     """
     معالجة ذكية لملف DXF - تجميع الخطوط إلى مضلعات ثم إكسترود
+    - progress(stage, fraction): اختياري، يُستدعى عند كل مرحلة
+      ("parse", "loops", "faces", "prism"). إن رمى استثناءً (مثل JobCancelled)
+      تتوقف العملية فوراً.
     """
+    progress = progress or _no_progress
     print(f"📂 [smart_extrude] تحميل DXF من: {file_path}")
+    progress("parse", 0.0)
 
     try:
-        segments, bbox = load_dxf_segments(file_path)
+        segments, bbox = load_dxf_segments(file_path, as_array=True)
         if not segments:
             print("⚠️ [smart_extrude] لا توجد مقاطع صالحة في DXF.")
             return None
@@ -23,208 +38,252 @@ def extrude_profile(file_path: str, depth: float = 40.0, axis: str = "Y"):
         return None
 
     # ---------------------------------------------------------
-    # 🔍 المرحلة 1: تجميع الخطوط إلى مضلعات مغلقة
+    # 🔍 المرحلة 1: تجميع الخطوط إلى حلقات مغلقة
     # ---------------------------------------------------------
     print("🔍 [smart_extrude] تجميع الخطوط إلى مضلعات...")
+    progress("loops", 0.0)
 
-    polygons = find_closed_polygons_optimized(segments)
+    loops, sources = find_closed_loops(segments, with_sources=True)
 
-    if not polygons:
+    if not loops:
         print("❌ [smart_extrude] لم يتم العثور على مضلعات مغلقة")
         return None
 
-    print(f"✅ [smart_extrude] تم العثور على {len(polygons)} مضلع مغلق")
+    print(f"✅ [smart_extrude] تم العثور على {len(loops)} مضلع مغلق")
 
     # ---------------------------------------------------------
-    # 🧩 المرحلة 2: بناء وجوه من المضلعات
+    # 🪆 المرحلة 2: تصنيف الحلقات (حدود خارجية + ثقوب) وبناء الوجوه
     # ---------------------------------------------------------
+    regions = classify_loops(loops)
+    n_holes = sum(len(holes) for _, holes in regions)
+    print(f"🪆 [smart_extrude] {len(regions)} منطقة خارجية، {n_holes} ثقب/حجرة")
+
+    # الدائرة الأصلية لكل ضلع (أقواس DXF الدقيقة بدل آلاف المقاطع الصغيرة)
+    circles = segments.circles_or_nan()
+    loop_circles = [circles[src] for src in sources]
+
     print("🧩 [smart_extrude] بناء الوجوه من المضلعات...")
 
     faces = []
-    for i, polygon in enumerate(polygons):
-        face = build_face_from_polygon(polygon)
+    for i, (outer, holes) in enumerate(regions):
+        progress("faces", i / len(regions))
+        face = build_face_with_holes(loops[outer], [loops[h] for h in holes],
+                                     loop_circles[outer], [loop_circles[h] for h in holes])
         if face:
             faces.append(face)
-            print(f"✅ [smart_extrude] تم بناء وجه {i + 1} من مضلع بـ {len(polygon)} ضلع")
+            print(f"✅ [smart_extrude] تم بناء وجه {i + 1}: {len(loops[outer])} ضلع، {len(holes)} ثقب")
 
     if not faces:
         print("❌ [smart_extrude] فشل بناء أي وجوه")
         return None
 
     # ---------------------------------------------------------
-    # 🚀 المرحلة 3: تنفيذ الإكسترود
+    # 🚀 المرحلة 3: تنفيذ الإكسترود (prism واحد لكل وجه، بدون عمليات قطع)
     # ---------------------------------------------------------
     print("🚀 [smart_extrude] تنفيذ الإكسترود...")
+    progress("prism", 0.0)
 
     # إذا كان هناك وجه واحد فقط
     if len(faces) == 1:
         return perform_fast_extrusion(faces[0], depth, axis)
 
-    # إذا كان هناك عدة وجوه (للثقوب والأشكال المعقدة)
+    # عدة مناطق منفصلة: تُجمع في compound
     return perform_complex_extrusion(faces, depth, axis)
 
 
-def find_closed_polygons_optimized(segments, tolerance=0.01):
+def find_closed_loops(segments, tolerance=0.01, with_sources=False):
     """
-    تجميع سريع للمضلعات المغلقة مع تحسين الأداء
+    استخراج كل الحلقات المغلقة عبر رسم مستوٍ (planar faces)
+    - النقاط الأقرب من tolerance تُلحم في رأس واحد (KD-tree)
+    - يُعيد مصفوفات نقاط (k, 2) عكس عقارب الساعة، مرتبة تنازلياً حسب المساحة
+    - with_sources=True: يُعيد (loops, sources) مع رقم المقطع الأصلي لكل ضلع
     """
     import time
     start_time = time.time()
 
-    # تنظيف وتجميع المقاطع
-    clean_segments = []
-    point_to_segments = {}
+    # لحام نقاط النهاية ضمن السماحية (المقاطع الأقصر منها تنطوي لرأس واحد)
+    segs = as_segment_array(segments)
+    vertices, ids, gaps = weld_endpoints(segs.points, tolerance)
+    print(f"🧲 [polygon_finder] {len(segs)} مقطع -> {len(vertices)} رأس، أُغلقت {gaps} فجوة (tol={tolerance})")
 
-    for i, (p1, p2) in enumerate(segments):
-        # تقريب النقاط لتجنب أخطاء الدقة
-        p1_clean = (round(p1[0], 4), round(p1[1], 4))
-        p2_clean = (round(p2[0], 4), round(p2[1], 4))
+    graph = PlanarGraph.from_segments(segs, vertex_ids=ids, vertices=vertices)
+    loops, sources = extract_loops(segs, graph=graph, return_sources=True)
 
-        # تخطي المقاطع الصغيرة
-        if distance(p1_clean, p2_clean) < tolerance:
-            continue
-
-        clean_segments.append((p1_clean, p2_clean))
-
-        # بناء فهرس للنقاط
-        if p1_clean not in point_to_segments:
-            point_to_segments[p1_clean] = []
-        if p2_clean not in point_to_segments:
-            point_to_segments[p2_clean] = []
-
-        point_to_segments[p1_clean].append((p2_clean, i))
-        point_to_segments[p2_clean].append((p1_clean, i))
-
-    print(f"🧹 [polygon_finder] تم تنظيف {len(clean_segments)} مقطع من أصل {len(segments)}")
+    end_time = time.time()
+    print(f"⏱️ [polygon_finder] تم العثور على {len(loops)} مضلع في {end_time - start_time:.2f} ثانية")
 
-    polygons = []
-    used_segments = set()
+    return (loops, sources) if with_sources else loops
 
-    def find_polygon_bfs(start_point, start_segment):
-        """البحث عن مضلع باستخدام BFS محسّن"""
-        from collections import deque
 
-        queue = deque([(start_point, [start_segment])])
-        visited_segments = set([start_segment[1]])
+def find_closed_polygons_optimized(segments, tolerance=0.01):
+    """
+    استخراج كل المضلعات المغلقة (واجهة قديمة فوق find_closed_loops)
+    - يُعيد قائمة مضلعات، كل مضلع قائمة ((x1,y1),(x2,y2)) مرتبة ومغلقة،
+      مرتبة تنازلياً حسب المساحة (الأكبر أولاً)
+    """
+    return [loop_to_segments(loop) for loop in find_closed_loops(segments, tolerance)]
 
-        while queue:
-            current_point, current_path = queue.popleft()
 
-            # إذا عدنا لنقطة البداية، وجدنا مضلعاً
-            if len(current_path) > 2 and distance(current_point, start_point) < tolerance:
-                return current_path
+def distance(p1, p2):
+    """حساب المسافة بين نقطتين"""
+    return ((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2) ** 0.5
 
-            # البحث عن المقاطع التالية المتصلة
-            if current_point in point_to_segments:
-                for next_point, seg_idx in point_to_segments[current_point]:
-                    if seg_idx not in visited_segments and seg_idx not in used_segments:
-                        if is_valid_angle(current_path, current_point, next_point):
-                            visited_segments.add(seg_idx)
-                            new_path = current_path + [(next_point, seg_idx)]
-                            queue.append((next_point, new_path))
 
-                            # تحديد عمق البحث لتجنب التعقيد
-                            if len(new_path) > 50:
-                                return None
+def build_face_from_polygon(polygon_segments):
+    """بناء وجه من مضلع مغلق"""
+    from OCC.Core.gp import gp_Pnt
+    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeEdge, BRepBuilderAPI_MakeWire, BRepBuilderAPI_MakeFace
 
-        return None
+    try:
+        wire_builder = BRepBuilderAPI_MakeWire()
 
-    # البحث عن المضلعات الرئيسية فقط (لتسريع العملية)
-    max_polygons_to_find = 10
-    segments_to_process = min(1000, len(clean_segments))  # معالجة أول 1000 segment فقط
+        for p1, p2 in polygon_segments:
+            try:
+                point1 = gp_Pnt(p1[0], 0.0, p1[1])
+                point2 = gp_Pnt(p2[0], 0.0, p2[1])
 
-    for i in range(segments_to_process):
-        if i >= len(clean_segments):
-            break
+                edge = BRepBuilderAPI_MakeEdge(point1, point2).Edge()
+                wire_builder.Add(edge)
+            except:
+                continue
 
-        if i in used_segments:
-            continue
+        if wire_builder.IsDone():
+            wire = wire_builder.Wire()
+            face_builder = BRepBuilderAPI_MakeFace(wire)
 
-        p1, p2 = clean_segments[i]
-        polygon = find_polygon_bfs(p1, (p2, i))
+            if face_builder.IsDone():
+                return face_builder.Face()
 
-        if polygon and len(polygon) >= 3:
-            # استخراج المقاطع من المسار
-            polygon_segments = []
-            segment_indices = set()
+    except Exception as e:
+        print(f"⚠️ [face_builder] فشل بناء الوجه: {e}")
 
-            for j in range(len(polygon) - 1):
-                point1, seg_idx1 = polygon[j]
-                point2, seg_idx2 = polygon[j + 1]
-                polygon_segments.append((point1, point2))
-                segment_indices.add(seg_idx1)
+    return None
 
-            # إضافة المضلع إذا كان يحتوي على عدد معقول من الأضلاع
-            if 3 <= len(polygon_segments) <= 100:
-                polygons.append(polygon_segments)
-                used_segments.update(segment_indices)
 
-                if len(polygons) >= max_polygons_to_find:
-                    break
+def loop_edge_runs(circles):
+    """
+    تقسيم أضلاع حلقة إلى مجموعات متتالية: كل مجموعة إما ضلع مستقيم واحد
+    أو سلسلة أضلاع من نفس الدائرة الأصلية (قوس واحد).
+    يُعيد [(start, stop, is_arc), ...] بأرقام أضلاع قد تلتف حول نهاية الحلقة (stop > k).
+    """
+    circles = np.asarray(circles, dtype=np.float64).reshape(-1, 3)
+    k = len(circles)
+    # الضلع i يُكمل الضلع i-1 إذا جاءا من نفس الدائرة (NaN لا يساوي نفسه: الخطوط لا تُدمج)
+    same = (circles == np.roll(circles, 1, axis=0)).all(axis=1)
+    is_arc = ~np.isnan(circles[:, 2])
 
-    end_time = time.time()
-    print(f"⏱️ [polygon_finder] تم العثور على {len(polygons)} مضلع في {end_time - start_time:.2f} ثانية")
+    if same.all():
+        # الحلقة كلها دائرة واحدة: قوسان (نصفان) لأن القوس الواحد لا يُغلق نفسه
+        half = max(k // 2, 1)
+        return [(0, half, True), (half, k, True)] if k > 1 else [(0, 1, True)]
 
-    return polygons
+    starts = np.flatnonzero(~same).tolist()
+    stops = starts[1:] + [starts[0] + k]
+    return [(a, b, bool(is_arc[a])) for a, b in zip(starts, stops)]
 
 
-def distance(p1, p2):
-    """حساب المسافة بين نقطتين"""
-    return ((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2) ** 0.5
+def _xz(p):
+    from OCC.Core.gp import gp_Pnt
+    return gp_Pnt(float(p[0]), 0.0, float(p[1]))
+
+
+def _arc_edge(loop, circle, a, b):
+    """قوس دائري حقيقي من النقطة a إلى b عبر نقطة وسطى على نفس الدائرة."""
+    from OCC.Core.GC import GC_MakeArcOfCircle
+    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeEdge
+
+    k = len(loop)
+    p0, p1 = loop[a % k], loop[b % k]
+    if b - a >= 2:
+        pm = loop[((a + b) // 2) % k]
+    else:
+        # ضلع واحد: إسقاط منتصف الوتر على الدائرة
+        c = circle[:2]
+        d = 0.5 * (p0 + p1) - c
+        norm = np.hypot(d[0], d[1])
+        if norm < 1e-12:
+            return None
+        pm = c + d * (circle[2] / norm)
 
+    arc = GC_MakeArcOfCircle(_xz(p0), _xz(pm), _xz(p1))
+    if not arc.IsDone():
+        return None
+    return BRepBuilderAPI_MakeEdge(arc.Value()).Edge()
 
-def is_valid_angle(path, current_point, next_point):
-    """التحقق من أن الزاوية معقولة (لتجنب التقاطعات المعقدة)"""
-    if len(path) < 2:
-        return True
 
-    # حساب الزاوية بين المتجهات
-    prev_point = path[-2][0] if len(path) > 1 else path[0][0]
+def _wire_from_loop(loop, circles=None):
+    """
+    سلك مغلق من حلقة نقاط (x, y) على المستوى XZ.
+    circles (k, 3): الدائرة الأصلية لكل ضلع — الأضلاع المتتالية من نفس الدائرة
+    تُبنى كقوس واحد (وجه أسطواني بعد الإكسترود) بدل مقاطع مستقيمة.
+    """
+    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeEdge, BRepBuilderAPI_MakeWire, BRepBuilderAPI_MakePolygon
+
+    if circles is None or np.isnan(circles[:, 2]).all():
+        polygon = BRepBuilderAPI_MakePolygon()
+        for p in loop:
+            polygon.Add(_xz(p))
+        polygon.Close()
+        if not polygon.IsDone():
+            return None
+        return polygon.Wire()
+
+    k = len(loop)
+    wire_builder = BRepBuilderAPI_MakeWire()
+    for a, b, is_arc in loop_edge_runs(circles):
+        edge = _arc_edge(loop, circles[a % k], a, b) if is_arc else None
+        if edge is not None:
+            wire_builder.Add(edge)
+            continue
+        # خط مستقيم (أو قوس شبه مستقيم فشل بناؤه): ضلع لكل مقطع
+        for i in range(a, b):
+            wire_builder.Add(BRepBuilderAPI_MakeEdge(_xz(loop[i % k]), _xz(loop[(i + 1) % k])).Edge())
 
-    # متجه من النقطة السابقة للحالية
-    dx1 = current_point[0] - prev_point[0]
-    dy1 = current_point[1] - prev_point[1]
+    if not wire_builder.IsDone():
+        return None
+    return wire_builder.Wire()
 
-    # متجه من النقطة الحالية للتالية
-    dx2 = next_point[0] - current_point[0]
-    dy2 = next_point[1] - current_point[1]
 
-    # تجنب الزوايا الحادة جداً
-    dot_product = dx1 * dx2 + dy1 * dy2
-    mag1 = (dx1 ** 2 + dy1 ** 2) ** 0.5
-    mag2 = (dx2 ** 2 + dy2 ** 2) ** 0.5
+def _reversed_loop(loop, circles=None):
+    """عكس اتجاه الحلقة مع إبقاء دائرة كل ضلع مطابقة له."""
+    if circles is None:
+        return loop[::-1], None
+    # الضلع j في الحلقة المعكوسة = الضلع (k-2-j) في الأصلية
+    return loop[::-1], np.roll(circles[::-1], -1, axis=0)
 
-    if mag1 == 0 or mag2 == 0:
-        return True
 
-    cos_angle = dot_product / (mag1 * mag2)
-    return cos_angle > -0.9  # تجنب الزوايا الأصغر من 150 درجة
+def build_face_with_holes(outer, holes=(), outer_circles=None, hole_circles=None):
+    """
+    بناء وجه واحد من حد خارجي + ثقوب داخلية (inner wires)
+    - الحلقات بأي اتجاه: الخارجي يُبنى عكس عقارب الساعة والثقوب معها
+    - outer_circles / hole_circles (اختياري): دوائر الأضلاع لبناء أقواس دقيقة
+    """
+    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeFace
 
+    if hole_circles is None:
+        hole_circles = [None] * len(holes)
 
-def build_face_from_polygon(polygon_segments):
-    """بناء وجه من مضلع مغلق"""
-    from OCC.Core.gp import gp_Pnt
-    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakeEdge, BRepBuilderAPI_MakeWire, BRepBuilderAPI_MakeFace
+    def oriented(loop, circles, ccw):
+        if (signed_area(loop) > 0) == ccw:
+            return loop, circles
+        return _reversed_loop(loop, circles)
 
     try:
-        wire_builder = BRepBuilderAPI_MakeWire()
-
-        for p1, p2 in polygon_segments:
-            try:
-                point1 = gp_Pnt(p1[0], 0.0, p1[1])
-                point2 = gp_Pnt(p2[0], 0.0, p2[1])
+        outer_wire = _wire_from_loop(*oriented(outer, outer_circles, True))
+        if outer_wire is None:
+            return None
 
-                edge = BRepBuilderAPI_MakeEdge(point1, point2).Edge()
-                wire_builder.Add(edge)
-            except:
-                continue
+        face_builder = BRepBuilderAPI_MakeFace(outer_wire, True)
+        if not face_builder.IsDone():
+            return None
 
-        if wire_builder.IsDone():
-            wire = wire_builder.Wire()
-            face_builder = BRepBuilderAPI_MakeFace(wire)
+        for hole, circles in zip(holes, hole_circles):
+            hole_wire = _wire_from_loop(*oriented(hole, circles, False))
+            if hole_wire is not None:
+                face_builder.Add(hole_wire)
 
-            if face_builder.IsDone():
-                return face_builder.Face()
+        if face_builder.IsDone():
+            return face_builder.Face()
 
     except Exception as e:
         print(f"⚠️ [face_builder] فشل بناء الوجه: {e}")
@@ -232,20 +291,23 @@ def build_face_from_polygon(polygon_segments):
     return None
 
 
+def _extrusion_vector(depth, axis):
+    from OCC.Core.gp import gp_Vec
+
+    axis = axis.upper()
+    if axis == "X":
+        return gp_Vec(depth, 0.0, 0.0)
+    if axis == "Y":
+        return gp_Vec(0.0, depth, 0.0)
+    return gp_Vec(0.0, 0.0, depth)
+
+
 def perform_fast_extrusion(face, depth, axis):
     """تنفيذ سريع للإكسترود"""
-    from OCC.Core.gp import gp_Vec
     from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakePrism
 
     try:
-        if axis.upper() == "Y":
-            extrusion_vector = gp_Vec(0.0, depth, 0.0)
-        elif axis.upper() == "X":
-            extrusion_vector = gp_Vec(depth, 0.0, 0.0)
-        else:
-            extrusion_vector = gp_Vec(0.0, 0.0, depth)
-
-        prism = BRepPrimAPI_MakePrism(face, extrusion_vector)
+        prism = BRepPrimAPI_MakePrism(face, _extrusion_vector(depth, axis))
 
         if prism.IsDone():
             print("🎉 [smart_extrude] تم الإكسترود بنجاح!")
@@ -258,27 +320,30 @@ def perform_fast_extrusion(face, depth, axis):
 
 
 def perform_complex_extrusion(faces, depth, axis):
-    """معالجة الأشكال المعقدة بثقوب"""
-    from OCC.Core.gp import gp_Vec
+    """
+    إكسترود عدة مناطق منفصلة: prism واحد لكل وجه (الثقوب مبنية داخل الوجه)
+    ثم تجميعها في compound — بدون أي عمليات Boolean
+    """
     from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakePrism
-    from OCC.Core.BRepAlgoAPI import BRepAlgoAPI_Cut
+    from OCC.Core.BRep import BRep_Builder
+    from OCC.Core.TopoDS import TopoDS_Compound
 
     try:
-        # نفترض أن الوجه الأول هو الخارجي والباقي ثقوب
-        main_face = faces[0]
-
-        # إكسترود الوجه الرئيسي
-        if axis.upper() == "Y":
-            extrusion_vector = gp_Vec(0.0, depth, 0.0)
-        else:
-            extrusion_vector = gp_Vec(0.0, 0.0, depth)
-
-        main_prism = BRepPrimAPI_MakePrism(main_face, extrusion_vector)
-
-        if main_prism.IsDone():
-            result_shape = main_prism.Shape()
-            print("🎉 [smart_extrude] تم إكسترود الشكل الرئيسي")
-            return result_shape
+        vec = _extrusion_vector(depth, axis)
+        builder = BRep_Builder()
+        compound = TopoDS_Compound()
+        builder.MakeCompound(compound)
+
+        count = 0
+        for face in faces:
+            prism = BRepPrimAPI_MakePrism(face, vec)
+            if prism.IsDone():
+                builder.Add(compound, prism.Shape())
+                count += 1
+
+        if count:
+            print(f"🎉 [smart_extrude] تم إكسترود {count} منطقة")
+            return compound
 
     except Exception as e:
         print(f"❌ [smart_extrude] فشل معالجة الشكل المعقد: {e}")
@@ -296,7 +361,7 @@ def quick_extrude_fallback(file_path: str, depth: float = 40.0):
     """
     print("🔄 [quick_extrude] استخدام الحل السريع...")
 
-    segments, bbox = load_dxf_segments(file_path)
+    segments, bbox = load_dxf_segments(file_path, as_array=True)
     if not segments:
         return None
 
@@ -304,15 +369,8 @@ def quick_extrude_fallback(file_path: str, depth: float = 40.0):
     from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_MakePolygon, BRepBuilderAPI_MakeFace
     from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakePrism
 
-    # حساب المربع المحيط
-    all_x = []
-    all_y = []
-    for p1, p2 in segments:
-        all_x.extend([p1[0], p2[0]])
-        all_y.extend([p1[1], p2[1]])
-
-    min_x, max_x = min(all_x), max(all_x)
-    min_y, max_y = min(all_y), max(all_y)
+    # المربع المحيط محسوب مسبقاً من المصفوفة
+    min_x, min_y, max_x, max_y = segments.bbox
 
     # بناء مربع بسيط
     width = max_x - min_x
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+🪆 تداخل الحلقات وتصنيف الثقوب (multi-chamber profiles)
+- شجرة احتواء فوق الحلقات المغلقة: فلترة bbox أولاً ثم point-in-polygon
+- العمق الزوجي = حدود خارجية (مادة)، العمق الفردي = ثقب/حجرة
+- الناتج: [(outer, [hole, hole, ...]), ...]  — كل outer يصبح وجه OCC واحد بثقوبه
+"""
+
+from __future__ import annotations
+from typing import List, Tuple
+
+import numpy as np
+
+from tools.planar_faces import signed_area
+
+Region = Tuple[np.ndarray, List[np.ndarray]]
+
+
+def points_in_polygon(pts: np.ndarray, poly: np.ndarray) -> np.ndarray:
+    """اختبار even-odd لعدة نقاط داخل مضلع واحد (vectorized على الأضلاع)."""
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    x1, y1 = poly[:, 0], poly[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+    px = pts[:, 0:1]
+    py = pts[:, 1:2]
+    crosses = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    inside = crosses & (px < x_at)
+    return (inside.sum(axis=1) % 2) == 1
+
+
+def _probe_points(loop: np.ndarray, count: int = 3) -> np.ndarray:
+    """نقاط اختبار على أضلاع الحلقة (منتصفات أضلاع متباعدة) لتفادي الرؤوس المشتركة."""
+    n = len(loop)
+    idx = np.unique(np.linspace(0, n - 1, num=min(count, n)).astype(np.int64))
+    return 0.5 * (loop[idx] + loop[(idx + 1) % n])
+
+
+def build_containment_tree(loops: List[np.ndarray]):
+    """
+    يُعيد (parent, depth) لكل حلقة.
+    parent[i] = أصغر حلقة تحتوي الحلقة i أو -1.
+    """
+    n = len(loops)
+    parent = np.full(n, -1, dtype=np.int64)
+    depth = np.zeros(n, dtype=np.int64)
+    if n < 2:
+        return parent, depth
+
+    areas = np.array([abs(signed_area(l)) for l in loops])
+    bboxes = np.array([[l[:, 0].min(), l[:, 1].min(), l[:, 0].max(), l[:, 1].max()] for l in loops])
+
+    # من الأكبر للأصغر: الأب يُعالج قبل أبنائه دائماً
+    order = np.argsort(-areas, kind="stable")
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+
+    for i in order.tolist():
+        b = bboxes[i]
+        # المرشحون: أكبر مساحة + bbox يحتوي bbox الحلقة
+        cand = np.flatnonzero(
+            (rank < rank[i])
+            & (bboxes[:, 0] <= b[0]) & (bboxes[:, 1] <= b[1])
+            & (bboxes[:, 2] >= b[2]) & (bboxes[:, 3] >= b[3])
+        )
+        if not len(cand):
+            continue
+        # الأصغر مساحة أولاً = الأب المباشر
+        probes = _probe_points(loops[i])
+        for c in cand[np.argsort(areas[cand])].tolist():
+            if points_in_polygon(probes, loops[c]).sum() * 2 > len(probes):
+                parent[i] = c
+                depth[i] = depth[c] + 1
+                break
+    return parent, depth
+
+
+def classify_loops(loops: List[np.ndarray]) -> List[Tuple[int, List[int]]]:
+    """
+    نفس تصنيف nest_loops لكن بأرقام الحلقات: [(outer_index, [hole_index, ...]), ...]
+    (مفيد عندما تحمل الحلقات بيانات موازية مثل الأقواس الأصلية لكل ضلع)
+    """
+    parent, depth = build_containment_tree(loops)
+    regions = {}
+    for i in np.argsort(depth, kind="stable").tolist():
+        if depth[i] % 2 == 0:
+            regions[i] = []
+        else:
+            regions[int(parent[i])].append(i)
+    return list(regions.items())
+
+
+def nest_loops(loops: List[np.ndarray]) -> List[Region]:
+    """
+    تصنيف الحلقات إلى مناطق: كل حلقة بعمق زوجي = حد خارجي، وأبناؤها المباشرون ثقوب.
+    الحلقات تُعاد بالاتجاه عكس عقارب الساعة للخارجي ومع عقارب الساعة للثقوب.
+    """
+    def oriented(loop, ccw):
+        return loop if (signed_area(loop) > 0) == ccw else loop[::-1]
+
+    return [(oriented(loops[o], True), [oriented(loops[h], False) for h in holes])
+            for o, holes in classify_loops(loops)]
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+↔ محرك الإزاحة الهندسية (2D offset) فوق shapely/GEOS
+- حلقات مغلقة (مع الثقوب والتداخل) وخطوط مفتوحة
+- وصلات الزوايا: round / miter / square
+- تنظيف التقاطع الذاتي: make_valid للمدخلات، والناتج من buffer صالح دائماً
+  (الحلقات المتداخلة بعد الإزاحة تندمج، والأجزاء التي تنهار تختفي)
+- دفعات: كل الحلقات/المسافات تُرسل لـ GEOS كمصفوفة واحدة (بدون حلقات Python لكل رأس)
+يُستخدم من ModifyOps.offset ومن مسارات CAM (contour / pocket).
+"""
+
+from __future__ import annotations
+import math
+from typing import List, Sequence
+
+import numpy as np
+
+from tools.loop_nesting import Region, classify_loops
+from tools.planar_faces import signed_area
+
+_HAS_SHAPELY = True
+try:
+    import shapely
+except Exception:
+    _HAS_SHAPELY = False
+
+JOIN_ROUND = "round"
+JOIN_MITER = "miter"
+JOIN_SQUARE = "square"
+JOINS = (JOIN_ROUND, JOIN_MITER, JOIN_SQUARE)
+
+DEFAULT_MITER_LIMIT = 5.0
+DEFAULT_ARC_TOLERANCE = 0.01
+
+
+def _require():
+    if not _HAS_SHAPELY:
+        raise RuntimeError("shapely غير متوفر: محرك الإزاحة يحتاج shapely>=2.")
+
+
+def _join_kwargs(join: str, miter_limit: float) -> dict:
+    """
+    square = زاوية مقصوصة على بعد distance من الرأس (نفس Clipper):
+    mitre بحد 1.0 في GEOS يقص الوصلة عند هذا البعد تماماً.
+    """
+    if join == JOIN_ROUND:
+        return {"join_style": "round"}
+    if join == JOIN_MITER:
+        return {"join_style": "mitre", "mitre_limit": float(miter_limit)}
+    if join == JOIN_SQUARE:
+        return {"join_style": "mitre", "mitre_limit": 1.0}
+    raise ValueError(f"نوع وصلة غير معروف: {join!r} (المتاح: {', '.join(JOINS)})")
+
+
+def quad_segments(distance: float, arc_tolerance: float = DEFAULT_ARC_TOLERANCE) -> int:
+    """عدد الأضلاع لكل ربع دائرة بحيث لا يتجاوز السهم (sagitta) arc_tolerance."""
+    r = abs(float(distance))
+    if r <= arc_tolerance:
+        return 2
+    step = 2.0 * math.acos(1.0 - arc_tolerance / r)
+    return int(min(max(math.ceil((math.pi / 2) / step), 2), 256))
+
+
+# ------------------------------------------------------------
+# 🔁 numpy <-> shapely
+# ------------------------------------------------------------
+def loops_to_polygons(loops: Sequence[np.ndarray]) -> "np.ndarray":
+    """
+    حلقات (k, 2) -> مضلعات shapely صالحة: التداخل يُحدَّد بشجرة الاحتواء
+    (العمق الزوجي = حد خارجي، الفردي = ثقب)، والتقاطع الذاتي يُصلَح بـ make_valid.
+    """
+    _require()
+    loops = [np.asarray(l, dtype=np.float64)[:, :2] for l in loops if len(l) >= 3]
+    if not loops:
+        return np.empty(0, dtype=object)
+    polys = np.array([shapely.Polygon(loops[o], [loops[h] for h in holes])
+                      for o, holes in classify_loops(loops)], dtype=object)
+    bad = ~shapely.is_valid(polys)
+    if bad.any():
+        fixed = shapely.make_valid(polys[bad])
+        # make_valid قد يُعيد GeometryCollection فيها خطوط متبقية: نحتفظ بالمساحات فقط
+        polys[bad] = [shapely.unary_union([p for p in shapely.get_parts(g)
+                                           if p.geom_type in ("Polygon", "MultiPolygon")])
+                      for g in fixed]
+    return polys
+
+
+def polygons_to_regions(geoms, min_area: float = 1e-9) -> List[Region]:
+    """
+    مضلعات/متعددة المضلعات -> [(outer, [hole, ...]), ...]
+    الخارجي عكس عقارب الساعة والثقوب مع عقارب الساعة، بدون تكرار النقطة الأولى.
+    """
+    polys = shapely.get_parts(np.atleast_1d(np.asarray(geoms, dtype=object)))
+    polys = polys[(shapely.get_type_id(polys) == 3) & (shapely.area(polys) > min_area)]
+    if not len(polys):
+        return []
+    rings, ring_poly = shapely.get_rings(polys, return_index=True)
+    coords, ring_idx = shapely.get_coordinates(rings, return_index=True)
+    cuts = np.flatnonzero(np.diff(ring_idx)) + 1
+    parts = np.split(coords, cuts)
+
+    regions: List[Region] = []
+    current = -1
+    for k, pts in enumerate(parts):
+        pts = pts[:-1]
+        if ring_poly[k] != current:
+            current = ring_poly[k]
+            regions.append((pts if signed_area(pts) > 0 else pts[::-1], []))
+        else:
+            regions[-1][1].append(pts if signed_area(pts) < 0 else pts[::-1])
+    return regions
+
+
+def _lines_to_arrays(geoms) -> List[np.ndarray]:
+    lines = shapely.get_parts(np.atleast_1d(np.asarray(geoms, dtype=object)))
+    lines = lines[~shapely.is_empty(lines)]
+    if not len(lines):
+        return []
+    coords, idx = shapely.get_coordinates(lines, return_index=True)
+    return np.split(coords, np.flatnonzero(np.diff(idx)) + 1)
+
+
+# ------------------------------------------------------------
+# ↔ الإزاحة
+# ------------------------------------------------------------
+def offset_polygons(polys, distance: float, join: str = JOIN_ROUND,
+                    miter_limit: float = DEFAULT_MITER_LIMIT,
+                    arc_tolerance: float = DEFAULT_ARC_TOLERANCE):
+    """إزاحة مصفوفة مضلعات shapely (موجب = للخارج) ودمج النتائج المتداخلة."""
+    _require()
+    if not len(polys):
+        return shapely.Polygon()
+    out = shapely.buffer(polys, float(distance), quad_segs=quad_segments(distance, arc_tolerance),
+                         **_join_kwargs(join, miter_limit))
+    return shapely.unary_union(out)
+
+
+def offset_loops(loops: Sequence[np.ndarray], distance: float, join: str = JOIN_ROUND,
+                 miter_limit: float = DEFAULT_MITER_LIMIT,
+                 arc_tolerance: float = DEFAULT_ARC_TOLERANCE) -> List[Region]:
+    """
+    إزاحة مجموعة حلقات مغلقة دفعة واحدة.
+    distance موجبة = توسيع المادة (الخارجي يكبر والثقوب تصغر)، سالبة = تقليص.
+    يُعيد مناطق [(outer, [holes])]؛ قائمة فارغة إن انهار الشكل بالكامل.
+    """
+    polys = loops_to_polygons(loops)
+    return polygons_to_regions(offset_polygons(polys, distance, join, miter_limit, arc_tolerance))
+
+
+def offset_passes(loops: Sequence[np.ndarray], distances: Sequence[float], join: str = JOIN_ROUND,
+                  miter_limit: float = DEFAULT_MITER_LIMIT,
+                  arc_tolerance: float = DEFAULT_ARC_TOLERANCE) -> List[List[Region]]:
+    """
+    عدة إزاحات لنفس الحلقات (مسارات pocket / contour متتالية) في استدعاء GEOS واحد.
+    النتيجة بنفس ترتيب distances؛ المسافات التي ينهار عندها الشكل تُعيد [].
+    """
+    polys = loops_to_polygons(loops)
+    distances = np.asarray(distances, dtype=np.float64).ravel()
+    if not len(polys) or not len(distances):
+        return [[] for _ in distances]
+    # شكل واحد مدمج لكل مسافة: (len(distances),) buffer مُتجه
+    merged = shapely.unary_union(polys)
+    quad = quad_segments(float(np.abs(distances).max()), arc_tolerance)
+    out = shapely.buffer(np.full(len(distances), merged, dtype=object), distances,
+                         quad_segs=quad, **_join_kwargs(join, miter_limit))
+    return [polygons_to_regions(g) for g in out]
+
+
+def offset_polyline(points, distance: float, join: str = JOIN_ROUND,
+                    miter_limit: float = DEFAULT_MITER_LIMIT,
+                    arc_tolerance: float = DEFAULT_ARC_TOLERANCE) -> List[np.ndarray]:
+    """
+    إزاحة خط مفتوح (موجب = يسار اتجاه الرسم).
+    الأجزاء التي تنهار في الزوايا الضيقة تُحذف، لذلك قد تعود عدة قطع.
+    """
+    _require()
+    pts = np.asarray(points, dtype=np.float64)[:, :2]
+    if len(pts) < 2:
+        return []
+    curve = shapely.offset_curve(shapely.LineString(pts), float(distance),
+                                 quad_segs=quad_segments(distance, arc_tolerance),
+                                 **_join_kwargs(join, miter_limit))
+    return _lines_to_arrays(curve)
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+🔷 استخراج الحلقات المغلقة من مقاطع DXF عبر رسم مستوٍ (planar arrangement)
+- كل مقطع = حافة غير موجهة -> نصفا حافة (half-edges)
+- عند كل رأس تُرتّب أنصاف الحواف حسب الزاوية
+- المشي على الوجوه: next(h) = أول نصف حافة مع عقارب الساعة بعد twin(h) عند نهايته
+- كل وجه محدود يظهر كدورة موجبة المساحة (عكس عقارب الساعة)
+الكلفة: O(E log E) للفرز + O(E) للمشي، بدون أي حدود على عدد المقاطع أو الحلقات.
+"""
+
+from __future__ import annotations
+from typing import List, Optional
+
+import numpy as np
+
+from profile.segment_array import as_segment_array
+
+
+class PlanarGraph:
+    """رسم مستوٍ مبني من مقاطع: رؤوس فريدة + حواف غير مكررة."""
+
+    def __init__(self, vertices: np.ndarray, edges: np.ndarray,
+                 edge_source: Optional[np.ndarray] = None):
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        # رقم المقطع الأصلي لكل حافة (لاسترجاع القوس/الخط الذي جاءت منه)
+        if edge_source is None:
+            edge_source = np.arange(len(self.edges))
+        self.edge_source = np.asarray(edge_source, dtype=np.int64)
+
+    # ------------------------------------------------------------
+    # 🏗️ البناء
+    # ------------------------------------------------------------
+    @classmethod
+    def from_segments(cls, segments, decimals: int = 4,
+                      vertex_ids: Optional[np.ndarray] = None,
+                      vertices: Optional[np.ndarray] = None) -> "PlanarGraph":
+        """
+        بناء الرسم من مقاطع.
+        - افتراضياً: دمج النقاط بالتقريب إلى decimals خانات
+        - أو تمرير vertex_ids (2N,) و vertices جاهزة من مرحلة لحام خارجية
+        """
+        segs = as_segment_array(segments)
+        if vertex_ids is None:
+            vertices, vertex_ids = _merge_rounded(segs.points, decimals)
+        edges = np.asarray(vertex_ids, dtype=np.int64).reshape(-1, 2)
+        keep = _clean_edges(edges)
+        return cls(vertices, edges[keep], keep)
+
+    # ------------------------------------------------------------
+    # ✂️ إزالة الخيوط المفتوحة (رؤوس من الدرجة 1)
+    # ------------------------------------------------------------
+    def prune_filaments(self) -> int:
+        """يحذف كل الحواف المتدلية (لا تنتمي لأي حلقة). يُعيد عدد المحذوف."""
+        e = self.edges
+        n_v = len(self.vertices)
+        if not len(e):
+            return 0
+
+        deg = np.bincount(e.ravel(), minlength=n_v)
+        if (deg[deg > 0] >= 2).all():
+            return 0
+
+        # CSR: الحواف الملامسة لكل رأس
+        ends = e.ravel()
+        order = np.argsort(ends, kind="stable")
+        start = np.concatenate([[0], np.cumsum(np.bincount(ends, minlength=n_v))])
+        edge_of = (order // 2).tolist()
+        start = start.tolist()
+        deg = deg.tolist()
+        alive = bytearray(b"\x01") * len(e)
+        el = e.tolist()
+
+        stack = [v for v in range(n_v) if deg[v] == 1]
+        removed = 0
+        while stack:
+            v = stack.pop()
+            if deg[v] != 1:
+                continue
+            for k in range(start[v], start[v + 1]):
+                ei = edge_of[k]
+                if alive[ei]:
+                    alive[ei] = 0
+                    removed += 1
+                    a, b = el[ei]
+                    other = b if a == v else a
+                    deg[v] -= 1
+                    deg[other] -= 1
+                    if deg[other] == 1:
+                        stack.append(other)
+                    break
+
+        if removed:
+            mask = np.frombuffer(bytes(alive), dtype=np.uint8).astype(bool)
+            self.edges = e[mask]
+            self.edge_source = self.edge_source[mask]
+        return removed
+
+    # ------------------------------------------------------------
+    # 🔁 المشي على الوجوه
+    # ------------------------------------------------------------
+    def face_cycles(self, with_edges: bool = False) -> List[np.ndarray]:
+        """
+        كل دورات الوجوه (موجبة = وجه محدود، سالبة = حدود خارجية لمركّبة).
+        with_edges=True: كل عنصر (رؤوس، أرقام الحواف) حيث الحافة k تصل الرأس k بالتالي.
+        """
+        e = self.edges
+        if not len(e):
+            return []
+        v = self.vertices
+
+        # نصف الحافة 2i: u->v ، 2i+1: v->u  (twin = h ^ 1)
+        origin = e.ravel()
+        dest = e[:, ::-1].ravel()
+        d = v[dest] - v[origin]
+        angle = np.arctan2(d[:, 1], d[:, 0])
+
+        # ترتيب أنصاف الحواف حول كل رأس حسب الزاوية (عكس عقارب الساعة)
+        order = np.lexsort((angle, origin))
+        pos = np.empty_like(order)
+        pos[order] = np.arange(len(order))
+        counts = np.bincount(origin, minlength=len(v))
+        first = np.cumsum(counts) - counts
+
+        # next(h) = نصف الحافة السابق (مع عقارب الساعة) لـ twin(h) حول رأس النهاية
+        twin = np.arange(len(origin)) ^ 1
+        o = origin[twin]
+        prev_pos = first[o] + (pos[twin] - first[o] - 1) % counts[o]
+        nxt = order[prev_pos].tolist()
+
+        cycles: List[np.ndarray] = []
+        seen = bytearray(len(nxt))
+        for h0 in range(len(nxt)):
+            if seen[h0]:
+                continue
+            cyc = []
+            h = h0
+            while not seen[h]:
+                seen[h] = 1
+                cyc.append(h)
+                h = nxt[h]
+            cycles.append(np.asarray(cyc, dtype=np.int64))
+
+        if with_edges:
+            return [(origin[c], c >> 1) for c in cycles]
+        return [origin[c] for c in cycles]
+
+
+def _merge_rounded(points: np.ndarray, decimals: int):
+    """دمج النقاط المتطابقة بعد التقريب (lexsort أسرع من np.unique(axis=0))."""
+    keys = np.round(points, decimals)
+    order = np.lexsort((keys[:, 1], keys[:, 0]))
+    k = keys[order]
+    new_group = np.empty(len(k), dtype=bool)
+    new_group[:1] = True
+    new_group[1:] = (k[1:] != k[:-1]).any(axis=1)
+    group = np.cumsum(new_group) - 1
+    ids = np.empty(len(k), dtype=np.int64)
+    ids[order] = group
+    return k[new_group], ids
+
+
+def _clean_edges(edges: np.ndarray) -> np.ndarray:
+    """أرقام الحواف الباقية بعد حذف الصفرية والمكررة (بغض النظر عن الاتجاه)."""
+    valid = np.flatnonzero(edges[:, 0] != edges[:, 1])
+    if not len(valid):
+        return valid
+    key = np.sort(edges[valid], axis=1)
+    packed = key[:, 0] * (int(key.max()) + 1) + key[:, 1]
+    _, idx = np.unique(packed, return_index=True)
+    return valid[np.sort(idx)]
+
+
+def signed_area(loop: np.ndarray) -> float:
+    """مساحة مضلع مُوقّعة (موجبة = عكس عقارب الساعة)."""
+    x, y = loop[:, 0], loop[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def extract_loops(segments, decimals: int = 4, min_area: float = 1e-9,
+                  graph: Optional[PlanarGraph] = None, return_sources: bool = False):
+    """
+    الواجهة الرئيسية: تُعيد كل الحلقات المغلقة كمصفوفات نقاط (k, 2)
+    باتجاه عكس عقارب الساعة، مرتبة تنازلياً حسب المساحة.
+    return_sources=True: تُعيد (loops, sources) حيث sources[i][k] رقم المقطع الأصلي
+    للضلع من النقطة k إلى k+1 في الحلقة i.
+    """
+    if graph is None:
+        graph = PlanarGraph.from_segments(segments, decimals=decimals)
+    graph.prune_filaments()
+
+    faces = [f for f in graph.face_cycles(with_edges=True) if len(f[0]) >= 3]
+    if not faces:
+        return ([], []) if return_sources else []
+    cycles = [f[0] for f in faces]
+
+    # المساحات المُوقّعة لكل الدورات دفعة واحدة (shoelace + reduceat)
+    lengths = np.fromiter((len(c) for c in cycles), dtype=np.int64, count=len(cycles))
+    starts = np.cumsum(lengths) - lengths
+    cur = np.concatenate(cycles)
+    nxt = np.roll(cur, -1)
+    nxt[starts + lengths - 1] = cur[starts]
+    v = graph.vertices
+    cross = v[cur, 0] * v[nxt, 1] - v[nxt, 0] * v[cur, 1]
+    areas = 0.5 * np.add.reduceat(cross, starts)
+
+    keep = np.flatnonzero(areas > min_area)
+    keep = keep[np.argsort(-areas[keep], kind="stable")].tolist()
+    loops = [v[cycles[i]] for i in keep]
+    if return_sources:
+        return loops, [graph.edge_source[faces[i][1]] for i in keep]
+    return loops
+
+
+def loop_to_segments(loop: np.ndarray):
+    """تحويل حلقة نقاط إلى قائمة ((x1,y1),(x2,y2)) مغلقة."""
+    pts = loop.tolist()
+    return [((a[0], a[1]), (b[0], b[1])) for a, b in zip(pts, pts[1:] + pts[:1])]
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+command_stack.py
+------------------------------------------------------------
+تراجع / تقدم (Undo / Redo) بنمط الأوامر مع فروقات مضغوطة
+- كل أمر = مجموعة فروقات (deltas) وليس نسخة كاملة من المشهد:
+    * SketchDelta: صفوف العناصر المتأثرة فقط قبل/بعد (من SketchDocument)
+    * ActorDelta: actors أُضيفت / حُذفت / تحركت (مراجع فقط بدون نسخ بيانات)
+    * actions: أزواج (undo, redo) لحالة خارج المشهد (مثل قيود الرسم)
+- transaction(label) يجمع كل ما يحدث داخلها في أمر واحد
+- ميزانية ذاكرة قابلة للتعديل: أقدم الأوامر تُحذف عند تجاوزها
+- trimmed يُطلق كلما حُذفت أوامر من السجل (ليحرر العرض ما لم يعد قابلاً للاستعادة)
+------------------------------------------------------------
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import List, Optional, Set
+
+from PySide6.QtCore import QObject, QSettings, Signal
+
+# 💾 ميزانية الذاكرة الافتراضية لسجل التراجع (MB) — قابلة للتعديل من الإعدادات
+DEFAULT_BUDGET_MB = 64
+_SETTINGS_KEY = "history/memory_budget_mb"
+# حد أقصى لعدد الأوامر بغض النظر عن الحجم
+MAX_COMMANDS = 500
+
+
+def _settings() -> QSettings:
+    return QSettings("AlumProCNC", "AlumProCNC")
+
+
+def _actor_nbytes(actor) -> int:
+    """حجم بيانات actor تقريباً (يُحتفظ به حياً ما دام في السجل)."""
+    try:
+        data = actor.GetMapper().GetInput()
+        return int(data.GetActualMemorySize()) * 1024 if data is not None else 0
+    except Exception:
+        return 0
+
+
+class ActorDelta:
+    """actors أُضيفت / حُذفت / تحركت داخل أمر واحد."""
+
+    __slots__ = ("renderer", "lod", "added", "removed", "moved")
+
+    def __init__(self, renderer, lod=None):
+        self.renderer = renderer
+        self.lod = lod
+        self.added: list = []
+        self.removed: list = []
+        self.moved: list = []       # (actor, old_pos, new_pos)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.moved)
+
+    @property
+    def nbytes(self) -> int:
+        # المحذوفة فقط تُبقي بيانات لا يملكها المشهد
+        return sum(_actor_nbytes(a) for a in self.removed) + 64 * (len(self.added) + len(self.moved))
+
+    def _add(self, actor):
+        self.renderer.AddActor(actor)
+        if self.lod is not None:
+            self.lod.register(actor)
+
+    def _remove(self, actor):
+        if self.lod is not None:
+            self.lod.unregister(actor)
+        self.renderer.RemoveActor(actor)
+
+    def undo(self):
+        for actor, old, _ in reversed(self.moved):
+            actor.SetPosition(*old)
+        for actor in self.added:
+            self._remove(actor)
+        for actor in self.removed:
+            self._add(actor)
+
+    def redo(self):
+        for actor in self.removed:
+            self._remove(actor)
+        for actor in self.added:
+            self._add(actor)
+        for actor, _, new in self.moved:
+            actor.SetPosition(*new)
+
+
+class Command:
+    """أمر واحد في السجل: اسم + فروقات تُطبَّق بالترتيب (وعكسه للتراجع)."""
+
+    __slots__ = ("label", "doc_delta", "actor_delta", "actions")
+
+    def __init__(self, label: str, doc_delta=None, actor_delta: Optional[ActorDelta] = None,
+                 actions: Optional[list] = None):
+        self.label = label
+        self.doc_delta = doc_delta
+        self.actor_delta = actor_delta
+        self.actions = actions or []
+
+    @property
+    def nbytes(self) -> int:
+        n = 128
+        if self.doc_delta is not None:
+            n += self.doc_delta.nbytes
+        if self.actor_delta is not None:
+            n += self.actor_delta.nbytes
+        return n + 64 * len(self.actions)
+
+    def undo(self, doc):
+        for undo, _ in reversed(self.actions):
+            undo()
+        if self.actor_delta is not None:
+            self.actor_delta.undo()
+        if self.doc_delta is not None:
+            self.doc_delta.undo(doc)
+
+    def redo(self, doc):
+        if self.doc_delta is not None:
+            self.doc_delta.redo(doc)
+        if self.actor_delta is not None:
+            self.actor_delta.redo()
+        for _, redo in self.actions:
+            redo()
+
+
+class CommandStack(QObject):
+    """سجل التراجع/التقدم لعارض واحد (نموذج الرسم + actors المشهد)."""
+
+    changed = Signal()
+    # أوامر خرجت من السجل نهائياً (ميزانية / مسح التقدم / clear)
+    trimmed = Signal()
+
+    def __init__(self, document, renderer, lod=None, parent=None):
+        super().__init__(parent)
+        self.doc = document
+        self.renderer = renderer
+        self.lod = lod
+        self._undo: List[Command] = []
+        self._redo: List[Command] = []
+        self._bytes = 0
+
+        self._depth = 0
+        self._label = ""
+        self._actors: Optional[ActorDelta] = None
+        self._actions: list = []
+        self._replaying = False
+
+        try:
+            mb = float(_settings().value(_SETTINGS_KEY, DEFAULT_BUDGET_MB))
+        except (TypeError, ValueError):
+            mb = DEFAULT_BUDGET_MB
+        self.budget_bytes = int(mb * 1024 * 1024)
+
+    # ------------------------------------------------------------
+    # ⚙️ الإعدادات
+    # ------------------------------------------------------------
+    def set_memory_budget(self, mb: float):
+        """ميزانية ذاكرة السجل (تُحفظ في إعدادات البرنامج)."""
+        mb = max(1.0, float(mb))
+        self.budget_bytes = int(mb * 1024 * 1024)
+        _settings().setValue(_SETTINGS_KEY, mb)
+        self._enforce_budget()
+
+    @property
+    def memory_used(self) -> int:
+        return self._bytes
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._depth > 0
+
+    def referenced_ids(self) -> Set[int]:
+        """IDs عناصر الرسم التي قد يعيدها أي أمر في السجل (تراجع أو تقدم)."""
+        ids: Set[int] = set()
+        for cmd in self._undo + self._redo:
+            if cmd.doc_delta is not None:
+                ids.update(cmd.doc_delta.ids().tolist())
+        return ids
+
+    # ------------------------------------------------------------
+    # 📝 التسجيل
+    # ------------------------------------------------------------
+    @contextmanager
+    def transaction(self, label: str):
+        """كل تعديل داخل الكتلة يصبح أمراً واحداً (المعاملات المتداخلة تندمج في الخارجية)."""
+        if self._replaying:
+            yield self
+            return
+        if self._depth == 0:
+            self._label = label
+            self._actors = ActorDelta(self.renderer, self.lod)
+            self._actions = []
+        self._depth += 1
+        self.doc.begin_capture()
+        try:
+            yield self
+        finally:
+            doc_delta = self.doc.end_capture()
+            self._depth -= 1
+            if self._depth == 0:
+                actors, self._actors = self._actors, None
+                actions, self._actions = self._actions, []
+                if doc_delta is not None or actors or actions:
+                    self._push(Command(self._label, doc_delta, actors or None, actions))
+
+    def _delta(self) -> Optional[ActorDelta]:
+        return None if self._replaying else self._actors
+
+    def actor_added(self, actor):
+        """تسجيل actor أُضيف للمشهد (داخل transaction فقط)."""
+        d = self._delta()
+        if d is not None and actor is not None:
+            if actor in d.removed:
+                d.removed.remove(actor)
+            else:
+                d.added.append(actor)
+
+    def actor_removed(self, actor):
+        d = self._delta()
+        if d is not None and actor is not None:
+            if actor in d.added:
+                d.added.remove(actor)
+            else:
+                d.removed.append(actor)
+
+    def actor_moved(self, actor, old_pos, new_pos):
+        d = self._delta()
+        if d is not None and actor is not None:
+            d.moved.append((actor, tuple(old_pos), tuple(new_pos)))
+
+    def record_action(self, undo, redo):
+        """تغيير خارج النموذج والمشهد (داخل transaction فقط): undo()/redo() عند التراجع/التقدم."""
+        if self._delta() is not None:
+            self._actions.append((undo, redo))
+
+    def _push(self, cmd: Command):
+        trimmed = bool(self._redo)
+        for old in self._redo:
+            self._bytes -= old.nbytes
+        self._redo.clear()
+        self._undo.append(cmd)
+        self._bytes += cmd.nbytes
+        if not self._enforce_budget() and trimmed:
+            self.trimmed.emit()
+        self.changed.emit()
+
+    def _enforce_budget(self) -> bool:
+        dropped = False
+        while self._undo and (self._bytes > self.budget_bytes or len(self._undo) > MAX_COMMANDS):
+            if len(self._undo) == 1:
+                break  # الأمر الأخير يبقى دائماً قابلاً للتراجع
+            self._bytes -= self._undo.pop(0).nbytes
+            dropped = True
+        if dropped:
+            self.trimmed.emit()
+        return dropped
+
+    # ------------------------------------------------------------
+    # ↩️ التنفيذ
+    # ------------------------------------------------------------
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo_label(self) -> str:
+        return self._undo[-1].label if self._undo else ""
+
+    def redo_label(self) -> str:
+        return self._redo[-1].label if self._redo else ""
+
+    def undo(self) -> bool:
+        return self._replay(self._undo, self._redo, lambda cmd: cmd.undo(self.doc))
+
+    def redo(self) -> bool:
+        return self._replay(self._redo, self._undo, lambda cmd: cmd.redo(self.doc))
+
+    def _replay(self, source: List[Command], target: List[Command], apply) -> bool:
+        """
+        تطبيق آخر أمر في source ثم نقله إلى target — بعد نجاح التطبيق فقط.
+        إن فشل التطبيق يبقى الأمر في مكانه (وحجمه محسوب) ويُعاد رفع الاستثناء.
+        """
+        if not source or self._depth:
+            return False
+        cmd = source[-1]
+        self._replaying = True
+        try:
+            apply(cmd)
+            target.append(source.pop())
+        finally:
+            self._replaying = False
+            self.changed.emit()
+        return True
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        self.trimmed.emit()
+        self.changed.emit()
@@ -4,8 +4,11 @@ grid_axes_manager.py
 نسخة مستقرة وخفيفة (من كودك القديم)
 """
 
+import numpy as np
 import vtk
 
+from viewer import vtk_bridge
+
 
 class GridAxesManager:
     def __init__(self, renderer):
@@ -20,34 +23,8 @@ class GridAxesManager:
         grid_size = 10
         spacing = 10.0
 
-        points = vtk.vtkPoints()
-        lines = vtk.vtkCellArray()
-
-        # خطوط على محور X
-        for i in range(-grid_size, grid_size + 1):
-            p1 = (i * spacing, -grid_size * spacing, 0.0)
-            p2 = (i * spacing, grid_size * spacing, 0.0)
-            id1 = points.InsertNextPoint(*p1)
-            id2 = points.InsertNextPoint(*p2)
-            line = vtk.vtkLine()
-            line.GetPointIds().SetId(0, id1)
-            line.GetPointIds().SetId(1, id2)
-            lines.InsertNextCell(line)
-
-        # خطوط على محور Y
-        for j in range(-grid_size, grid_size + 1):
-            p1 = (-grid_size * spacing, j * spacing, 0.0)
-            p2 = (grid_size * spacing, j * spacing, 0.0)
-            id1 = points.InsertNextPoint(*p1)
-            id2 = points.InsertNextPoint(*p2)
-            line = vtk.vtkLine()
-            line.GetPointIds().SetId(0, id1)
-            line.GetPointIds().SetId(1, id2)
-            lines.InsertNextCell(line)
-
-        grid_poly = vtk.vtkPolyData()
-        grid_poly.SetPoints(points)
-        grid_poly.SetLines(lines)
+        ticks = np.arange(-grid_size, grid_size + 1) * spacing
+        grid_poly = vtk_bridge.polydata(*vtk_bridge.grid_lines(ticks, -grid_size * spacing, grid_size * spacing))
 
         mapper = vtk.vtkPolyDataMapper()
         mapper.SetInputData(grid_poly)
@@ -4,11 +4,16 @@ interactor_style.py — الرسم السريع + الإدخال اليدوي +
 """
 
 import math
+from contextlib import nullcontext
+
 import vtk
 from PySide6.QtWidgets import QMenu
 from PySide6.QtGui import QAction
 from PySide6.QtCore import QPoint
 
+# نصف قطر الالتقاط بالبكسل (يُحوَّل لوحدات العالم حسب التكبير الحالي)
+PICK_RADIUS_PX = 8
+
 
 class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
     def __init__(self, renderer, viewer_ref):
@@ -27,7 +32,8 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
 
         # 🧩 قائمة الزر اليمين البسيطة
         self.menu = QMenu(viewer_ref)
-        self.selected_actor = None
+        self.selected_actor = None      # عنصر غير رسم (بروفايل / مجسم)
+        self.selection = []             # IDs عناصر sketch_doc المحددة
         self.dragging = False
         self.drag_start = None
         self.actor_start_pos = None
@@ -53,15 +59,97 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
     # أدوات اختيار وتحريك
     # ----------------------------------------------------------------------
     def _pick_point(self, x, y):
+        """نقطة على مستوى الرسم (z = self.Z) تحت المؤشر — تقاطع شعاع/مستوى تحليلي."""
+        hit = self._ray_plane_point(x, y)
+        if hit is not None:
+            return hit
+        # الكاميرا موازية للمستوى تقريباً: نرجع للـ picker
         self.picker.Pick(x, y, 0, self.renderer)
         pos = self.picker.GetPickPosition()
         return (pos[0], pos[1], self.Z)
 
+    def _display_to_world(self, x, y, depth):
+        ren = self.renderer
+        ren.SetDisplayPoint(x, y, depth)
+        ren.DisplayToWorld()
+        wx, wy, wz, w = ren.GetWorldPoint()
+        if w == 0.0:
+            return None
+        return (wx / w, wy / w, wz / w)
+
+    def _ray_plane_point(self, x, y):
+        """شعاع من near إلى far عبر البكسل (x, y) ثم تقاطعه مع z = self.Z."""
+        near = self._display_to_world(x, y, 0.0)
+        far = self._display_to_world(x, y, 1.0)
+        if near is None or far is None:
+            return None
+        dz = far[2] - near[2]
+        if abs(dz) < 1e-12:
+            return None
+        t = (self.Z - near[2]) / dz
+        return (near[0] + t * (far[0] - near[0]), near[1] + t * (far[1] - near[1]), self.Z)
+
+    def _world_per_pixel(self, x, y):
+        a = self._ray_plane_point(x, y)
+        b = self._ray_plane_point(x + 1, y)
+        if a is None or b is None:
+            return None
+        return math.hypot(b[0] - a[0], b[1] - a[1])
+
+    def _pick_entity(self, x, y):
+        """عناصر الرسم: استعلام على الفهرس المكاني (الخلايا القريبة فقط) -> IDs المجموعة."""
+        index = getattr(self.viewer_ref, "sketch_index", None)
+        doc = getattr(self.viewer_ref, "sketch_doc", None)
+        scale = self._world_per_pixel(x, y)
+        if index is None or doc is None or not scale:
+            return None
+        p = self._ray_plane_point(x, y)
+        key, _ = index.nearest(p[0], p[1], PICK_RADIUS_PX * scale)
+        if key is None:
+            return None
+        return [int(i) for i in doc.group_members(key)]
+
+    def _set_selection(self, ids):
+        self.selection = [int(i) for i in (ids if ids is not None else ())]
+        view = getattr(self.viewer_ref, "sketch_view", None)
+        if view is not None:
+            view.set_selection(self.selection)
+
+    def _select_at(self, x, y):
+        """تحديد عنصر رسم أو (إن لم يوجد) actor آخر؛ يُعيد True إن تم تحديد شيء."""
+        if self.selected_actor:
+            self.selected_actor.GetProperty().SetColor(0.3, 0.3, 0.3)
+            self.selected_actor = None
+        ids = self._pick_entity(x, y)
+        self._set_selection(ids)
+        if ids:
+            return True
+        self.selected_actor = self._pick_actor(x, y)
+        return self.selected_actor is not None
+
     def _pick_actor(self, x, y):
+        # باقي العناصر (بروفايلات / مجسمات): picker عادي (actors الرسم غير قابلة للالتقاط)
         prop_picker = vtk.vtkPropPicker()
         prop_picker.Pick(x, y, 0, self.renderer)
         return prop_picker.GetActor()
 
+    def _history(self, label):
+        """أمر تراجع واحد عبر سجل العارض (إن وُجد)."""
+        history = getattr(self.viewer_ref, "history", None)
+        return history.transaction(label) if history is not None else nullcontext()
+
+    def _record(self, kind, *args):
+        history = getattr(self.viewer_ref, "history", None)
+        if history is not None:
+            getattr(history, kind)(*args)
+
+    def _moving_actor(self):
+        """actor يُحرَّك أثناء السحب: actor التحديد المجمّع لعناصر الرسم، أو العنصر المحدد."""
+        if self.selection:
+            view = getattr(self.viewer_ref, "sketch_view", None)
+            return view.selection_actor if view is not None else None
+        return self.selected_actor
+
     # ----------------------------------------------------------------------
     def _clear_preview(self):
         if self.preview_actor:
@@ -77,12 +165,13 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
     def on_right_click(self, obj, evt):
         inter = self.GetInteractor()
         x, y = inter.GetEventPosition()
-        self.selected_actor = self._pick_actor(x, y)
+        self._select_at(x, y)
+        self.viewer_ref.update_view()
         qt_pos = self.viewer_ref.mapToGlobal(QPoint(x, y))
         self.menu.popup(qt_pos)
 
     def _menu_move(self):
-        if not self.selected_actor:
+        if not self.selection and not self.selected_actor:
             print("⚠️ لا يوجد عنصر محدد للتحريك.")
             return
         self.current_tool = "move"
@@ -90,7 +179,11 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         print("↔️ Move mode — انقر واسحب للتحريك")
 
     def _menu_copy(self):
-        if self.selected_actor and self.selected_actor.GetMapper():
+        doc = getattr(self.viewer_ref, "sketch_doc", None)
+        if self.selection and doc is not None:
+            self._clipboard = doc.records(self.selection)
+            print(f"📄 Copied {len(self.selection)} sketch entities.")
+        elif self.selected_actor and self.selected_actor.GetMapper():
             poly = vtk.vtkPolyData()
             poly.DeepCopy(self.selected_actor.GetMapper().GetInput())
             self._clipboard = poly
@@ -102,31 +195,51 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         if not self._clipboard:
             print("⚠️ Clipboard empty.")
             return
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(self._clipboard)
-        actor = vtk.vtkActor()
-        actor.SetMapper(mapper)
-        actor.GetProperty().SetColor(0.3, 0.3, 0.3)
-        self.renderer.AddActor(actor)
+        with self._history("Paste"):
+            if isinstance(self._clipboard, vtk.vtkPolyData):
+                mapper = vtk.vtkPolyDataMapper()
+                mapper.SetInputData(self._clipboard)
+                actor = vtk.vtkActor()
+                actor.SetMapper(mapper)
+                actor.GetProperty().SetColor(0.3, 0.3, 0.3)
+                self.renderer.AddActor(actor)
+                self._record("actor_added", actor)
+                self._set_selection(())
+                self.selected_actor = actor
+            else:
+                # عناصر رسم: نسخة بـ IDs جديدة في نفس النموذج
+                new_ids = self.viewer_ref.sketch_doc.add_records(self._clipboard)
+                self.selected_actor = None
+                self._set_selection(new_ids.tolist())
         self.viewer_ref.update_view()
-        self.selected_actor = actor
         self.current_tool = "move"
+        self.dragging = False
         print("📋 Pasted — ready to move.")
 
     def _menu_delete(self):
-        actor = self.viewer_ref.selected_actor or self.selected_actor
+        if self.selection:
+            # حذف عناصر الرسم (ملصقات القياس تُحذف معها عبر SketchView)
+            with self._history("Delete"):
+                self.viewer_ref.sketch_doc.remove(self.selection)
+            self._set_selection(())
+            self.viewer_ref.update_view()
+            print("🗑️ Deleted shape and its dimensions.")
+            return
+        actor = self.selected_actor
         if actor:
-            # حذف الشكل
-            self.renderer.RemoveActor(actor)
-
-            # حذف القياسات المرتبطة (إن وجدت)
-            if hasattr(self, "actor_dims_map") and actor in self.actor_dims_map:
-                for d in self.actor_dims_map[actor]:
-                    self.renderer.RemoveActor(d)
-                del self.actor_dims_map[actor]
+            with self._history("Delete"):
+                # حذف الشكل
+                self.renderer.RemoveActor(actor)
+                self._record("actor_removed", actor)
+
+                # حذف القياسات المرتبطة (إن وجدت)
+                if hasattr(self, "actor_dims_map") and actor in self.actor_dims_map:
+                    for d in self.actor_dims_map[actor]:
+                        self.renderer.RemoveActor(d)
+                        self._record("actor_removed", d)
+                    del self.actor_dims_map[actor]
 
             self.selected_actor = None
-            self.viewer_ref.selected_actor = None
             self.viewer_ref.update_view()
             print("🗑️ Deleted shape and its dimensions.")
         else:
@@ -143,14 +256,9 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         self.current_tool = tool
         # 🟦 وضع التحديد (Select Mode)
         if tool == "select":
-            actor = self._pick_actor(x, y)
-            if actor:
-                # إزالة تمييز سابق
-                if self.selected_actor and self.selected_actor != actor:
-                    self.selected_actor.GetProperty().SetColor(0.3, 0.3, 0.3)
-
-                self.selected_actor = actor
-                actor.GetProperty().SetColor(0.1, 0.6, 1.0)  # أزرق مميز
+            if self._select_at(x, y):
+                if self.selected_actor:
+                    self.selected_actor.GetProperty().SetColor(0.1, 0.6, 1.0)  # أزرق مميز
                 print("🔵 [Select] عنصر محدد.")
             else:
                 print("⚪ [Select] لا يوجد عنصر محدد.")
@@ -158,51 +266,80 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
             return
         # ✂️ أدوات التعديل (Trim / Offset / Mirror / Fillet)
         if tool == "trim":
-            print("✂️ [Trim] Executing trim...")
-            self.viewer_ref.sketch_ops.trim_at(world)
+            scale = self._world_per_pixel(x, y)
+            radius = PICK_RADIUS_PX * scale if scale else 20.0
+            # Shift = Extend بدل Trim (نفس الأداة)
+            if inter.GetShiftKey():
+                print("↦ [Extend] Executing extend...")
+                self.viewer_ref.sketch_ops.extend_at(world, radius)
+            else:
+                print("✂️ [Trim] Executing trim...")
+                self.viewer_ref.sketch_ops.trim_at(world, radius)
             return
 
         elif tool == "offset":
             print("↔️ [Offset] Executing offset...")
-            actor = self.viewer_ref.selected_actor or self.selected_actor
-            if actor:
-                self.viewer_ref.sketch_ops.modify_ops.offset(actor, distance=10.0)
+            if self.selection:
+                self.viewer_ref.sketch_ops.modify_ops.offset(self.selection, distance=10.0)
             else:
                 print("⚠️ No selected object for offset.")
             return
 
         elif tool == "mirror":
             print("🔁 [Mirror] Executing mirror...")
-            actor = self.viewer_ref.selected_actor or self.selected_actor
-            if actor:
+            if self.selection:
                 axis = "X" if inter.GetShiftKey() else "Y"
-                self.viewer_ref.sketch_ops.modify_ops.mirror(actor, axis)
+                self.viewer_ref.sketch_ops.modify_ops.mirror(self.selection, axis)
             else:
                 print("⚠️ No selected object for mirror.")
             return
 
         elif tool == "fillet":
+            scale = self._world_per_pixel(x, y)
+            radius = PICK_RADIUS_PX * scale if scale else 20.0
+            # Shift = تدوير كل زوايا الحلقة (التحديد الحالي أو مجموعة العنصر المنقور)
+            if inter.GetShiftKey():
+                ids = self.selection or self._pick_entity(x, y)
+                if ids:
+                    print("◔ [Fillet] Rounding loop corners...")
+                    self.viewer_ref.sketch_ops.modify_ops.fillet_loop(ids, radius=5.0)
+                self.points.clear()
+                return
             self.points.append(world)
             if len(self.points) == 2:
                 p1, p2 = self.points
-                print("◔ [Fillet] Creating arc...")
-                self.viewer_ref.sketch_ops.modify_ops.fillet(p1, p2, radius=5.0)
+                print("◔ [Fillet] Creating tangent arc...")
+                self.viewer_ref.sketch_ops.modify_ops.fillet(p1, p2, radius=5.0, pick_radius=radius)
                 self.points.clear()
             return
 
 
 
         # 🟦 وضع التحريك
-        if tool == "move" and self.selected_actor:
+        moving = self._moving_actor()
+        if tool == "move" and moving:
             if not self.dragging:
                 self.dragging = True
                 self.drag_start = world
-                pos = self.selected_actor.GetPosition()
+                pos = moving.GetPosition()
                 self.actor_start_pos = (pos[0], pos[1], pos[2])
                 print("🚚 Move start")
             else:
                 self.dragging = False
                 self.current_tool = None
+                pos = moving.GetPosition()
+                if self.selection:
+                    # تثبيت الإزاحة في النموذج ثم إرجاع actor التحديد لموضعه
+                    with self._history("Move"):
+                        self.viewer_ref.sketch_doc.translate(
+                            self.selection, pos[0] - self.actor_start_pos[0], pos[1] - self.actor_start_pos[1])
+                        # العناصر المرتبطة بقيود تتبع (المحدد ثابت في موضعه الجديد)
+                        self.viewer_ref.sketch_ops.solve_moved(self.selection)
+                    self._set_selection(self.selection)
+                    self.viewer_ref.update_view()
+                else:
+                    with self._history("Move"):
+                        self._record("actor_moved", moving, self.actor_start_pos, pos)
                 print("✅ Move applied")
             return
 
@@ -257,11 +394,12 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         p2 = self._pick_point(x, y)
 
         # تحريك مباشر في وضع Move
-        if self.current_tool == "move" and self.dragging and self.selected_actor:
+        moving = self._moving_actor()
+        if self.current_tool == "move" and self.dragging and moving:
             dx = p2[0] - self.drag_start[0]
             dy = p2[1] - self.drag_start[1]
             pos = self.actor_start_pos
-            self.selected_actor.SetPosition(pos[0] + dx, pos[1] + dy, pos[2])
+            moving.SetPosition(pos[0] + dx, pos[1] + dy, pos[2])
             self.viewer_ref.update_view()
             return
 
@@ -283,6 +421,13 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
     def on_key_press(self, obj, evt):
         inter = self.GetInteractor()
         key = inter.GetKeySym()
+        # ↩️ Ctrl+Z تراجع — Ctrl+Y / Ctrl+Shift+Z تقدم
+        if inter.GetControlKey() and key and key.lower() in ("z", "y"):
+            if key.lower() == "y" or inter.GetShiftKey():
+                self.viewer_ref.redo()
+            else:
+                self.viewer_ref.undo()
+            return
         if key in "0123456789.-":
             if self.dim_input:
                 pos = inter.GetEventPosition()
@@ -365,7 +510,7 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
                 text = self.dim_input.input.text().strip()
             else:
                 return
-        if not text or not self.points:
+        if not text:
             return
         text = text.lower().replace('x', '*')
         parts = text.split('*')
@@ -377,20 +522,35 @@ class SketchInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
                 pass
         if not values:
             return
+        if not self.points:
+            # 📐 لا يوجد رسم جارٍ: تعديل بُعد العناصر المحددة (القيمة الثانية للعنصر الثاني، مثل w*h للمستطيل)
+            if self.selection:
+                for eid, val in zip(self.selection, values):
+                    self.viewer_ref.sketch_ops.dimension(eid, val)
+            if self.dim_input:
+                self.dim_input.hide()
+            return
         p1 = self.points[0]
         cur = self._pick_point(*self.GetInteractor().GetEventPosition())
         vx, vy = cur[0]-p1[0], cur[1]-p1[1]
         mag = math.hypot(vx, vy) or 1.0
         ux, uy = vx/mag, vy/mag
-        if self.current_tool == "circle":
-            self.viewer_ref.sketch_ops.circle(p1, values[0])
-        elif self.current_tool == "rect":
-            w, h = (values+[values[0]])[:2]
-            self.viewer_ref.sketch_ops.rectangle(p1, w, h)
-        elif self.current_tool == "line":
-            val = values[0]
-            p2 = (p1[0]+ux*val, p1[1]+uy*val, self.Z)
-            self.viewer_ref.sketch_ops.line(p1, p2)
+        # القيمة المكتوبة تبقى بُعداً قائداً (قيد) على العنصر بعد إنشائه
+        ops = self.viewer_ref.sketch_ops
+        with self._history((self.current_tool or "").capitalize()):
+            if self.current_tool == "circle":
+                eid = ops.circle(p1, values[0])
+                ops.dimension(eid, abs(values[0]))
+            elif self.current_tool == "rect":
+                w, h = (values+[values[0]])[:2]
+                ids = ops.rectangle(p1, w, h)
+                ops.dimension(ids[0], abs(w))
+                ops.dimension(ids[1], abs(h))
+            elif self.current_tool == "line":
+                val = values[0]
+                p2 = (p1[0]+ux*val, p1[1]+uy*val, self.Z)
+                eid = ops.line(p1, p2)
+                ops.dimension(eid, abs(val))
         self.points.clear()
         self._clear_preview()
         if self.dim_input:
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+lod_manager.py
+------------------------------------------------------------
+مستويات التفاصيل (LOD) أثناء تحريك الكاميرا
+- لكل actor كبير نسخة خشنة (vtkQuadricClustering) تُبنى عند التسجيل (مع تحميل الشكل)
+  وليس عند أول تفاعل، حتى لا يتجمد أول دوران (~0.2 ث لمليون مثلث)
+- أثناء التفاعل (دوران/تحريك/تكبير، بما فيه وضع Space) يُبدّل الـ mapper للنسخة الخشنة
+  فقط إذا كان زمن الإطار الكامل الأخير أكبر من الهدف (frame-time target)
+- عند التوقف تعود التفاصيل الكاملة (الـ mappers الكاملة تحتفظ ببياناتها على GPU)
+------------------------------------------------------------
+"""
+
+import time
+
+import vtk
+from PySide6.QtCore import QSettings
+
+# 🎯 زمن الإطار المستهدف أثناء التفاعل (ms) — قابل للتعديل من الإعدادات
+DEFAULT_FRAME_TIME_MS = 33.0
+_SETTINGS_KEY = "viewer/lod_frame_time_ms"
+
+# الأشكال الأصغر من هذا لا تحتاج نسخة خشنة
+MIN_CELLS_FOR_LOD = 20000
+# عدد خلايا الشبكة (divisions) لكل محور في النسخة الخشنة
+COARSE_DIVISIONS = 128
+
+
+def _settings() -> QSettings:
+    return QSettings("AlumProCNC", "AlumProCNC")
+
+
+class _LODEntry:
+    __slots__ = ("full_mapper", "coarse_mapper")
+
+    def __init__(self, full_mapper, coarse_mapper):
+        self.full_mapper = full_mapper
+        self.coarse_mapper = coarse_mapper
+
+
+class LODManager:
+    """تبديل actors الكبيرة لنسخ خشنة أثناء التفاعل."""
+
+    def __init__(self, render_window):
+        self.render_window = render_window
+        self._entries = {}
+        self._interacting = False
+        self._coarse_active = False
+        self._last_full_render = 0.0
+        self._render_started = 0.0
+
+        try:
+            self.frame_time_ms = float(_settings().value(_SETTINGS_KEY, DEFAULT_FRAME_TIME_MS))
+        except (TypeError, ValueError):
+            self.frame_time_ms = DEFAULT_FRAME_TIME_MS
+
+        # قياس زمن كل render كامل (بين StartEvent و EndEvent)
+        render_window.AddObserver("StartEvent", self._on_render_start)
+        render_window.AddObserver("EndEvent", self._on_render_end)
+
+    # ------------------------------------------------------------
+    # ⚙️ الإعدادات
+    # ------------------------------------------------------------
+    def set_frame_time_target(self, ms: float):
+        """زمن الإطار المستهدف أثناء التفاعل (يُحفظ في إعدادات البرنامج)."""
+        self.frame_time_ms = max(1.0, float(ms))
+        _settings().setValue(_SETTINGS_KEY, self.frame_time_ms)
+
+    # ------------------------------------------------------------
+    # 📋 التسجيل
+    # ------------------------------------------------------------
+    def register(self, actor):
+        """تسجيل actor وبناء نسخته الخشنة فوراً؛ الصغيرة تُتجاهل لأن عرضها سريع أصلاً."""
+        mapper = actor.GetMapper()
+        if mapper is None:
+            return
+        data = mapper.GetInput()
+        if data is None or data.GetNumberOfCells() < MIN_CELLS_FOR_LOD:
+            return
+        self._entries[actor] = _LODEntry(mapper, _build_coarse_mapper(mapper))
+
+    def unregister(self, actor):
+        entry = self._entries.pop(actor, None)
+        if entry is not None:
+            actor.SetMapper(entry.full_mapper)
+
+    def clear(self):
+        for actor in list(self._entries):
+            self.unregister(actor)
+
+    def attach_style(self, style):
+        """ربط نمط تفاعل (Trackball أو Sketch) ببداية ونهاية التفاعل."""
+        style.AddObserver("StartInteractionEvent", lambda *_: self.begin_interaction())
+        style.AddObserver("EndInteractionEvent", lambda *_: self.end_interaction())
+
+    # ------------------------------------------------------------
+    # 🔁 التبديل
+    # ------------------------------------------------------------
+    def begin_interaction(self):
+        self._interacting = True
+        if self._entries and self._last_full_render * 1000.0 > self.frame_time_ms:
+            self._use_coarse(True)
+
+    def end_interaction(self):
+        self._interacting = False
+        if self._coarse_active:
+            self._use_coarse(False)
+            self.render_window.Render()
+
+    def _use_coarse(self, coarse: bool):
+        for actor, entry in self._entries.items():
+            actor.SetMapper(entry.coarse_mapper if coarse else entry.full_mapper)
+        self._coarse_active = coarse
+
+    def _on_render_start(self, *_):
+        self._render_started = time.perf_counter()
+
+    def _on_render_end(self, *_):
+        # يُقاس فقط زمن الإطارات بالتفاصيل الكاملة
+        if not self._coarse_active:
+            self._last_full_render = time.perf_counter() - self._render_started
+
+
+def _build_coarse_mapper(full_mapper):
+    """نسخة مبسطة من بيانات الـ mapper بنفس إعدادات الألوان."""
+    data = full_mapper.GetInput()
+
+    decimate = vtk.vtkQuadricClustering()
+    decimate.SetInputData(data)
+    decimate.SetNumberOfDivisions(COARSE_DIVISIONS, COARSE_DIVISIONS, COARSE_DIVISIONS)
+    decimate.AutoAdjustNumberOfDivisionsOn()
+    decimate.CopyCellDataOn()
+    decimate.Update()
+
+    coarse = vtk.vtkPolyDataMapper()
+    coarse.ShallowCopy(full_mapper)
+    coarse.SetInputData(decimate.GetOutput())
+    return coarse
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+render_scheduler.py
+------------------------------------------------------------
+تجميع طلبات الرسم (render coalescing)
+- كل request() يضع علامة "يحتاج رسم" فقط
+- مؤقت Qt واحد يرسم مرة واحدة على الأكثر لكل إطار شاشة
+  مهما كان عدد أحداث الماوس بينهما
+------------------------------------------------------------
+"""
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtGui import QGuiApplication
+
+DEFAULT_REFRESH_HZ = 60.0
+
+
+def _frame_interval_ms() -> int:
+    screen = QGuiApplication.primaryScreen() if QGuiApplication.instance() else None
+    hz = screen.refreshRate() if screen else DEFAULT_REFRESH_HZ
+    if not hz or hz < 1:
+        hz = DEFAULT_REFRESH_HZ
+    return max(1, int(1000.0 / hz))
+
+
+class RenderScheduler(QObject):
+    """رسم مؤجل ومُجمّع لنافذة VTK واحدة."""
+
+    def __init__(self, render_window, parent=None):
+        super().__init__(parent)
+        self.render_window = render_window
+        self._dirty = False
+        self.renders = 0
+        self.requests = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(_frame_interval_ms())
+        self._timer.timeout.connect(self.flush)
+
+    def request(self):
+        """طلب رسم؛ الطلبات المتتالية داخل نفس الإطار تُدمج في رسم واحد."""
+        self.requests += 1
+        self._dirty = True
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """رسم فوري إذا كان هناك طلب معلّق."""
+        self._timer.stop()
+        if not self._dirty:
+            return
+        self._dirty = False
+        self.renders += 1
+        self.render_window.Render()
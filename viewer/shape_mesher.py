@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+shape_mesher.py
+------------------------------------------------------------
+تحويل TopoDS_Shape إلى شبكة مثلثات NumPy جاهزة لـ VTK
+- BRepMesh_IncrementalMesh (متوازي) مرة واحدة لكل الشكل
+- نقاط كل وجه تُنسخ إلى مصفوفة واحدة مع تطبيق TopLoc_Location دفعة واحدة
+- حواف الوجوه (feature edges) من PolygonOnTriangulation بدون تكرار
+  (التمييز عبر TopTools_IndexedMapOfShape: نفس TShape + Location، أياً كان الاتجاه)
+- normals لكل رأس تُحسب داخل كل وجه (الحواف الحادة تبقى حادة)
+
+الكلفة: pythonocc لا يعرض مخزناً مباشراً (buffer) لعقد Poly_Triangulation ومثلثاتها،
+فالنسخ استدعاء واحد عبر الربط لكل عقدة/مثلث/عقدة حافة (خطي في حجم الشبكة).
+القيم تُقرأ بـ np.fromiter إلى مصفوفة محجوزة مسبقاً بدون قوائم tuples وسيطة،
+وكل ما بعدها (التحويل، normals، الفهارس) عمليات NumPy على الوجه كاملاً.
+------------------------------------------------------------
+"""
+
+from __future__ import annotations
+from typing import List, Optional
+
+import numpy as np
+
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepBndLib import brepbndlib
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_REVERSED
+from OCC.Core.TopExp import TopExp_Explorer, topexp
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import topods
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+
+# دقة التقسيم الافتراضية: نسبة من قطر الصندوق المحيط
+RELATIVE_DEFLECTION = 0.001
+MIN_DEFLECTION = 0.005
+ANGULAR_DEFLECTION = 0.35  # راديان (~20°)
+
+
+class ShapeMesh:
+    """شبكة مثلثات + خطوط حواف كمصفوفات NumPy."""
+
+    __slots__ = ("points", "normals", "triangles", "edge_points", "edge_normals", "edge_lines")
+
+    def __init__(self, points, normals, triangles, edge_points, edge_normals, edge_lines):
+        self.points = points            # (P, 3) float64
+        self.normals = normals          # (P, 3) float32
+        self.triangles = triangles      # (T, 3) int64
+        self.edge_points = edge_points  # (Q, 3) float64
+        self.edge_normals = edge_normals  # (Q, 3) float32 (من الوجه المجاور، لإضاءة متسقة)
+        self.edge_lines = edge_lines    # (L, 2) int64 فهارس في edge_points
+
+    @property
+    def n_triangles(self) -> int:
+        return len(self.triangles)
+
+
+def _auto_deflection(shape) -> float:
+    box = Bnd_Box()
+    brepbndlib.Add(shape, box)
+    if box.IsVoid():
+        return MIN_DEFLECTION
+    x0, y0, z0, x1, y1, z1 = box.Get()
+    diag = float(np.sqrt((x1 - x0) ** 2 + (y1 - y0) ** 2 + (z1 - z0) ** 2))
+    return max(diag * RELATIVE_DEFLECTION, MIN_DEFLECTION)
+
+
+def _transform(pts: np.ndarray, loc: TopLoc_Location) -> np.ndarray:
+    """تطبيق تحويل الموضع على كل النقاط دفعة واحدة."""
+    if loc.IsIdentity():
+        return pts
+    trsf = loc.Transformation()
+    m = np.array([[trsf.Value(r, c) for c in range(1, 5)] for r in range(1, 4)])
+    return pts @ m[:, :3].T + m[:, 3]
+
+
+def _nodes(tri) -> np.ndarray:
+    n = tri.NbNodes()
+    flat = np.fromiter((v for i in range(1, n + 1) for v in tri.Node(i).Coord()),
+                       dtype=np.float64, count=3 * n)
+    return flat.reshape(n, 3)
+
+
+def _triangles(tri) -> np.ndarray:
+    n = tri.NbTriangles()
+    flat = np.fromiter((v for i in range(1, n + 1) for v in tri.Triangle(i).Get()),
+                       dtype=np.int64, count=3 * n)
+    return flat.reshape(n, 3) - 1
+
+
+def _polygon_nodes(poly) -> np.ndarray:
+    n = poly.NbNodes()
+    return np.fromiter((poly.Node(i) for i in range(1, n + 1)), dtype=np.int64, count=n) - 1
+
+
+def _face_normals(pts: np.ndarray, tris: np.ndarray) -> np.ndarray:
+    """normals لكل رأس = مجموع normals المثلثات المجاورة (موزونة بالمساحة)."""
+    a, b, c = pts[tris[:, 0]], pts[tris[:, 1]], pts[tris[:, 2]]
+    fn = np.cross(b - a, c - a)
+    vn = np.zeros_like(pts)
+    for k in range(3):
+        np.add.at(vn, tris[:, k], fn)
+    length = np.linalg.norm(vn, axis=1, keepdims=True)
+    return (vn / np.maximum(length, 1e-20)).astype(np.float32)
+
+
+def mesh_shape(shape, deflection: Optional[float] = None,
+               angular: float = ANGULAR_DEFLECTION, parallel: bool = True) -> ShapeMesh:
+    """تقسيم الشكل إلى مثلثات (BRepMesh) ونسخ الناتج إلى مصفوفات NumPy."""
+    if deflection is None:
+        deflection = _auto_deflection(shape)
+    BRepMesh_IncrementalMesh(shape, float(deflection), False, float(angular), bool(parallel))
+
+    pts_chunks: List[np.ndarray] = []
+    nrm_chunks: List[np.ndarray] = []
+    tri_chunks: List[np.ndarray] = []
+    edge_pts: List[np.ndarray] = []
+    edge_nrm: List[np.ndarray] = []
+    edge_lines: List[np.ndarray] = []
+    # كل حافة مرة واحدة: الفهرس في خريطة الأشكال (IsSame) بدل hash قد يتصادم
+    edge_map = TopTools_IndexedMapOfShape()
+    topexp.MapShapes(shape, TopAbs_EDGE, edge_map)
+    seen_edges = np.zeros(edge_map.Size() + 1, dtype=bool)
+    offset = 0
+    edge_offset = 0
+
+    exp = TopExp_Explorer(shape, TopAbs_FACE)
+    while exp.More():
+        face = topods.Face(exp.Current())
+        exp.Next()
+
+        loc = TopLoc_Location()
+        tri = BRep_Tool.Triangulation(face, loc)
+        if tri is None:
+            continue
+
+        nodes = _nodes(tri)
+        n_nodes = len(nodes)
+        tris = _triangles(tri)
+        if face.Orientation() == TopAbs_REVERSED:
+            tris = tris[:, ::-1]
+
+        nodes = _transform(nodes, loc)
+        normals = _face_normals(nodes, tris)
+        pts_chunks.append(nodes)
+        nrm_chunks.append(normals)
+        tri_chunks.append(tris + offset)
+
+        # الحواف: polygon على مثلثات هذا الوجه (كل حافة تُؤخذ مرة واحدة فقط)
+        eexp = TopExp_Explorer(face, TopAbs_EDGE)
+        while eexp.More():
+            edge = topods.Edge(eexp.Current())
+            eexp.Next()
+            key = edge_map.FindIndex(edge)
+            if key and seen_edges[key]:
+                continue
+            poly = BRep_Tool.PolygonOnTriangulation(edge, tri, loc)
+            if poly is None:
+                continue
+            seen_edges[key] = True
+            idx = _polygon_nodes(poly)
+            if len(idx) < 2:
+                continue
+            edge_pts.append(nodes[idx])
+            edge_nrm.append(normals[idx])
+            k = np.arange(edge_offset, edge_offset + len(idx) - 1)
+            edge_lines.append(np.stack([k, k + 1], axis=1))
+            edge_offset += len(idx)
+
+        offset += n_nodes
+
+    def cat(chunks, shape_, dtype):
+        return np.concatenate(chunks).astype(dtype, copy=False) if chunks else np.empty(shape_, dtype=dtype)
+
+    return ShapeMesh(
+        cat(pts_chunks, (0, 3), np.float64),
+        cat(nrm_chunks, (0, 3), np.float32),
+        cat(tri_chunks, (0, 3), np.int64),
+        cat(edge_pts, (0, 3), np.float64),
+        cat(edge_nrm, (0, 3), np.float32),
+        cat(edge_lines, (0, 2), np.int64),
+    )
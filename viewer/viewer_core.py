@@ -12,8 +12,12 @@ viewer_core.py
 ------------------------------------------------------------
 """
 
+import numpy as np
 import vtk
 
+from viewer import vtk_bridge
+from viewer.lod_manager import LODManager
+
 
 class ViewerCore:
     """نواة العرض في Fusion Viewer"""
@@ -26,6 +30,9 @@ class ViewerCore:
         self.renderer.GradientBackgroundOn()
         render_window.AddRenderer(self.renderer)
 
+        # مستويات التفاصيل أثناء التفاعل
+        self.lod = LODManager(render_window)
+
         # تهيئة الكاميرا
         self._setup_camera()
 
@@ -51,27 +58,11 @@ class ViewerCore:
     # ------------------------------------------------------------
     def _add_grid(self, size=200, spacing=10, color=(0.85, 0.85, 0.85)):
         """إنشاء شبكة بسيطة على المحور XY"""
-        append = vtk.vtkAppendPolyData()
-
-        for i in range(-size, size + spacing, spacing):
-            # خطوط X
-            line_x = vtk.vtkLineSource()
-            line_x.SetPoint1(-size, i, 0)
-            line_x.SetPoint2(size, i, 0)
-            line_x.Update()
-            append.AddInputData(line_x.GetOutput())
-
-            # خطوط Y
-            line_y = vtk.vtkLineSource()
-            line_y.SetPoint1(i, -size, 0)
-            line_y.SetPoint2(i, size, 0)
-            line_y.Update()
-            append.AddInputData(line_y.GetOutput())
-
-        append.Update()
+        ticks = np.arange(-size, size + spacing, spacing, dtype=np.float64)
+        polydata = vtk_bridge.polydata(*vtk_bridge.grid_lines(ticks, -size, size))
 
         mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(append.GetOutput())
+        mapper.SetInputData(polydata)
         actor = vtk.vtkActor()
         actor.SetMapper(mapper)
         actor.GetProperty().SetColor(*color)
@@ -105,73 +96,66 @@ class ViewerCore:
         marker_widget.SetEnabled(True)
         marker_widget.InteractiveOff()
 
-    def display_shape(self, shape):
+    def display_shape(self, shape, deflection=None):
         """
-        عرض شكل TopoDS_Shape داخل مشهد VTK (سريع جدًا).
-        يجمع كل الخطوط في PolyData واحدة لتقليل الضغط.
+        عرض شكل TopoDS_Shape داخل مشهد VTK كسطح مظلل + حواف.
+        - تقسيم BRepMesh متوازي، ثم نسخ المثلثات والحواف إلى NumPy (انظر كلفة النسخ في shape_mesher)
+        - actor واحد و vtkPolyData واحدة (مثلثات + خطوط ملونة عبر cell scalars)
         """
-        import vtk
-        from OCC.Core.BRep import BRep_Tool
-        from OCC.Core.TopExp import TopExp_Explorer
-        from OCC.Core.TopAbs import TopAbs_EDGE
-        from OCC.Core.gp import gp_Pnt
+        from viewer.shape_mesher import mesh_shape
 
         if shape is None or shape.IsNull():
             print("⚠️ [ViewerCore] الشكل فارغ، لا يمكن عرضه.")
-            return
+            return None
 
         try:
-            points = vtk.vtkPoints()
-            lines = vtk.vtkCellArray()
-            exp = TopExp_Explorer(shape, TopAbs_EDGE)
-            point_id = 0
-            count = 0
-
-            # 🧩 جمع كل النقاط والخطوط معًا
-            while exp.More():
-                edge = exp.Current()
-                curve, first, last = BRep_Tool.Curve(edge)
-                if curve is not None:
-                    p1 = gp_Pnt()
-                    p2 = gp_Pnt()
-                    curve.D0(first, p1)
-                    curve.D0(last, p2)
-
-                    id1 = point_id
-                    id2 = point_id + 1
-                    points.InsertNextPoint(p1.X(), p1.Y(), p1.Z())
-                    points.InsertNextPoint(p2.X(), p2.Y(), p2.Z())
-
-                    line = vtk.vtkLine()
-                    line.GetPointIds().SetId(0, id1)
-                    line.GetPointIds().SetId(1, id2)
-                    lines.InsertNextCell(line)
-
-                    point_id += 2
-                    count += 1
-
-                exp.Next()
-
-            # 🧱 إنشاء الشكل النهائي دفعة واحدة
-            polydata = vtk.vtkPolyData()
-            polydata.SetPoints(points)
-            polydata.SetLines(lines)
+            mesh = mesh_shape(shape, deflection)
+            polydata = _mesh_to_polydata(mesh)
 
             mapper = vtk.vtkPolyDataMapper()
             mapper.SetInputData(polydata)
+            mapper.SetScalarModeToUseCellData()
+            mapper.SetColorModeToDirectScalars()
+            # الخطوط فوق السطح بدون z-fighting
+            mapper.SetResolveCoincidentTopologyToPolygonOffset()
 
             actor = vtk.vtkActor()
             actor.SetMapper(mapper)
-            actor.GetProperty().SetColor(0.2, 0.5, 0.9)
-            actor.GetProperty().SetLineWidth(1.5)
+            prop = actor.GetProperty()
+            prop.SetLineWidth(1.5)
+            prop.SetSpecular(0.25)
+            prop.SetSpecularPower(30)
 
             self.renderer.AddActor(actor)
+            self.lod.register(actor)
             self.renderer.ResetCamera()
-            print(f"🟢 [ViewerCore] تم عرض {count} خط داخل مشهد VTK بنجاح (عرض سريع).")
+            self.renderer.GetRenderWindow().Render()
+            print(f"🟢 [ViewerCore] تم عرض {mesh.n_triangles} مثلث و {len(mesh.edge_lines)} خط حافة داخل مشهد VTK.")
+            return actor
 
         except Exception as e:
             print(f"❌ [ViewerCore] فشل عرض الشكل داخل VTK: {e}")
+            return None
+
+
+# ------------------------------------------------------------
+# 🎨 ألوان العرض المظلل
+# ------------------------------------------------------------
+SHADED_FACE_COLOR = (110, 160, 215)
+SHADED_EDGE_COLOR = (25, 45, 80)
 
 
+def _mesh_to_polydata(mesh) -> vtk.vtkPolyData:
+    """ShapeMesh -> vtkPolyData واحدة (نقاط السطح ثم نقاط الحواف)."""
+    n_surf = len(mesh.points)
+    points = np.concatenate([mesh.points, mesh.edge_points])
 
+    polydata = vtk_bridge.polydata(points, lines=mesh.edge_lines + n_surf, polys=mesh.triangles)
+    vtk_bridge.set_point_normals(polydata, np.concatenate([mesh.normals, mesh.edge_normals]))
 
+    # ترتيب الخلايا في vtkPolyData: الخطوط ثم المضلعات
+    colors = np.empty((len(mesh.edge_lines) + len(mesh.triangles), 3), dtype=np.uint8)
+    colors[:len(mesh.edge_lines)] = SHADED_EDGE_COLOR
+    colors[len(mesh.edge_lines):] = SHADED_FACE_COLOR
+    vtk_bridge.set_cell_colors(polydata, colors)
+    return polydata
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+vtk_bridge.py
+------------------------------------------------------------
+جسر NumPy -> VTK بدون حلقات بايثون وبدون نسخ حيث أمكن
+- النقاط: مصفوفة (N, 3) متجاورة تُشارك مباشرة مع vtkPoints (zero-copy)
+- الخلايا: (n, k) فهارس -> vtkCellArray.SetData(offsets, connectivity)
+- المصفوفات المُشاركة تُحفظ كمرجع على كائن VTK نفسه حتى لا تُحرَّر قبله
+------------------------------------------------------------
+"""
+
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+import vtk
+from vtkmodules.util.numpy_support import (
+    numpy_to_vtk, numpy_to_vtkIdTypeArray, get_vtk_array_type
+)
+
+# نوع vtkIdType في هذا البناء (int64 عادة)
+_ID_DTYPE = np.int64 if vtk.vtkIdTypeArray().GetDataTypeSize() == 8 else np.int32
+
+
+def _keep_alive(vtk_obj, *arrays):
+    """ربط عمر المصفوفات بعمر كائن VTK (يبقى المرجع ما دام الكائن حياً)."""
+    refs = getattr(vtk_obj, "_np_refs", None)
+    if refs is None:
+        refs = []
+        vtk_obj._np_refs = refs
+    refs.extend(arrays)
+
+
+def as_vtk_array(arr: np.ndarray, name: Optional[str] = None, array_type: Optional[int] = None):
+    """مصفوفة NumPy متجاورة -> vtkDataArray بدون نسخ."""
+    arr = np.ascontiguousarray(arr)
+    if array_type is not None and get_vtk_array_type(arr.dtype) != array_type:
+        arr = np.ascontiguousarray(arr, dtype=_numpy_dtype(array_type))
+    out = numpy_to_vtk(arr, deep=False)
+    _keep_alive(out, arr)
+    if name:
+        out.SetName(name)
+    return out
+
+
+def _numpy_dtype(vtk_type: int):
+    return {
+        vtk.VTK_UNSIGNED_CHAR: np.uint8,
+        vtk.VTK_FLOAT: np.float32,
+        vtk.VTK_DOUBLE: np.float64,
+        vtk.VTK_INT: np.int32,
+    }[vtk_type]
+
+
+def vtk_points(points: np.ndarray) -> vtk.vtkPoints:
+    """(N, 3) أو (N, 2) -> vtkPoints (الإحداثي الثالث صفر لـ (N, 2))."""
+    pts = np.asarray(points)
+    if pts.ndim == 2 and pts.shape[1] == 2:
+        pts = np.column_stack([pts, np.zeros(len(pts), dtype=pts.dtype)])
+    if pts.dtype not in (np.float32, np.float64):
+        pts = pts.astype(np.float64)
+    pts = np.ascontiguousarray(pts.reshape(-1, 3))
+
+    out = vtk.vtkPoints()
+    out.SetData(as_vtk_array(pts))
+    return out
+
+
+def vtk_cells(connectivity: np.ndarray) -> vtk.vtkCellArray:
+    """(n, k) فهارس (كل الخلايا بنفس عدد الرؤوس) -> vtkCellArray."""
+    conn = np.ascontiguousarray(np.asarray(connectivity, dtype=_ID_DTYPE))
+    n = conn.shape[0]
+    k = conn.shape[1] if conn.ndim == 2 else 0
+    flat = conn.reshape(-1)
+    offsets = np.arange(0, (n + 1) * k, k, dtype=_ID_DTYPE) if k else np.zeros(1, dtype=_ID_DTYPE)
+
+    vtk_offsets = numpy_to_vtkIdTypeArray(offsets, deep=False)
+    vtk_conn = numpy_to_vtkIdTypeArray(flat, deep=False)
+    cells = vtk.vtkCellArray()
+    cells.SetData(vtk_offsets, vtk_conn)
+    _keep_alive(cells, offsets, flat)
+    return cells
+
+
+def polydata(points: np.ndarray, lines: Optional[np.ndarray] = None,
+             polys: Optional[np.ndarray] = None, verts: Optional[np.ndarray] = None) -> vtk.vtkPolyData:
+    """بناء vtkPolyData كاملة من مصفوفات NumPy."""
+    pd = vtk.vtkPolyData()
+    pd.SetPoints(vtk_points(points))
+    if verts is not None:
+        pd.SetVerts(vtk_cells(np.asarray(verts).reshape(-1, 1)))
+    if lines is not None:
+        pd.SetLines(vtk_cells(lines))
+    if polys is not None:
+        pd.SetPolys(vtk_cells(polys))
+    return pd
+
+
+def segments_polydata(segments: np.ndarray, plane: str = "XZ",
+                      offset=(0.0, 0.0)) -> vtk.vtkPolyData:
+    """
+    مقاطع 2D (N, 2, 2) -> خطوط VTK على المستوى المطلوب.
+    plane="XZ": (x, y) -> (x, 0, y) كما في عرض البروفايلات، "XY": (x, y, 0).
+    """
+    seg = np.asarray(segments, dtype=np.float64).reshape(-1, 2)
+    n_pts = len(seg)
+    pts = np.zeros((n_pts, 3), dtype=np.float64)
+    u, v = (0, 2) if plane.upper() == "XZ" else (0, 1)
+    pts[:, u] = seg[:, 0] + offset[0]
+    pts[:, v] = seg[:, 1] + offset[1]
+    lines = np.arange(n_pts, dtype=_ID_DTYPE).reshape(-1, 2)
+    return polydata(pts, lines=lines)
+
+
+def grid_lines(ticks: np.ndarray, lo: float, hi: float, z: float = 0.0):
+    """
+    نقاط وخطوط شبكة على المستوى XY: خط موازٍ لـ Y عند كل x في ticks وخط موازٍ لـ X عند كل y.
+    يُعيد (points (4n, 3), lines (2n, 2)).
+    """
+    n = len(ticks)
+    pts = np.empty((4 * n, 3), dtype=np.float64)
+    pts[:, 2] = z
+    # خطوط ثابتة x: (t, lo) -> (t, hi)
+    pts[0:2 * n:2, 0] = ticks
+    pts[0:2 * n:2, 1] = lo
+    pts[1:2 * n:2, 0] = ticks
+    pts[1:2 * n:2, 1] = hi
+    # خطوط ثابتة y: (lo, t) -> (hi, t)
+    pts[2 * n::2, 0] = lo
+    pts[2 * n::2, 1] = ticks
+    pts[2 * n + 1::2, 0] = hi
+    pts[2 * n + 1::2, 1] = ticks
+    lines = np.arange(4 * n).reshape(-1, 2)
+    return pts, lines
+
+
+def set_cell_colors(pd: vtk.vtkPolyData, colors: np.ndarray, name: str = "Colors"):
+    """ألوان RGB (uint8) لكل خلية."""
+    arr = as_vtk_array(np.asarray(colors, dtype=np.uint8).reshape(-1, 3), name, vtk.VTK_UNSIGNED_CHAR)
+    pd.GetCellData().SetScalars(arr)
+
+
+def set_point_normals(pd: vtk.vtkPolyData, normals: np.ndarray):
+    arr = as_vtk_array(np.asarray(normals, dtype=np.float32).reshape(-1, 3), "Normals")
+    pd.GetPointData().SetNormals(arr)
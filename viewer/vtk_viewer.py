@@ -12,8 +12,14 @@ from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from vtkmodules.vtkInteractionStyle import vtkInteractorStyleTrackballCamera
 
 from viewer.viewer_core import ViewerCore
+from viewer import vtk_bridge
+from viewer.render_scheduler import RenderScheduler
+from viewer.command_stack import CommandStack
 from viewer.grid_axes_manager import GridAxesManager
 from draw.sketch_ops import SketchOps
+from draw.sketch_index import SketchIndex
+from draw.sketch_document import SketchDocument
+from draw.sketch_constraints import SketchConstraints
 from draw.modify_ops import ModifyOps
 from viewer.dim_input_manager import DimInputManager
 from viewer.interactor_style import SketchInteractorStyle
@@ -37,11 +43,22 @@ class VTKViewer(QWidget):
         self.core = ViewerCore(self.vtk_widget.GetRenderWindow())
         self.renderer = self.core.renderer
 
+        # ⏱️ رسم واحد على الأكثر لكل إطار شاشة
+        self.render_scheduler = RenderScheduler(self.vtk_widget.GetRenderWindow(), self)
+
         # 🧭 الشبكة والمحاور
         self.grid_axes = GridAxesManager(self.renderer)
 
-        # ✏️ أدوات الرسم والتعديل
+        # ✏️ أدوات الرسم والتعديل: نموذج الرسم + فهرس مكاني مشترك (العرض المجمّع يُنشأ في SketchOps)
+        self.sketch_doc = SketchDocument()
+        self.sketch_index = SketchIndex()
+        self.sketch_view = None
+        self.history = CommandStack(self.sketch_doc, self.renderer, self.core.lod, self)
+        # 📐 قيود وأبعاد بارامترية (تغييرات القيود تُسجَّل في نفس سجل التراجع)
+        self.sketch_constraints = SketchConstraints(self.sketch_doc)
+        self.sketch_constraints.history = self.history
         self.sketch_ops = SketchOps(self)
+        self.history.trimmed.connect(self._on_history_trimmed)
         self.modify_ops = ModifyOps(self)
 
         # 📏 إدخال القياسات
@@ -64,6 +81,10 @@ class VTKViewer(QWidget):
         self._trackball = vtkInteractorStyleTrackballCamera()
         self._install_camera_toggle_hotkey()
 
+        # ✅ LOD: نسخ خشنة أثناء تحريك الكاميرا (بكلا النمطين)
+        self.core.lod.attach_style(self.style)
+        self.core.lod.attach_style(self._trackball)
+
         # ✅ تأكيد ظهور الشبكة
         if hasattr(self, "grid_axes"):
             try:
@@ -105,14 +126,45 @@ class VTKViewer(QWidget):
 
 
     # ------------------------------------------------------------------
-    def update_view(self):
-        if self.vtk_widget:
-            self.vtk_widget.GetRenderWindow().Render()
+    def update_view(self, immediate: bool = False):
+        """طلب رسم: يُدمج مع باقي الطلبات في نفس الإطار، أو فوري عند immediate=True."""
+        if not self.vtk_widget:
+            return
+        self.render_scheduler.request()
+        if immediate:
+            self.render_scheduler.flush()
+
+    # ------------------------------------------------------------------
+    # ↩️ تراجع / تقدم
+    # ------------------------------------------------------------------
+    def undo(self):
+        label = self.history.undo_label()
+        if self.history.undo():
+            self._after_history()
+            print(f"↩️ [Viewer] تراجع: {label}")
+
+    def redo(self):
+        label = self.history.redo_label()
+        if self.history.redo():
+            self._after_history()
+            print(f"↪️ [Viewer] تقدم: {label}")
+
+    def _on_history_trimmed(self):
+        # ملصقات العناصر المحذوفة تبقى فقط ما دام أمر في السجل قد يعيد عناصرها
+        if self.sketch_view is not None and self.sketch_view.has_detached:
+            self.sketch_view.release_detached(self.history.referenced_ids())
+
+    def _after_history(self):
+        # التحديد لا يشير لعناصر لم تعد موجودة
+        self.style.selection = [i for i in self.style.selection if i in self.sketch_doc]
+        self.update_view()
 
     # ------------------------------------------------------------------
     def clear_scene(self):
         actors = self.renderer.GetActors()
         actors.InitTraversal()
+        # actors الرسم المجمّعة تبقى ملكاً لـ SketchView (التراجع يعيد عناصر النموذج نفسها)
+        sketch_actors = set(self.sketch_view.actors()) | set(self.sketch_view.label_actors())
         to_remove = []
         actor = actors.GetNextActor()
         while actor:
@@ -120,6 +172,14 @@ class VTKViewer(QWidget):
             actor = actors.GetNextActor()
         for a in to_remove:
             self.renderer.RemoveActor(a)
+            if a not in sketch_actors:
+                self.history.actor_removed(a)
+        self.core.lod.clear()
+        self.sketch_doc.clear()
+        if not self.history.in_transaction:
+            # مسح غير قابل للتراجع: السجل يشير لعناصر لم تعد موجودة (ويحرر ملصقاتها)
+            self.history.clear()
+        self.sketch_view.attach()
         self.update_view()
         print("🧹 Scene cleared")
 
@@ -131,7 +191,7 @@ class VTKViewer(QWidget):
         print(f"📂 [VTKViewer] تحميل DXF من: {file_path}")
 
         try:
-            segs, bbox = load_dxf_segments(file_path)
+            segs, bbox = load_dxf_segments(file_path, as_array=True)
             if not segs:
                 print("⚠️ [VTKViewer] ملف DXF فارغ أو غير مدعوم.")
                 return
@@ -145,40 +205,16 @@ class VTKViewer(QWidget):
             for a in getattr(self, "_shape_actors", []):
                 try:
                     self.core.renderer.RemoveActor(a)
+                    self.core.lod.unregister(a)
                 except Exception:
                     pass
             self._shape_actors = []
 
-            # 📏 الإزاحة لتكون الزاوية السفلية اليسرى هي الأصل
-            min_x, min_y = float("inf"), float("inf")
-            for (p1, p2) in segs:
-                min_x = min(min_x, p1[0], p2[0])
-                min_y = min(min_y, p1[1], p2[1])
-            offset_x, offset_y = -min_x, -min_y
-
-            # 🧩 بناء PolyData موحدة (على مستوى XZ)
-            points = vtk.vtkPoints()
-            lines = vtk.vtkCellArray()
-            pid = 0
-
-            for (p1, p2) in segs:
-                x1, z1 = float(p1[0]) + offset_x, float(p1[1]) + offset_y
-                x2, z2 = float(p2[0]) + offset_x, float(p2[1]) + offset_y
-
-                id1, id2 = pid, pid + 1
-                points.InsertNextPoint(x1, 0.0, z1)
-                points.InsertNextPoint(x2, 0.0, z2)
-
-                line = vtk.vtkLine()
-                line.GetPointIds().SetId(0, id1)
-                line.GetPointIds().SetId(1, id2)
-                lines.InsertNextCell(line)
-
-                pid += 2
+            # 📏 الإزاحة لتكون الزاوية السفلية اليسرى هي الأصل (من bbox مباشرة)
+            offset = (-bbox[0], -bbox[1])
 
-            polydata = vtk.vtkPolyData()
-            polydata.SetPoints(points)
-            polydata.SetLines(lines)
+            # 🧩 PolyData موحدة على مستوى XZ مباشرة من المصفوفة (بدون حلقات)
+            polydata = vtk_bridge.segments_polydata(segs.data, plane="XZ", offset=offset)
 
             mapper = vtk.vtkPolyDataMapper()
             mapper.SetInputData(polydata)
@@ -189,6 +225,7 @@ class VTKViewer(QWidget):
             actor.GetProperty().SetLineWidth(1.6)
 
             self.core.renderer.AddActor(actor)
+            self.core.lod.register(actor)
             self._shape_actors.append(actor)
 
             # 🧭 تحديث الشبكة بعد التحميل